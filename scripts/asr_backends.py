@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Speech Recognition Backends and Speed Profiles
+
+compile_video.py only needs word-level timestamps from an ASR engine, so the
+engine is pluggable:
+
+- openai-whisper: the reference implementation (PyTorch, float32 on CPU)
+- whisper-int8:   openai-whisper with its Linear layers dynamically quantized
+                  to int8 (torch.quantization.quantize_dynamic); same
+                  dependencies, noticeably faster on CPU
+- faster-whisper: CTranslate2 re-implementation with int8 weights
+                  (pip install faster-whisper); fastest on CPU
+
+Each backend accepts the same named decoding profiles:
+
+- accurate: beam search (5 beams), temperature fallback, conditioned on the
+            previous text
+- default:  openai-whisper's own transcribe() defaults (greedy decoding with
+            temperature fallback); what compile_video.py always used
+- fast:     greedy decoding, a single temperature and no fallback, no
+            conditioning on previous text
+
+Use benchmark_asr.py to measure speed and subtitle timing of each
+combination on a real lecture before switching.
+"""
+
+import importlib.util
+from typing import Dict, List, Type, Union
+
+from word_timing import WordTimingTable
+
+
+FALLBACK_TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+PROFILES: Dict[str, Dict] = {
+    'accurate': {'beam_size': 5, 'best_of': 5, 'temperature': FALLBACK_TEMPERATURES,
+                 'fallback': True, 'condition_on_previous_text': True},
+    'default': {'beam_size': None, 'best_of': 5, 'temperature': FALLBACK_TEMPERATURES,
+                'fallback': True, 'condition_on_previous_text': True},
+    'fast': {'beam_size': None, 'best_of': None, 'temperature': (0.0,),
+             'fallback': False, 'condition_on_previous_text': False},
+}
+
+
+class ASRBackendError(Exception):
+    """Unknown backend/profile or a backend whose package is not installed"""
+    pass
+
+
+class ASRBackend:
+    """
+    One ASR engine; models are loaded once per process and reused
+
+    Subclasses implement load() and _transcribe(). Not thread-safe:
+    compile_video.py serializes loads and inference with a lock.
+    """
+    name = ''
+    module = ''          # Import name of the package the backend needs
+    install_hint = ''
+
+    def __init__(self):
+        self.models: Dict[str, object] = {}
+
+    @classmethod
+    def available(cls) -> bool:
+        return importlib.util.find_spec(cls.module) is not None
+
+    def model(self, model_name: str):
+        if model_name not in self.models:
+            if not self.available():
+                raise ASRBackendError(f"ASR backend '{self.name}' is not installed "
+                                      f"({self.install_hint})")
+            try:
+                self.models[model_name] = self.load(model_name)
+            except ImportError as e:
+                raise ASRBackendError(f"ASR backend '{self.name}' could not load: {e} "
+                                      f"({self.install_hint})")
+        return self.models[model_name]
+
+    def load(self, model_name: str):
+        raise NotImplementedError
+
+    def transcribe(self, audio: Union[str, object], model_name: str,
+                   profile: str = 'default') -> WordTimingTable:
+        """
+        Word timestamps for a file path or a 16 kHz mono float32 array
+
+        Times are seconds from the start of the given audio.
+        """
+        if profile not in PROFILES:
+            raise ASRBackendError(f"Unknown ASR profile '{profile}' "
+                                  f"(choose from {', '.join(PROFILES)})")
+        return self._transcribe(self.model(model_name), audio, PROFILES[profile])
+
+    def _transcribe(self, model, audio, profile: Dict) -> WordTimingTable:
+        raise NotImplementedError
+
+
+class OpenAIWhisperBackend(ASRBackend):
+    name = 'openai-whisper'
+    module = 'whisper'
+    install_hint = 'pip install openai-whisper'
+
+    def load(self, model_name: str):
+        # Imported here: whisper pulls in torch, which takes seconds
+        import whisper
+        return whisper.load_model(model_name)
+
+    def _transcribe(self, model, audio, profile: Dict) -> WordTimingTable:
+        options = {
+            'word_timestamps': True,
+            'language': 'en',
+            'temperature': profile['temperature'],
+            'condition_on_previous_text': profile['condition_on_previous_text'],
+        }
+        if profile['beam_size']:
+            options['beam_size'] = profile['beam_size']
+        if profile['best_of']:
+            options['best_of'] = profile['best_of']
+        if not profile['fallback']:
+            # Never re-decode a segment at a higher temperature
+            options['temperature'] = profile['temperature'][0]
+            options['compression_ratio_threshold'] = None
+            options['logprob_threshold'] = None
+        return WordTimingTable.from_whisper_result(model.transcribe(audio, **options))
+
+
+class QuantizedWhisperBackend(OpenAIWhisperBackend):
+    name = 'whisper-int8'
+
+    def load(self, model_name: str):
+        import torch
+        import whisper
+
+        model = whisper.load_model(model_name, device='cpu')
+        # whisper.model.Linear only adds a dtype cast for fp16; make the
+        # layers plain nn.Linear so quantize_dynamic recognizes them
+        for module in model.modules():
+            if isinstance(module, torch.nn.Linear) and type(module) is not torch.nn.Linear:
+                module.__class__ = torch.nn.Linear
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class FasterWhisperBackend(ASRBackend):
+    name = 'faster-whisper'
+    module = 'faster_whisper'
+    install_hint = 'pip install faster-whisper'
+    compute_type = 'int8'
+
+    def load(self, model_name: str):
+        from faster_whisper import WhisperModel
+        return WhisperModel(model_name, device='cpu', compute_type=self.compute_type)
+
+    def _transcribe(self, model, audio, profile: Dict) -> WordTimingTable:
+        options = {
+            'language': 'en',
+            'word_timestamps': True,
+            'beam_size': profile['beam_size'] or 1,
+            'best_of': profile['best_of'] or 1,
+            'temperature': list(profile['temperature']),
+            'condition_on_previous_text': profile['condition_on_previous_text'],
+            'vad_filter': False,  # Silence is already removed (vad.py)
+        }
+        if not profile['fallback']:
+            options['temperature'] = profile['temperature'][0]
+            options['compression_ratio_threshold'] = None
+            options['log_prob_threshold'] = None
+        segments, _ = model.transcribe(audio, **options)
+
+        table = WordTimingTable()
+        for segment in segments:  # Generator: decoding happens while iterating
+            for word in segment.words or ():
+                table.append(word.word.strip(), word.start, word.end)
+        return table
+
+
+ASR_BACKENDS: Dict[str, Type[ASRBackend]] = {
+    backend.name: backend
+    for backend in (OpenAIWhisperBackend, QuantizedWhisperBackend, FasterWhisperBackend)
+}
+_instances: Dict[str, ASRBackend] = {}
+
+
+def get_backend(name: str) -> ASRBackend:
+    """The process-wide instance of a backend (models stay loaded)"""
+    if name not in ASR_BACKENDS:
+        raise ASRBackendError(f"Unknown ASR backend '{name}' "
+                              f"(choose from {', '.join(ASR_BACKENDS)})")
+    if name not in _instances:
+        _instances[name] = ASR_BACKENDS[name]()
+    return _instances[name]
+
+
+def loaded_models() -> List[str]:
+    """'backend:model' for every model loaded in this process"""
+    return sorted(f"{name}:{model}" for name, backend in _instances.items()
+                  for model in backend.models)
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Course-wide Asset Index with Perceptual-Hash Duplicate Detection
+
+Keeps one index of every image under the course's */assets/ folders with a
+64-bit dHash and pHash per file. Hashes are computed once and cached by
+file size and mtime in `.asset_index.json` at the course root, so only new or
+changed images are decoded on later runs.
+
+Near-duplicate lookup uses a BK-tree over dHash (Hamming distance), so a
+query only visits subtrees whose distance band can contain a match rather
+than comparing against every file; candidates are then confirmed with pHash.
+
+Usage:
+    python3 asset_index.py /path/to/course            # Index and list duplicates
+    python3 asset_index.py /path/to/course --threshold 6
+
+Requires Pillow (listed in requirements.txt).
+"""
+
+import os
+import sys
+import json
+import math
+import argparse
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+INDEX_FILENAME = '.asset_index.json'
+INDEX_VERSION = 1
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.gif')
+
+HASH_SIZE = 8            # 8x8 = 64-bit hashes
+PHASH_SAMPLE_SIZE = 32   # pHash DCT input is 32x32 greyscale
+DHASH_THRESHOLD = 10     # Max differing dHash bits for a near-duplicate
+PHASH_THRESHOLD = 12     # Max differing pHash bits to confirm it
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def _bits_to_int(bits) -> int:
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def _greyscale(path: str, size: Tuple[int, int]) -> List[int]:
+    from PIL import Image
+
+    with Image.open(path) as image:
+        # Flatten transparency onto white like the video canvas
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGBA', image.size, (255, 255, 255, 255))
+            image = Image.alpha_composite(background, image)
+        return list(image.convert('L').resize(size, Image.LANCZOS).tobytes())
+
+
+def dhash(path: str) -> int:
+    """Difference hash: is each pixel brighter than its right neighbour"""
+    pixels = _greyscale(path, (HASH_SIZE + 1, HASH_SIZE))
+    width = HASH_SIZE + 1
+    return _bits_to_int(
+        pixels[row * width + col] > pixels[row * width + col + 1]
+        for row in range(HASH_SIZE) for col in range(HASH_SIZE))
+
+
+# DCT-II basis for the low-frequency coefficients pHash keeps
+_DCT = [[math.cos(math.pi * (2 * x + 1) * u / (2 * PHASH_SAMPLE_SIZE))
+         for x in range(PHASH_SAMPLE_SIZE)] for u in range(HASH_SIZE)]
+
+
+def phash(path: str) -> int:
+    """DCT hash: low-frequency coefficients above/below their median"""
+    n = PHASH_SAMPLE_SIZE
+    pixels = _greyscale(path, (n, n))
+    rows = [pixels[y * n:(y + 1) * n] for y in range(n)]
+
+    # Separable 2D DCT, keeping only the top-left HASH_SIZE x HASH_SIZE block
+    row_coeffs = [[sum(b * p for b, p in zip(basis, row)) for basis in _DCT] for row in rows]
+    coeffs = [sum(_DCT[v][y] * row_coeffs[y][u] for y in range(n))
+              for v in range(HASH_SIZE) for u in range(HASH_SIZE)]
+
+    ac = sorted(coeffs[1:])  # Skip the DC term, it only encodes brightness
+    median = (ac[len(ac) // 2 - 1] + ac[len(ac) // 2]) / 2
+    return _bits_to_int(c > median for c in coeffs)
+
+
+def image_hashes(path: str) -> Tuple[int, int]:
+    """Return (dhash, phash) for an image file"""
+    return dhash(path), phash(path)
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over 64-bit hashes with Hamming distance
+
+    Each node stores children by their distance to it; a radius search only
+    descends into children whose distance lies within [d - r, d + r].
+    """
+    __slots__ = ('root', 'size')
+
+    def __init__(self):
+        self.root = None  # [hash, items, {distance: child}]
+        self.size = 0
+
+    def add(self, value: int, item) -> None:
+        self.size += 1
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value: int, radius: int) -> List[Tuple[int, object]]:
+        """Return (distance, item) for every entry within radius, closest first"""
+        results = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(value, node[0])
+            if distance <= radius:
+                results.extend((distance, item) for item in node[1])
+            for child_distance, child in node[2].items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        results.sort(key=lambda result: result[0])
+        return results
+
+    def __len__(self):
+        return self.size
+
+
+class AssetIndex:
+    """
+    Perceptual-hash index of every image under a course's assets folders
+
+    Entries are keyed by path relative to the course root and hold
+    {'size', 'mtime_ns', 'dhash', 'phash'}, plus 'prompt' (the generator's
+    prompt cache key) for generated images.
+    """
+    def __init__(self, course_root: str, index_path: Optional[str] = None):
+        self.root = Path(course_root).resolve()
+        self.index_path = Path(index_path) if index_path else self.root / INDEX_FILENAME
+        self.entries: Dict[str, Dict] = {}
+        self.tree = BKTree()
+        self.dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != INDEX_VERSION:
+            return
+        for rel_path, entry in data.get('entries', {}).items():
+            entry['dhash'] = int(entry['dhash'], 16)
+            entry['phash'] = int(entry['phash'], 16)
+            self.entries[rel_path] = entry
+        self._rebuild_tree()
+
+    def _rebuild_tree(self) -> None:
+        self.tree = BKTree()
+        for rel_path, entry in self.entries.items():
+            self.tree.add(entry['dhash'], rel_path)
+
+    def save(self) -> None:
+        """Write the index atomically (only if something changed)"""
+        if not self.dirty:
+            return
+        data = {
+            'version': INDEX_VERSION,
+            'entries': {
+                rel_path: dict(entry, dhash=f"{entry['dhash']:016x}",
+                               phash=f"{entry['phash']:016x}")
+                for rel_path, entry in sorted(self.entries.items())
+            },
+        }
+        tmp_path = self.index_path.with_name(self.index_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp_path, self.index_path)
+        self.dirty = False
+
+    def relative(self, path: str) -> str:
+        return Path(path).resolve().relative_to(self.root).as_posix()
+
+    def iter_asset_files(self) -> Iterator[Path]:
+        """Every image inside an assets/ folder under the course root"""
+        for assets_dir in sorted(self.root.rglob('assets')):
+            if not assets_dir.is_dir():
+                continue
+            for path in sorted(assets_dir.iterdir()):
+                if path.suffix.lower() in IMAGE_EXTENSIONS and path.is_file():
+                    yield path
+
+    def add(self, path: str, prompt: Optional[str] = None) -> Dict:
+        """
+        Index one file, re-hashing only if its size or mtime changed
+
+        prompt records which generator prompt produced the image; it is
+        dropped again if the file changes.
+        """
+        rel_path = self.relative(path)
+        stat = os.stat(path)
+        entry = self.entries.get(rel_path)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            if prompt and entry.get('prompt') != prompt:
+                entry['prompt'] = prompt
+                self.dirty = True
+            return entry
+
+        dhash_value, phash_value = image_hashes(path)
+        entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                 'dhash': dhash_value, 'phash': phash_value}
+        if prompt:
+            entry['prompt'] = prompt
+        replaced = rel_path in self.entries
+        self.entries[rel_path] = entry
+        if replaced:
+            self._rebuild_tree()
+        else:
+            self.tree.add(dhash_value, rel_path)
+        self.dirty = True
+        return entry
+
+    def refresh(self) -> Tuple[int, int]:
+        """
+        Bring the index up to date with the assets on disk
+
+        Returns (hashed, removed): files that had to be decoded and stale
+        entries dropped.
+        """
+        seen = set()
+        hashed = 0
+        for path in self.iter_asset_files():
+            rel_path = path.relative_to(self.root).as_posix()
+            seen.add(rel_path)
+            before = self.entries.get(rel_path)
+            try:
+                if self.add(str(path)) is not before:
+                    hashed += 1
+            except OSError as e:
+                print(f"  ⚠ Could not hash {rel_path}: {e}")
+
+        removed = [rel_path for rel_path in self.entries if rel_path not in seen]
+        for rel_path in removed:
+            del self.entries[rel_path]
+        if removed:
+            self._rebuild_tree()
+            self.dirty = True
+        return hashed, len(removed)
+
+    def find_prompt(self, prompt: str) -> List[str]:
+        """Relative paths of indexed images generated from a prompt"""
+        return [rel_path for rel_path, entry in sorted(self.entries.items())
+                if entry.get('prompt') == prompt]
+
+    def find_similar(self, hashes: Tuple[int, int],
+                     dhash_threshold: int = DHASH_THRESHOLD,
+                     phash_threshold: int = PHASH_THRESHOLD,
+                     exclude: Optional[str] = None) -> List[Tuple[int, str]]:
+        """
+        Return (dhash distance, relative path) of indexed near-duplicates
+
+        Args:
+            hashes: (dhash, phash) of the query image, from image_hashes()
+            exclude: Relative path to leave out (the query image itself)
+        """
+        dhash_value, phash_value = hashes
+        matches = []
+        for distance, rel_path in self.tree.search(dhash_value, dhash_threshold):
+            if rel_path == exclude:
+                continue
+            if hamming_distance(phash_value, self.entries[rel_path]['phash']) <= phash_threshold:
+                matches.append((distance, rel_path))
+        return matches
+
+    def duplicate_groups(self, dhash_threshold: int = DHASH_THRESHOLD,
+                         phash_threshold: int = PHASH_THRESHOLD) -> List[List[str]]:
+        """Group indexed files that are near-duplicates of each other"""
+        grouped = set()
+        groups = []
+        for rel_path in sorted(self.entries):
+            if rel_path in grouped:
+                continue
+            entry = self.entries[rel_path]
+            matches = self.find_similar((entry['dhash'], entry['phash']),
+                                        dhash_threshold, phash_threshold, exclude=rel_path)
+            group = [rel_path] + [m for _, m in matches if m not in grouped]
+            if len(group) > 1:
+                grouped.update(group)
+                groups.append(group)
+        return groups
+
+
+def find_course_root(video_folder: str) -> Path:
+    """Course root for a Week-N/Video-M folder (two levels up)"""
+    return Path(video_folder).resolve().parent.parent
+
+
+def main():
+    """Index a course's assets and report near-duplicate images"""
+    parser = argparse.ArgumentParser(description="Index course assets and find duplicates")
+    parser.add_argument('course_folder', help="Course root containing Week-N/Video-M folders")
+    parser.add_argument('--threshold', type=int, default=DHASH_THRESHOLD,
+                        help=f"Max differing dHash bits (default {DHASH_THRESHOLD})")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.course_folder):
+        print(f"Error: Folder not found: {args.course_folder}")
+        sys.exit(1)
+
+    index = AssetIndex(args.course_folder)
+    hashed, removed = index.refresh()
+    index.save()
+    print(f"✓ Indexed {len(index.entries)} images "
+          f"({hashed} hashed, {len(index.entries) - hashed} cached, {removed} removed)")
+
+    groups = index.duplicate_groups(args.threshold)
+    if not groups:
+        print("✓ No near-duplicate images found")
+        return
+
+    print(f"\n⚠ {len(groups)} group(s) of near-duplicate images:")
+    for group in groups:
+        print()
+        for rel_path in group:
+            print(f"  {rel_path}")
+
+
+if __name__ == '__main__':
+    main()
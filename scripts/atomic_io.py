@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Atomic Outputs and the Build Journal
+
+Two rules keep an interrupted run from poisoning the next one:
+
+1. Outputs are never written in place. Writers produce a temp file next to
+   the target and rename it into place when complete (atomic_output), so a
+   killed TTS download or FFmpeg render leaves no half-written frame_N.mp3,
+   segment or final_video.mp4 that looks valid.
+
+2. Completed units of work are appended to a per-video journal,
+   .build/journal.jsonl, one JSON object per line:
+
+       {"stage": "tts", "unit": "frame_3", "key": "<input hash>", "sha256": "...", "time": ...}
+
+   A unit counts as done only if the latest entry has the same input key
+   (narration + voice settings, segment cache key, ...) and its output still
+   exists. Re-running a stage skips done units and redoes the rest, so a run
+   killed at frame 30 of 40 resumes at frame 31.
+
+Entries are appended and fsynced one at a time; a torn last line from a
+crash is ignored. The file is compacted to the latest entry per unit when
+it grows. Appends and compaction hold an flock on .build/journal.lock, so
+a compaction never drops an entry another process (the daemon, a watch
+loop, the render farm) appends meanwhile.
+
+Usage:
+    python3 atomic_io.py Week-1/Video-1          # Completed units per stage
+    python3 atomic_io.py Week-1/Video-1 --clear tts
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+from content_store import write_file_atomic, file_digest
+
+
+JOURNAL_FILENAME = 'journal.jsonl'
+JOURNAL_LOCK_FILENAME = 'journal.lock'
+COMPACT_RATIO = 4        # Rewrite when lines exceed 4x the live entries
+TEMP_NAME_PATTERN = re.compile(r'\.(?:partial|tmp)\.(\d+)\.\d+')
+
+
+def partial_path(path: str) -> str:
+    """
+    Temp name for an output being written
+
+    Keeps the extension so tools that infer the format from the name
+    (FFmpeg) still work; unique per process and thread.
+    """
+    root, extension = os.path.splitext(path)
+    return f"{root}.partial.{os.getpid()}.{threading.get_ident()}{extension}"
+
+
+@contextmanager
+def atomic_output(path: str, tmp_path: Optional[str] = None) -> Iterator[str]:
+    """
+    Yield a temp path to write path's content to; rename into place on success
+
+    If the block raises (or the process dies) the target is left as it was.
+    tmp_path overrides the default partial_path(path), e.g. when a command
+    writing it was built earlier.
+    """
+    tmp_path = tmp_path or partial_path(path)
+    try:
+        yield tmp_path
+        if not os.path.exists(tmp_path):
+            raise FileNotFoundError(f"No output was written for {path}")
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def remove_stale_partials(directory: str) -> int:
+    """
+    Delete temp outputs left by processes that were killed
+
+    Temp names carry the writer's pid (partial_path, write_file_atomic);
+    files of processes that are still running are left alone. Returns the
+    number of files removed.
+    """
+    removed = 0
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return 0
+    for name in names:
+        match = TEMP_NAME_PATTERN.search(name)
+        if not match:
+            continue
+        pid = int(match.group(1))
+        if pid == os.getpid():
+            continue  # Being written by this process
+        try:
+            os.kill(pid, 0)
+            continue  # Still running
+        except ProcessLookupError:
+            pass
+        except PermissionError:
+            continue  # Running as another user
+        try:
+            os.remove(os.path.join(directory, name))
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def write_text_atomic(path: str, text: str) -> None:
+    write_file_atomic(path, text.encode('utf-8'))
+
+
+def write_json_atomic(path: str, data, **dump_options) -> None:
+    write_text_atomic(path, json.dumps(data, **dump_options))
+
+
+class Journal:
+    """
+    Append-only record of completed units of work for one video folder
+
+    Thread-safe; one instance per process per video is enough. Units are
+    identified by (stage, unit); key is a hash of the unit's inputs.
+    """
+
+    def __init__(self, video_folder: str):
+        self.path = os.path.join(video_folder, '.build', JOURNAL_FILENAME)
+        self.lock_path = os.path.join(video_folder, '.build', JOURNAL_LOCK_FILENAME)
+        self.lock = threading.Lock()
+        self.entries, self.lines = self._read()
+        if self.lines > COMPACT_RATIO * max(1, len(self.entries)):
+            self.compact()
+
+    def _read(self) -> Tuple[Dict[tuple, Dict], int]:
+        """Latest entry per unit in the journal file, and its number of lines"""
+        entries: Dict[tuple, Dict] = {}
+        lines = 0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        unit = (entry['stage'], entry['unit'])
+                    except (ValueError, KeyError, TypeError):
+                        continue  # Torn write from a crash
+                    lines += 1
+                    if entry.get('cleared'):
+                        entries.pop(unit, None)
+                    else:
+                        entries[unit] = entry
+        except OSError:
+            pass
+        return entries, lines
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """
+        Exclusive flock shared by every process writing this journal
+
+        A sidecar file, because compaction replaces the journal's inode.
+        Without fcntl (Windows) only threads of this process are serialized.
+        """
+        os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+        try:
+            import fcntl
+        except ImportError:
+            yield
+            return
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def compact(self) -> None:
+        """
+        Rewrite the journal with only the latest entry per unit
+
+        The file is re-read under the lock, so entries other processes
+        appended since this one loaded it are kept (and picked up).
+        """
+        with self.lock, self._file_lock():
+            self.entries, _ = self._read()
+            text = ''.join(json.dumps(entry) + '\n' for entry in self.entries.values())
+            write_text_atomic(self.path, text)
+            self.lines = len(self.entries)
+
+    def _append(self, entry: Dict) -> None:
+        with self._file_lock():
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+        self.lines += 1
+
+    def get(self, stage: str, unit: str) -> Optional[Dict]:
+        with self.lock:
+            return self.entries.get((stage, unit))
+
+    def is_done(self, stage: str, unit: str, key: str, output: Optional[str] = None) -> bool:
+        """
+        True if unit was completed from the same inputs
+
+        With output, the file must also exist and (if its hash was
+        recorded) still have the recorded content.
+        """
+        entry = self.get(stage, unit)
+        if entry is None or entry.get('key') != key:
+            return False
+        if output is not None:
+            if not os.path.exists(output):
+                return False
+            if 'sha256' in entry and file_digest(output) != entry['sha256']:
+                return False
+        return True
+
+    def record(self, stage: str, unit: str, key: str, output: Optional[str] = None,
+               **info) -> None:
+        """Mark unit done; call only after its output is in place"""
+        entry = {'stage': stage, 'unit': unit, 'key': key}
+        if output is not None:
+            entry['sha256'] = file_digest(output)
+        entry.update(info)
+        entry['time'] = round(time.time(), 3)
+        with self.lock:
+            self._append(entry)
+            self.entries[(stage, unit)] = entry
+
+    def clear(self, stage: Optional[str] = None) -> int:
+        """Forget completed units (of one stage, or all); returns how many"""
+        with self.lock:
+            units = [unit for unit in self.entries if stage is None or unit[0] == stage]
+            for unit_stage, unit in units:
+                self._append({'stage': unit_stage, 'unit': unit, 'cleared': True})
+                del self.entries[(unit_stage, unit)]
+        return len(units)
+
+    def completed(self, stage: str) -> Dict[str, Dict]:
+        with self.lock:
+            return {unit: entry for (entry_stage, unit), entry in self.entries.items()
+                    if entry_stage == stage}
+
+
+def main():
+    """Show or clear a video's build journal"""
+    parser = argparse.ArgumentParser(description="Inspect the resumable build journal")
+    parser.add_argument('video_folder', help="Video folder")
+    parser.add_argument('--clear', nargs='?', const='', metavar='STAGE',
+                        help="Forget completed units (all stages if none given)")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.video_folder):
+        print(f"Error: Folder not found: {args.video_folder}")
+        sys.exit(1)
+
+    journal = Journal(args.video_folder)
+    if args.clear is not None:
+        count = journal.clear(args.clear or None)
+        journal.compact()
+        print(f"✓ Cleared {count} unit(s)")
+        return
+
+    stages = sorted({stage for stage, _ in journal.entries})
+    if not stages:
+        print("No completed units recorded")
+    for stage in stages:
+        units = journal.completed(stage)
+        latest = max(entry['time'] for entry in units.values())
+        print(f"  {stage:<12} {len(units):4d} unit(s), last at "
+              f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(latest))}")
+
+
+if __name__ == '__main__':
+    main()
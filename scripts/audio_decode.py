@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Decode-Once Audio Cache
+
+Every consumer of a frame's MP3 used to decode it on its own: ffprobe for
+the duration, Whisper's internal ffmpeg call to resample to 16 kHz, and the
+final FFmpeg mux. This module runs one FFmpeg process per MP3 that writes
+both forms at once:
+
+- `<sha256>.16k.npy`: 16 kHz mono float32, the exact input Whisper expects,
+  loadable as a memory map (numpy.load(..., mmap_mode='c'))
+- `<sha256>.wav`: PCM at the source rate and channel count, which the mux
+  reads instead of decoding the MP3 again
+
+Files are keyed by the MP3's content hash (content_store.file_digest), so a
+rebuild only decodes audio that changed. Durations come from the WAV sample
+count, so frame timing is exact rather than ffprobe's container estimate.
+
+The .npy header is written by hand, so decoding needs only FFmpeg; numpy is
+imported when the ASR array is loaded.
+
+Usage:
+    python3 audio_decode.py Week-1/Video-1      # Decode (or verify) every frame's audio
+"""
+
+import os
+import sys
+import wave
+import struct
+import argparse
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List
+
+from content_store import file_digest
+
+
+ASR_SAMPLE_RATE = 16000          # Whisper's model input rate
+DECODED_DIRNAME = 'decoded'      # Inside the video folder's .build/
+DECODE_JOBS = min(8, os.cpu_count() or 1)
+NPY_HEADER_SIZE = 128            # Fixed, so the shape can be filled in after streaming
+READ_CHUNK_SIZE = 256 * 1024
+
+
+class AudioDecodeError(Exception):
+    """FFmpeg could not decode an audio file"""
+    pass
+
+
+class DecodedAudio:
+    """Cached decode of one audio file"""
+    __slots__ = ('source', 'digest', 'asr_path', 'pcm_path', 'sample_rate', 'samples')
+
+    def __init__(self, source: str, digest: str, asr_path: str, pcm_path: str,
+                 sample_rate: int, samples: int):
+        self.source = source
+        self.digest = digest
+        self.asr_path = asr_path      # 16 kHz mono float32 .npy
+        self.pcm_path = pcm_path      # Full-rate PCM .wav
+        self.sample_rate = sample_rate
+        self.samples = samples
+
+    @property
+    def duration(self) -> float:
+        """Exact duration in seconds from the decoded sample count"""
+        return self.samples / self.sample_rate
+
+    def load_asr(self):
+        """16 kHz float32 samples as a copy-on-write memory map"""
+        import numpy
+        return numpy.load(self.asr_path, mmap_mode='c')
+
+
+def npy_header(samples: int) -> bytes:
+    """NPY v1.0 header for a 1-D little-endian float32 array, padded to NPY_HEADER_SIZE"""
+    header = "{'descr': '<f4', 'fortran_order': False, 'shape': (%d,), }" % samples
+    header = header.ljust(NPY_HEADER_SIZE - 10 - 1) + '\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1')
+
+
+def decoded_paths(cache_dir: str, digest: str):
+    return (os.path.join(cache_dir, f"{digest}.16k.npy"),
+            os.path.join(cache_dir, f"{digest}.wav"))
+
+
+def _wav_info(path: str):
+    """(sample_rate, frame_count) from a WAV header"""
+    with wave.open(path, 'rb') as w:
+        return w.getframerate(), w.getnframes()
+
+
+def decode_audio(audio_path: str, cache_dir: str) -> DecodedAudio:
+    """
+    Decode an audio file into its ASR and mux forms, or reuse a cached decode
+
+    Both outputs are written under temp names and renamed into place, so an
+    interrupted decode is never mistaken for a cached one.
+    """
+    digest = file_digest(audio_path)
+    asr_path, pcm_path = decoded_paths(cache_dir, digest)
+
+    if os.path.exists(asr_path) and os.path.exists(pcm_path):
+        try:
+            sample_rate, samples = _wav_info(pcm_path)
+            return DecodedAudio(audio_path, digest, asr_path, pcm_path, sample_rate, samples)
+        except (OSError, EOFError, wave.Error):
+            pass  # Damaged cache entry; decode again
+
+    os.makedirs(cache_dir, exist_ok=True)
+    suffix = f".tmp.{os.getpid()}.{threading.get_ident()}"
+    asr_tmp = asr_path + suffix
+    pcm_tmp = pcm_path + suffix
+
+    cmd = [
+        'ffmpeg', '-v', 'error', '-nostdin', '-y', '-i', audio_path,
+        '-map', '0:a:0', '-ac', '1', '-ar', str(ASR_SAMPLE_RATE), '-f', 'f32le', 'pipe:1',
+        '-map', '0:a:0', '-c:a', 'pcm_s16le', '-f', 'wav', pcm_tmp,
+    ]
+    try:
+        with open(asr_tmp, 'wb') as asr_file:
+            asr_file.write(npy_header(0))
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            size = 0
+            while True:
+                chunk = process.stdout.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                asr_file.write(chunk)
+                size += len(chunk)
+            stderr = process.stderr.read().decode('utf-8', 'replace')
+            if process.wait() != 0:
+                raise AudioDecodeError(f"Could not decode {audio_path}: {stderr.strip()[-500:]}")
+            asr_file.seek(0)
+            asr_file.write(npy_header(size // 4))
+
+        sample_rate, samples = _wav_info(pcm_tmp)
+        os.replace(pcm_tmp, pcm_path)
+        os.replace(asr_tmp, asr_path)
+    except FileNotFoundError as e:
+        raise AudioDecodeError(f"ffmpeg not found on PATH ({e})")
+    finally:
+        for path in (asr_tmp, pcm_tmp):
+            if os.path.exists(path):
+                os.remove(path)
+
+    return DecodedAudio(audio_path, digest, asr_path, pcm_path, sample_rate, samples)
+
+
+def decode_all(audio_paths: List[str], cache_dir: str,
+               jobs: int = DECODE_JOBS) -> List[DecodedAudio]:
+    """Decode several files with a bounded pool of FFmpeg processes (order preserved)"""
+    if jobs <= 1 or len(audio_paths) <= 1:
+        return [decode_audio(path, cache_dir) for path in audio_paths]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(lambda path: decode_audio(path, cache_dir), audio_paths))
+
+
+def prune_decoded(cache_dir: str, keep: Iterable[DecodedAudio]) -> int:
+    """
+    Delete decodes of audio no longer used by the video
+
+    Full-rate PCM is ~5 MB per minute, so stale entries from regenerated
+    audio are removed after each build. Returns the number of files removed.
+    """
+    keep_digests = {decoded.digest for decoded in keep}
+    removed = 0
+    try:
+        names = os.listdir(cache_dir)
+    except OSError:
+        return 0
+    for name in names:
+        if name.split('.', 1)[0] not in keep_digests:
+            os.remove(os.path.join(cache_dir, name))
+            removed += 1
+    return removed
+
+
+def main():
+    """Decode every frame's audio in a video folder and report durations"""
+    parser = argparse.ArgumentParser(description="Decode frame audio once into the build cache")
+    parser.add_argument('video_folder', help="Video folder containing audio/")
+    parser.add_argument('--jobs', type=int, default=DECODE_JOBS,
+                        help=f"Parallel FFmpeg processes (default {DECODE_JOBS})")
+    args = parser.parse_args()
+
+    audio_dir = os.path.join(args.video_folder, 'audio')
+    if not os.path.isdir(audio_dir):
+        print(f"Error: Folder not found: {audio_dir}")
+        sys.exit(1)
+
+    paths = sorted(os.path.join(audio_dir, name) for name in os.listdir(audio_dir)
+                   if name.endswith('.mp3'))
+    cache_dir = os.path.join(args.video_folder, '.build', DECODED_DIRNAME)
+    try:
+        decoded = decode_all(paths, cache_dir, args.jobs)
+    except AudioDecodeError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    for audio in decoded:
+        print(f"  ✓ {os.path.basename(audio.source)}: {audio.duration:.3f}s "
+              f"({audio.samples} samples @ {audio.sample_rate} Hz)")
+    print(f"\n✓ {len(decoded)} file(s), {sum(a.duration for a in decoded):.1f}s total → {cache_dir}")
+
+
+if __name__ == '__main__':
+    main()
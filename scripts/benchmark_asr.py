@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+ASR Accuracy vs Speed Benchmark
+
+Transcribes a real lecture (the bundled example by default) with every
+installed ASR backend and decoding profile (asr_backends.py) and reports,
+for each combination:
+
+- Speed: transcription seconds and real-time factor (model load excluded)
+- Accuracy: word error rate of the transcript against the script narration
+- Subtitle timing: deviation of the aligned subtitle word start times from
+  the reference combination (95th percentile and maximum)
+
+A combination passes when its 95th-percentile timing deviation is within
+--tolerance; the fastest passing one is recommended for compile_video.py's
+--asr-backend/--asr-profile.
+
+Usage:
+    python3 benchmark_asr.py
+    python3 benchmark_asr.py Week-2/Video-3 --backends openai-whisper faster-whisper
+    python3 benchmark_asr.py --profiles default fast --tolerance 0.1 --output asr_bench.json
+
+The reference defaults to openai-whisper with the accurate profile.
+Requires FFmpeg and at least the reference backend's package.
+"""
+
+import os
+import re
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import contextlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import compile_video
+from asr_backends import ASR_BACKENDS, PROFILES, ASRBackendError
+from audio_decode import AudioDecodeError
+from vad import speech_map_for
+from script_parser import ScriptParseError
+
+
+DEFAULT_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              'example', 'Week-1', 'Video-1')
+REFERENCE = 'openai-whisper:accurate'
+TIMING_TOLERANCE_SECONDS = 0.15   # p95 subtitle word start deviation allowed
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def normalize_words(text: str) -> List[str]:
+    return WORD_PATTERN.findall(text.lower().replace('’', "'"))
+
+
+def word_error_rate(reference: List[str], hypothesis: List[str]) -> Tuple[int, int]:
+    """(edit distance in words, reference length)"""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i] + [0] * len(hypothesis)
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1], len(reference)
+
+
+def prepare_frames(video_folder: str, use_vad: bool) -> List[compile_video.FrameData]:
+    """Parse the script and decode every frame's audio once (shared by all runs)"""
+    frames = compile_video.parse_script(os.path.join(video_folder, 'script.md'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        compile_video.validate_input_files(video_folder, frames)
+    if use_vad:
+        for frame in frames:
+            frame.speech = speech_map_for(frame.decoded)
+    return frames
+
+
+def run_combination(frames: List[compile_video.FrameData], backend: str, profile: str,
+                    model_name: str) -> Dict:
+    """Transcribe every frame with one backend/profile; returns timings and aligned words"""
+    start = time.perf_counter()
+    compile_video.load_whisper_model(model_name, backend)
+    load_seconds = time.perf_counter() - start
+
+    seconds = 0.0
+    errors = reference_words = 0
+    aligned = []
+    for frame in frames:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            words = compile_video.transcribe_audio_with_whisper(
+                frame.audio_path, frame.actual_start_time, model_name=model_name,
+                decoded=frame.decoded, speech=frame.speech,
+                backend=backend, profile=profile)
+        seconds += time.perf_counter() - start
+
+        distance, length = word_error_rate(normalize_words(frame.narration),
+                                           normalize_words(' '.join(w for w, _, _ in words)))
+        errors += distance
+        reference_words += length
+        if len(words):
+            aligned.append(list(compile_video.align_script_to_whisper_timestamps(
+                frame.narration, words).starts))
+        else:
+            aligned.append([])
+
+    audio_seconds = sum(frame.actual_audio_duration for frame in frames)
+    return {
+        'backend': backend,
+        'profile': profile,
+        'model': model_name,
+        'load_seconds': load_seconds,
+        'seconds': seconds,
+        'real_time_factor': seconds / audio_seconds if audio_seconds else None,
+        'wer': errors / reference_words if reference_words else None,
+        '_aligned': aligned,
+    }
+
+
+def timing_deviation(aligned: List[List[float]], reference: List[List[float]]) -> Dict:
+    """p95/max absolute difference of aligned word starts against the reference"""
+    deltas = []
+    missing = 0
+    for frame_starts, reference_starts in zip(aligned, reference):
+        if len(frame_starts) != len(reference_starts):
+            missing += 1
+            continue
+        deltas.extend(abs(a - b) for a, b in zip(frame_starts, reference_starts))
+    if not deltas:
+        return {'p95': None, 'max': None, 'frames_without_words': missing}
+    deltas.sort()
+    return {
+        'p95': deltas[min(len(deltas) - 1, int(0.95 * len(deltas)))],
+        'max': deltas[-1],
+        'mean': statistics.mean(deltas),
+        'frames_without_words': missing,
+    }
+
+
+def main():
+    """Benchmark ASR backends/profiles on a lecture and recommend one"""
+    parser = argparse.ArgumentParser(description="Compare ASR backends and profiles")
+    parser.add_argument('video_folder', nargs='?', default=DEFAULT_FOLDER,
+                        help="Video folder with script.md and audio/ (default: example lecture)")
+    parser.add_argument('--backends', nargs='+', choices=sorted(ASR_BACKENDS),
+                        help="Backends to try (default: every installed one)")
+    parser.add_argument('--profiles', nargs='+', choices=list(PROFILES), default=list(PROFILES))
+    parser.add_argument('--model', default=compile_video.WHISPER_MODEL,
+                        help=f"Model size (default: {compile_video.WHISPER_MODEL})")
+    parser.add_argument('--reference', default=REFERENCE,
+                        help=f"backend:profile that timing is compared to (default: {REFERENCE})")
+    parser.add_argument('--tolerance', type=float, default=TIMING_TOLERANCE_SECONDS,
+                        help=f"Allowed p95 timing deviation in seconds "
+                             f"(default: {TIMING_TOLERANCE_SECONDS})")
+    parser.add_argument('--no-vad', action='store_true', help="Transcribe the full audio")
+    parser.add_argument('--output', default='asr_bench.json', help="JSON results path")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.video_folder, 'script.md')):
+        print(f"Error: No script.md in {args.video_folder}")
+        sys.exit(1)
+
+    backends = args.backends or [name for name, cls in ASR_BACKENDS.items() if cls.available()]
+    reference_backend, _, reference_profile = args.reference.partition(':')
+    combinations = [(reference_backend, reference_profile)]
+    combinations += [(backend, profile) for backend in backends for profile in args.profiles
+                     if (backend, profile) != (reference_backend, reference_profile)]
+
+    try:
+        frames = prepare_frames(args.video_folder, not args.no_vad)
+    except (AudioDecodeError, ScriptParseError, compile_video.VideoCompilationError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    audio_seconds = sum(frame.actual_audio_duration for frame in frames)
+
+    print("=" * 70)
+    print("ASR BENCHMARK")
+    print("=" * 70)
+    print(f"Lecture: {args.video_folder} ({len(frames)} frames, {audio_seconds:.0f}s audio)")
+    print(f"Model: {args.model}, reference: {args.reference}, tolerance: {args.tolerance}s")
+
+    runs = []
+    reference_aligned: Optional[List[List[float]]] = None
+    for backend, profile in combinations:
+        print(f"\nRunning {backend} / {profile}...")
+        try:
+            run = run_combination(frames, backend, profile, args.model)
+        except ASRBackendError as e:
+            print(f"  ✗ {e}")
+            if reference_aligned is None:
+                print("Error: the reference combination must run")
+                sys.exit(1)
+            continue
+        aligned = run.pop('_aligned')
+        if reference_aligned is None:
+            reference_aligned = aligned
+        run['timing'] = timing_deviation(aligned, reference_aligned)
+        p95 = run['timing']['p95']
+        run['passes'] = p95 is not None and p95 <= args.tolerance
+        runs.append(run)
+        print(f"  ✓ {run['seconds']:.1f}s ({run['real_time_factor']:.2f}× real time), "
+              f"load {run['load_seconds']:.1f}s")
+
+    print(f"\n{'backend / profile':<32} {'seconds':>8} {'RTF':>6} {'WER':>6} "
+          f"{'p95 Δt':>8} {'max Δt':>8}")
+    for run in runs:
+        timing = run['timing']
+        p95 = f"{timing['p95']:.3f}" if timing['p95'] is not None else '-'
+        worst = f"{timing['max']:.3f}" if timing['max'] is not None else '-'
+        mark = '✓' if run['passes'] else '✗'
+        print(f"{mark} {run['backend'] + ' / ' + run['profile']:<30} {run['seconds']:8.1f} "
+              f"{run['real_time_factor']:6.2f} {run['wer']:6.1%} {p95:>8} {worst:>8}")
+
+    passing = [run for run in runs if run['passes']]
+    best = min(passing, key=lambda run: run['seconds']) if passing else None
+    if best:
+        print(f"\n✓ Fastest within {args.tolerance}s: {best['backend']} / {best['profile']}")
+        print(f"  python3 compile_video.py {args.video_folder} "
+              f"--asr-backend {best['backend']} --asr-profile {best['profile']}")
+
+    results = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'video_folder': args.video_folder,
+        'audio_seconds': audio_seconds,
+        'vad': not args.no_vad,
+        'tolerance': args.tolerance,
+        'reference': args.reference,
+        'runs': runs,
+        'recommended': f"{best['backend']}:{best['profile']}" if best else None,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✓ Results saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
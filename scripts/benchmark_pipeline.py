@@ -0,0 +1,580 @@
+#!/usr/bin/env python3
+"""
+Benchmark Harness for the Video Compilation Pipeline
+
+Generates synthetic lectures locally (frame PNGs, tone or silent MP3s and a
+matching script.md) and times each stage of compile_video.py at several
+lecture sizes. Everything runs offline; results are written to JSON so runs
+can be compared for regressions.
+
+Usage:
+    python3 benchmark_pipeline.py
+    python3 benchmark_pipeline.py --sizes 10 100 500 --repeat 3 --output bench.json
+    python3 benchmark_pipeline.py --skip-render --compare baseline.json
+    python3 benchmark_pipeline.py --startup-only
+
+Stages timed:
+    - parse_script
+    - validate_input_files (decode-once audio cache, see audio_decode.py)
+    - alignment (align_script_to_whisper_timestamps on synthetic transcripts)
+    - transcript_cache_roundtrip (WordTimingTable serialization)
+    - generate_subtitles_from_corrected_timestamps
+    - build_ffmpeg_command
+    - render (full FFmpeg compilation, segmented above the frame threshold)
+
+Startup budgets (fresh interpreter each run; exits non-zero when exceeded):
+    - import compile_video (cumulative, via -X importtime, with the slowest imports)
+    - compile_video --help, a missing folder, and an up-to-date (skipped) build
+    - generate_tts with no arguments
+
+Requires FFmpeg/ffprobe on PATH for fixture audio, validation and render
+(not for --startup-only).
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import zlib
+import random
+import struct
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import contextlib
+from datetime import datetime
+from typing import List, Dict, Callable, Optional
+
+import compile_video
+from word_timing import WordTimingTable
+
+
+DEFAULT_SIZES = [10, 100, 500]
+WORDS_PER_SECOND = 2.5  # Matches the teaching style guide pacing
+FRAME_WIDTH = 1920
+FRAME_HEIGHT = 1080
+
+# Vocabulary for synthetic narration (kept finance-flavoured like real scripts)
+VOCABULARY = [
+    "risk", "uncertainty", "probability", "return", "investor", "market",
+    "bond", "equity", "interest", "rate", "inflation", "portfolio", "price",
+    "the", "a", "of", "and", "to", "we", "can", "measure", "known", "unknown",
+    "insurance", "premium", "default", "capital", "asset", "value", "cash",
+    "flow", "yield", "discount", "future", "present", "data", "model",
+]
+
+
+# ---------------------------------------------------------------------------
+# Synthetic fixtures
+# ---------------------------------------------------------------------------
+
+def write_png(path: str, width: int, height: int, seed: int) -> None:
+    """
+    Write a white RGB PNG with a few black strokes using only the stdlib
+
+    The stroke layout depends on the seed so every frame image is different,
+    like real hand-drawn slides (mostly white, thin black line art).
+    """
+    rng = random.Random(seed)
+    white_row = b'\x00' + b'\xff' * (width * 3)
+
+    # Horizontal strokes at random rows, random spans
+    strokes = {}
+    for _ in range(12):
+        y = rng.randrange(height)
+        x0 = rng.randrange(width // 2)
+        x1 = min(width, x0 + rng.randrange(100, width // 2))
+        for dy in range(3):
+            if y + dy < height:
+                strokes[y + dy] = (x0, x1)
+
+    raw = bytearray()
+    for y in range(height):
+        if y in strokes:
+            x0, x1 = strokes[y]
+            row = bytearray(white_row)
+            row[1 + x0 * 3:1 + x1 * 3] = b'\x00' * ((x1 - x0) * 3)
+            raw.extend(row)
+        else:
+            raw.extend(white_row)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return (struct.pack('>I', len(data)) + tag + data +
+                struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', ihdr))
+        f.write(chunk(b'IDAT', zlib.compress(bytes(raw), 6)))
+        f.write(chunk(b'IEND', b''))
+
+
+def write_audio(path: str, duration: float, audio_kind: str, seed: int) -> None:
+    """Write an MP3 of the given duration containing a tone or silence"""
+    if audio_kind == 'tone':
+        frequency = 220 + (seed % 12) * 40
+        source = f"sine=frequency={frequency}:sample_rate=44100:duration={duration:.3f}"
+    else:
+        source = "anullsrc=r=44100:cl=mono"
+
+    cmd = ['ffmpeg', '-v', 'error', '-y', '-f', 'lavfi', '-i', source,
+           '-t', f"{duration:.3f}", '-ac', '1', '-c:a', 'libmp3lame',
+           '-b:a', '64k', path]
+    subprocess.run(cmd, check=True, capture_output=True)
+
+
+def format_script_time(seconds: float) -> str:
+    """Format seconds as M:SS for script.md headers"""
+    seconds = int(round(seconds))
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def synthetic_narration(rng: random.Random, num_words: int) -> str:
+    """Build narration text of exactly num_words words"""
+    words = [rng.choice(VOCABULARY) for _ in range(num_words)]
+    words[0] = words[0].capitalize()
+    # Sentence breaks roughly every 12 words
+    for i in range(11, num_words - 1, 12):
+        words[i] += '.'
+        words[i + 1] = words[i + 1].capitalize()
+    words[-1] += '.'
+    return ' '.join(words)
+
+
+def build_fixture(folder: str, num_frames: int, audio_kind: str, seed: int) -> List[float]:
+    """
+    Generate a synthetic lecture folder with frames/, audio/ and script.md
+
+    Returns the list of audio durations (seconds) used for each frame.
+    """
+    rng = random.Random(seed)
+    frames_dir = os.path.join(folder, 'frames')
+    audio_dir = os.path.join(folder, 'audio')
+    os.makedirs(frames_dir, exist_ok=True)
+    os.makedirs(audio_dir, exist_ok=True)
+
+    durations = []
+    script_lines = [
+        f"# Video 1: Synthetic Benchmark Lecture ({num_frames} frames)",
+        "**Course:** BENCH000 Synthetic Fixtures",
+        "",
+        "---",
+        "",
+    ]
+
+    script_time = 0
+    for n in range(num_frames):
+        duration = round(rng.uniform(6.0, 20.0), 2)
+        durations.append(duration)
+
+        write_png(os.path.join(frames_dir, f"frame_{n}.png"),
+                  FRAME_WIDTH, FRAME_HEIGHT, seed * 100003 + n)
+        write_audio(os.path.join(audio_dir, f"frame_{n}.mp3"),
+                    duration, audio_kind, seed + n)
+
+        script_duration = max(1, int(round(duration)))
+        num_words = max(1, int(script_duration * WORDS_PER_SECOND))
+        script_lines.extend([
+            f"## Frame {n} ({format_script_time(script_time)}-"
+            f"{format_script_time(script_time + script_duration)}) • {num_words} words",
+            "",
+            synthetic_narration(rng, num_words),
+            "",
+            "---",
+            "",
+        ])
+        script_time += script_duration
+
+    with open(os.path.join(folder, 'script.md'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(script_lines))
+
+    return durations
+
+
+def synthetic_whisper_words(frame) -> WordTimingTable:
+    """
+    Build Whisper-style word timings evenly spaced across the frame audio
+
+    Real transcription of tones/silence yields nothing useful, so alignment
+    and subtitles are benchmarked against deterministic synthetic timings.
+    """
+    words = frame.narration.split()
+    start = frame.actual_start_time
+    step = frame.actual_audio_duration / max(1, len(words))
+    table = WordTimingTable()
+    for i, word in enumerate(words):
+        table.append(word, start + i * step, start + (i + 1) * step)
+    return table
+
+
+# ---------------------------------------------------------------------------
+# Timing
+# ---------------------------------------------------------------------------
+
+def time_stage(func: Callable, repeat: int) -> Dict:
+    """
+    Run func repeat times with stdout suppressed and collect wall-clock timings
+
+    Returns a dict with min/median/max seconds and the raw runs.
+    """
+    runs = []
+    value = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            value = func()
+            runs.append(time.perf_counter() - start)
+    return {
+        'min': min(runs),
+        'median': statistics.median(runs),
+        'max': max(runs),
+        'runs': runs,
+        '_value': value,
+    }
+
+
+def benchmark_size(folder: str, repeat: int, skip_render: bool) -> Dict:
+    """Time every pipeline stage against one fixture folder"""
+    results = {}
+    script_path = os.path.join(folder, 'script.md')
+
+    stage = time_stage(lambda: compile_video.parse_script(script_path), repeat)
+    frames = stage.pop('_value')
+    results['parse_script'] = stage
+
+    stage = time_stage(lambda: compile_video.validate_input_files(folder, frames), repeat)
+    stage.pop('_value')
+    results['validate_input_files'] = stage
+
+    whisper_words = [synthetic_whisper_words(frame) for frame in frames]
+
+    def align_all():
+        for frame, words in zip(frames, whisper_words):
+            frame.aligned_words = compile_video.align_script_to_whisper_timestamps(
+                frame.narration, words)
+
+    stage = time_stage(align_all, repeat)
+    stage.pop('_value')
+    results['alignment'] = stage
+
+    def cache_roundtrip():
+        blobs = [words.to_bytes() for words in whisper_words]
+        for blob in blobs:
+            WordTimingTable.from_bytes(blob)
+        return sum(len(blob) for blob in blobs)
+
+    stage = time_stage(cache_roundtrip, repeat)
+    stage['cache_bytes'] = stage.pop('_value')
+    results['transcript_cache_roundtrip'] = stage
+
+    subtitle_path = os.path.join(folder, 'subtitles.srt')
+    stage = time_stage(
+        lambda: compile_video.generate_subtitles_from_corrected_timestamps(frames, subtitle_path),
+        repeat)
+    results['generate_subtitles_from_corrected_timestamps'] = stage
+    stage['subtitle_entries'] = stage.pop('_value')
+
+    stage = time_stage(
+        lambda: compile_video.build_ffmpeg_command(folder, frames, subtitle_path), repeat)
+    cmd = stage.pop('_value')
+    stage['argv_bytes'] = sum(len(arg) + 1 for arg in cmd)
+    results['build_ffmpeg_command'] = stage
+
+    if skip_render:
+        results['render'] = {'skipped': True}
+    else:
+        # Rendering is expensive, so it is timed once regardless of --repeat
+        segmented = len(frames) > compile_video.SEGMENTED_RENDER_THRESHOLD
+        if segmented:
+            stage = time_stage(lambda: compile_video.render_segmented(
+                folder, frames, subtitle_path), 1)
+        else:
+            stage = time_stage(lambda: compile_video.execute_ffmpeg(cmd), 1)
+        success, message = stage.pop('_value')
+        stage['mode'] = 'segmented' if segmented else 'single-pass'
+        stage['success'] = success
+        if not success:
+            stage['error'] = message[-500:]
+        results['render'] = stage
+
+    results['total_audio_seconds'] = sum(f.actual_audio_duration for f in frames)
+    return results
+
+
+def ffmpeg_version() -> Optional[str]:
+    """Return the first line of `ffmpeg -version`, or None if unavailable"""
+    try:
+        result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
+        return result.stdout.splitlines()[0] if result.stdout else None
+    except OSError:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Startup
+# ---------------------------------------------------------------------------
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+STARTUP_BUDGET_SECONDS = 0.5   # Wall time for --help, usage errors and no-op builds
+IMPORT_BUDGET_SECONDS = 0.15   # Cumulative `import compile_video` (whisper/torch excluded)
+
+
+def measure_import_time(module: str, top: int = 5) -> Dict:
+    """
+    Cumulative import time of a module from `python -X importtime`
+
+    Also returns the slowest direct and indirect imports, so a heavy
+    dependency that crept back to module level is easy to spot.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                            cwd=SCRIPTS_DIR, capture_output=True, text=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        # "import time:   self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imports.append((name.rstrip(), int(cumulative)))
+
+    total = next((us for name, us in imports if name.strip() == module), None)
+    slowest = sorted((entry for entry in imports if entry[0].strip() != module),
+                     key=lambda entry: -entry[1])[:top]
+    return {
+        'seconds': total / 1e6 if total is not None else None,
+        'error': result.stderr[-500:] if result.returncode else None,
+        'slowest': [{'module': name.strip(), 'seconds': us / 1e6} for name, us in slowest],
+    }
+
+
+def time_command(args: List[str], repeat: int) -> Dict:
+    """Wall-clock a script invocation in a fresh interpreter, repeat times"""
+    runs = []
+    output = ''
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable] + args, cwd=SCRIPTS_DIR,
+                                capture_output=True, text=True)
+        runs.append(time.perf_counter() - start)
+        output = result.stdout + result.stderr
+    return {
+        'min': min(runs),
+        'median': statistics.median(runs),
+        'max': max(runs),
+        'runs': runs,
+        'returncode': result.returncode,
+        '_output': output,
+    }
+
+
+def build_cached_fixture(folder: str, num_frames: int = 3) -> None:
+    """
+    A video folder whose build stamp is current, so compile_video has nothing to do
+
+    File contents are never read on the up-to-date path, so placeholder
+    audio and video files are enough and no FFmpeg is needed.
+    """
+    os.makedirs(os.path.join(folder, 'frames'), exist_ok=True)
+    os.makedirs(os.path.join(folder, 'audio'), exist_ok=True)
+    lines = ["# Video 1: Startup Benchmark", "", "---", ""]
+    for n in range(num_frames):
+        write_png(os.path.join(folder, 'frames', f"frame_{n}.png"), FRAME_WIDTH, FRAME_HEIGHT, n)
+        with open(os.path.join(folder, 'audio', f"frame_{n}.mp3"), 'wb') as f:
+            f.write(b'\xff\xfb' + bytes(62))
+        lines.extend([f"## Frame {n} ({format_script_time(n * 5)}-{format_script_time(n * 5 + 5)}) • 3 words",
+                      "", "Risk and return.", "", "---", ""])
+    with open(os.path.join(folder, 'script.md'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+    with open(os.path.join(folder, 'final_video.mp4'), 'wb') as f:
+        f.write(bytes(64))
+    compile_video.write_build_stamp(folder)
+
+
+def benchmark_startup(workdir: str, repeat: int) -> Dict:
+    """
+    Time the paths that should never load Whisper, torch or HTTP clients
+
+    Each entry carries its budget and whether it was exceeded.
+    """
+    results = {}
+    import_stats = measure_import_time('compile_video')
+    import_stats['budget'] = IMPORT_BUDGET_SECONDS
+    import_stats['over_budget'] = (import_stats['seconds'] is None or
+                                   import_stats['seconds'] > IMPORT_BUDGET_SECONDS)
+    results['import compile_video'] = import_stats
+
+    cached = os.path.join(workdir, 'Video-cached')
+    build_cached_fixture(cached)
+    commands = {
+        'compile_video --help': ['compile_video.py', '--help'],
+        'compile_video missing folder': ['compile_video.py', os.path.join(workdir, 'missing')],
+        'compile_video up to date': ['compile_video.py', cached],
+        'generate_tts usage': ['generate_tts.py'],
+    }
+    for name, args in commands.items():
+        stats = time_command(args, repeat)
+        output = stats.pop('_output')
+        stats['budget'] = STARTUP_BUDGET_SECONDS
+        stats['over_budget'] = stats['median'] > STARTUP_BUDGET_SECONDS
+        if name == 'compile_video up to date' and 'Up to date' not in output:
+            stats['over_budget'] = True
+            stats['error'] = "build was not skipped: " + output[-300:]
+        results[name] = stats
+    return results
+
+
+def print_startup(startup: Dict) -> List[str]:
+    """Print startup timings; returns descriptions of budget overruns"""
+    print("\nStartup:")
+    overruns = []
+    for name, stats in startup.items():
+        seconds = stats['median'] if 'median' in stats else stats['seconds']
+        if seconds is None:
+            print(f"  {name:<48} failed")
+        else:
+            flag = "  ✗ OVER BUDGET" if stats['over_budget'] else ""
+            print(f"  {name:<48} {seconds * 1000:10.1f} ms{flag}")
+        for entry in stats.get('slowest', []):
+            print(f"    {entry['module']:<46} {entry['seconds'] * 1000:10.1f} ms")
+        if stats['over_budget']:
+            detail = stats.get('error') or f"{seconds:.3f}s > {stats['budget']:.3f}s"
+            overruns.append(f"{name}: {detail}")
+    return overruns
+
+
+# ---------------------------------------------------------------------------
+# Regression comparison
+# ---------------------------------------------------------------------------
+
+def compare_results(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """
+    Compare median stage timings against a baseline results file
+
+    Returns a list of human-readable regression descriptions (empty if none).
+    """
+    regressions = []
+    for size, stages in current['results'].items():
+        base_stages = baseline.get('results', {}).get(size)
+        if not base_stages:
+            continue
+        for name, stats in stages.items():
+            if not isinstance(stats, dict) or 'median' not in stats:
+                continue
+            base = base_stages.get(name)
+            if not isinstance(base, dict) or not base.get('median'):
+                continue
+            ratio = stats['median'] / base['median']
+            if ratio > 1 + threshold:
+                regressions.append(
+                    f"{size} frames / {name}: {base['median']:.3f}s -> "
+                    f"{stats['median']:.3f}s ({(ratio - 1) * 100:+.0f}%)")
+    return regressions
+
+
+def print_summary(results: Dict) -> None:
+    """Print a compact table of median timings per size"""
+    for size, stages in results['results'].items():
+        print(f"\n{size} frames ({stages['total_audio_seconds']:.0f}s of audio):")
+        for name, stats in stages.items():
+            if not isinstance(stats, dict):
+                continue
+            if stats.get('skipped'):
+                print(f"  {name:<48} skipped")
+            elif 'median' in stats:
+                status = "" if stats.get('success', True) else "  ✗ FAILED"
+                print(f"  {name:<48} {stats['median'] * 1000:10.1f} ms{status}")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark the video compilation pipeline")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Lecture sizes in frames (default: 10 100 500)")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="Timed runs per stage (render always runs once)")
+    parser.add_argument('--audio', choices=['tone', 'silence'], default='tone',
+                        help="Synthetic audio content")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--skip-render', action='store_true',
+                        help="Skip the full FFmpeg render stage")
+    parser.add_argument('--workdir', help="Keep fixtures in this folder instead of a temp dir")
+    parser.add_argument('--output', default='bench_results.json', help="JSON results path")
+    parser.add_argument('--compare', help="Baseline JSON to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="Allowed median slowdown before flagging (default: 0.10)")
+    parser.add_argument('--startup-only', action='store_true',
+                        help="Only check import and startup budgets (no FFmpeg needed)")
+    args = parser.parse_args()
+
+    if not args.startup_only and (shutil.which('ffmpeg') is None or shutil.which('ffprobe') is None):
+        print("Error: ffmpeg and ffprobe must be on PATH")
+        sys.exit(1)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='evm_bench_')
+    results = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'ffmpeg': ffmpeg_version(),
+        'seed': args.seed,
+        'audio': args.audio,
+        'repeat': args.repeat,
+        'results': {},
+        'startup': {},
+    }
+
+    print("=" * 70)
+    print("VIDEO PIPELINE BENCHMARK")
+    print("=" * 70)
+    if not args.startup_only:
+        print(f"Sizes: {', '.join(str(s) for s in args.sizes)} frames")
+    print(f"Fixtures: {workdir}")
+
+    try:
+        print("Benchmarking startup...")
+        results['startup'] = benchmark_startup(workdir, args.repeat)
+        for size in ([] if args.startup_only else args.sizes):
+            folder = os.path.join(workdir, f"Video-{size}")
+            if not os.path.exists(os.path.join(folder, 'script.md')):
+                print(f"\nGenerating {size}-frame fixture...")
+                start = time.perf_counter()
+                build_fixture(folder, size, args.audio, args.seed)
+                print(f"  ✓ Generated in {time.perf_counter() - start:.1f}s")
+
+            print(f"Benchmarking {size} frames...")
+            results['results'][str(size)] = benchmark_size(folder, args.repeat, args.skip_render)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    print_summary(results)
+    overruns = print_startup(results['startup'])
+    print(f"\n✓ Results saved to: {args.output}")
+
+    if overruns:
+        print(f"\n⚠ {len(overruns)} startup budget overrun(s):")
+        for line in overruns:
+            print(f"  {line}")
+        sys.exit(1)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, results, args.threshold)
+        if regressions:
+            print(f"\n⚠ {len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\n✓ No regressions over {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Chapters and Thumbnail Tracks from the Source Frames
+
+Every slide boundary is already known exactly (FrameData.actual_start_time,
+set from the measured audio), and frames/frame_N.png is the exact picture
+shown. So chapters and seek-bar thumbnails are written from those, during
+compilation, instead of decoding final_video.mp4 again afterwards:
+
+- .build/chapters.ffmeta: FFmpeg metadata with one chapter per frame,
+  muxed into final_video.mp4 by the render command
+- chapters.vtt: WebVTT chapters track (one cue per frame)
+- thumbnails.vtt + thumbnails.jpg: WebVTT thumbnail track pointing into a
+  sprite sheet of the frames (cue text "thumbnails.jpg#xywh=x,y,w,h")
+
+Chapter titles are the first sentence of each frame's narration. Tiles are
+downscaled from the PNGs in a process pool and cached by image content in
+.build/thumbnails/, so a rebuild only resizes frames whose image changed;
+frames with the same picture share a tile.
+
+Usage:
+    python3 chapters.py Week-1/Video-1          # Rewrite chapter/thumbnail tracks
+
+compile_video.py writes these in step 5, next to the subtitles.
+"""
+
+import io
+import os
+import re
+import sys
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+from atomic_io import atomic_output, write_text_atomic
+from content_store import file_digest
+from script_parser import clean_narration_text
+from subtitles import convert_to_vtt_timestamp
+
+
+FFMETADATA_FILENAME = 'chapters.ffmeta'
+CHAPTERS_VTT = 'chapters.vtt'
+THUMBNAILS_VTT = 'thumbnails.vtt'
+SPRITE_FILENAME = 'thumbnails.jpg'
+TILE_CACHE_DIR = os.path.join('.build', 'thumbnails')
+CHAPTER_TITLE_CHARS = 60
+TILE_WIDTH, TILE_HEIGHT = 320, 180
+SPRITE_COLUMNS = 10
+SPRITE_QUALITY = 80
+SPRITE_JOBS = max(1, min(4, os.cpu_count() or 1))
+
+SENTENCE_END = re.compile(r'(?<=[.!?])\s')
+FFMETADATA_SPECIAL = re.compile(r'([=;#\\\n])')
+
+
+def chapter_title(frame) -> str:
+    """First sentence of the frame's narration, shortened at a word boundary"""
+    text = ' '.join(clean_narration_text(frame.narration).split())
+    title = SENTENCE_END.split(text, 1)[0] if text else f"Frame {frame.number}"
+    if len(title) > CHAPTER_TITLE_CHARS:
+        title = title[:CHAPTER_TITLE_CHARS].rsplit(' ', 1)[0].rstrip(',;:-–—') + '…'
+    return title
+
+
+def escape_ffmetadata(value: str) -> str:
+    """Backslash-escape the characters the ffmetadata format reserves"""
+    return FFMETADATA_SPECIAL.sub(r'\\\1', value)
+
+
+def write_ffmetadata(frames: List, path: str) -> None:
+    """FFmpeg metadata file with one chapter per frame (millisecond timebase)"""
+    lines = [';FFMETADATA1']
+    for frame in frames:
+        lines += [
+            '[CHAPTER]',
+            'TIMEBASE=1/1000',
+            f"START={int(round(frame.actual_start_time * 1000))}",
+            f"END={int(round(frame.actual_end_time * 1000))}",
+            f"title={escape_ffmetadata(chapter_title(frame))}",
+        ]
+    write_text_atomic(path, '\n'.join(lines) + '\n')
+
+
+def write_chapters_vtt(frames: List, path: str) -> None:
+    lines = ['WEBVTT', '']
+    for frame in frames:
+        lines += [
+            f"frame-{frame.number}",
+            f"{convert_to_vtt_timestamp(frame.actual_start_time)} --> "
+            f"{convert_to_vtt_timestamp(frame.actual_end_time)}",
+            chapter_title(frame),
+            '',
+        ]
+    write_text_atomic(path, '\n'.join(lines))
+
+
+def render_tile(image_path: str, tile_path: str) -> str:
+    """Downscale one frame to a tile (runs in a worker process)"""
+    from PIL import Image
+
+    with Image.open(image_path) as image:
+        tile = image.convert('RGB')
+        tile.thumbnail((TILE_WIDTH, TILE_HEIGHT), Image.LANCZOS)
+        canvas = Image.new('RGB', (TILE_WIDTH, TILE_HEIGHT))
+        canvas.paste(tile, ((TILE_WIDTH - tile.width) // 2, (TILE_HEIGHT - tile.height) // 2))
+    with atomic_output(tile_path) as tmp_path:
+        canvas.save(tmp_path, format='PNG')
+    return tile_path
+
+
+def build_tiles(frames: List, cache_dir: str, jobs: int = SPRITE_JOBS) -> Dict[str, str]:
+    """
+    Tile path for every distinct frame image, keyed by image digest
+
+    Only images without a cached tile are resized, in parallel processes.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    tiles = {}
+    missing = {}
+    for frame in frames:
+        digest = file_digest(frame.image_path)
+        tiles[digest] = os.path.join(cache_dir, f"{digest}.png")
+        if not os.path.exists(tiles[digest]):
+            missing[digest] = frame.image_path
+
+    if len(missing) == 1 or jobs <= 1:
+        for digest, image_path in missing.items():
+            render_tile(image_path, tiles[digest])
+    elif missing:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(missing))) as pool:
+            list(pool.map(render_tile, missing.values(), [tiles[d] for d in missing]))
+
+    # Tiles of images no longer in the video
+    for name in os.listdir(cache_dir):
+        if name.endswith('.png') and name[:-4] not in tiles:
+            os.remove(os.path.join(cache_dir, name))
+    return tiles
+
+
+def write_thumbnail_track(frames: List, video_folder: str, jobs: int = SPRITE_JOBS) -> int:
+    """Write the sprite sheet and thumbnails.vtt; returns the number of tiles"""
+    from PIL import Image
+
+    tiles = build_tiles(frames, os.path.join(video_folder, TILE_CACHE_DIR), jobs)
+    positions = {digest: index for index, digest in enumerate(tiles)}
+    columns = min(SPRITE_COLUMNS, len(tiles))
+    rows = (len(tiles) + columns - 1) // columns
+
+    sheet = Image.new('RGB', (columns * TILE_WIDTH, rows * TILE_HEIGHT))
+    for digest, index in positions.items():
+        with Image.open(tiles[digest]) as tile:
+            sheet.paste(tile, ((index % columns) * TILE_WIDTH, (index // columns) * TILE_HEIGHT))
+    with atomic_output(os.path.join(video_folder, SPRITE_FILENAME)) as tmp_path:
+        sheet.save(tmp_path, format='JPEG', quality=SPRITE_QUALITY, optimize=True)
+
+    lines = ['WEBVTT', '']
+    for frame in frames:
+        index = positions[file_digest(frame.image_path)]
+        x, y = (index % columns) * TILE_WIDTH, (index // columns) * TILE_HEIGHT
+        lines += [
+            f"{convert_to_vtt_timestamp(frame.actual_start_time)} --> "
+            f"{convert_to_vtt_timestamp(frame.actual_end_time)}",
+            f"{SPRITE_FILENAME}#xywh={x},{y},{TILE_WIDTH},{TILE_HEIGHT}",
+            '',
+        ]
+    write_text_atomic(os.path.join(video_folder, THUMBNAILS_VTT), '\n'.join(lines))
+    return len(tiles)
+
+
+def write_chapters(video_folder: str, frames: List, jobs: int = SPRITE_JOBS) -> str:
+    """
+    Write every chapter/thumbnail output for a compiled video
+
+    frames are compile_video FrameData with actual times and image paths.
+    Returns the ffmetadata path for the render command to mux.
+    """
+    ffmetadata_path = os.path.join(video_folder, '.build', FFMETADATA_FILENAME)
+    os.makedirs(os.path.dirname(ffmetadata_path), exist_ok=True)
+    write_ffmetadata(frames, ffmetadata_path)
+    write_chapters_vtt(frames, os.path.join(video_folder, CHAPTERS_VTT))
+    write_thumbnail_track(frames, video_folder, jobs)
+    return ffmetadata_path
+
+
+def main():
+    """Rewrite a video's chapter and thumbnail tracks from its frames"""
+    import compile_video
+
+    parser = argparse.ArgumentParser(description="Write chapters and thumbnail tracks")
+    parser.add_argument('video_folder', help="Video folder with script.md, frames/ and audio/")
+    parser.add_argument('--jobs', type=int, default=SPRITE_JOBS,
+                        help=f"Processes resizing tiles (default {SPRITE_JOBS})")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.video_folder):
+        print(f"Error: Folder not found: {args.video_folder}")
+        sys.exit(1)
+
+    try:
+        frames = compile_video.parse_script(os.path.join(args.video_folder, 'script.md'))
+        with contextlib.redirect_stdout(io.StringIO()):
+            compile_video.validate_input_files(args.video_folder, frames)
+        write_chapters(args.video_folder, frames, args.jobs)
+    except (OSError, compile_video.VideoCompilationError) as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    for frame in frames:
+        print(f"  {convert_to_vtt_timestamp(frame.actual_start_time)}  {chapter_title(frame)}")
+    print(f"\n✓ {CHAPTERS_VTT}, {THUMBNAILS_VTT} + {SPRITE_FILENAME} ({len(frames)} chapters)")
+    print("  Chapters are muxed into final_video.mp4 on the next compile")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Compile Daemon: Keep Whisper and Build Caches Warm Between Builds
+
+A one-off `python3 compile_video.py` pays Python startup, `import whisper`
+(torch alone takes seconds) and the Whisper model load before any work.
+The daemon imports compile_video once, optionally preloads the model, and
+then keeps it resident together with the parsed-script cache and the file
+digest memo that keys the decoded-audio and transcript caches, so unchanged
+audio is found in .build/decoded/ without being re-hashed.
+Builds are submitted over a Unix socket by a thin client that imports
+nothing but the standard library, so an edit-rebuild loop starts instantly.
+
+- Jobs run in the daemon, at most --max-concurrent at a time; further jobs
+  wait in a FIFO queue and the client is told its position
+- Two jobs for the same video folder never run at once
+- Each job's output is streamed back to the client that submitted it
+
+Usage:
+    python3 compile_daemon.py serve --preload small          # Start the daemon
+    python3 compile_daemon.py build Week-1/Video-1           # Submit a build
+    python3 compile_daemon.py build Week-1/Video-1 --segmented --jobs 4
+    python3 compile_daemon.py status
+    python3 compile_daemon.py stop
+
+The socket defaults to $XDG_RUNTIME_DIR/educational-video-maker.sock
+(override with COMPILE_DAEMON_SOCKET). Share it between authors on the same
+render box by pointing everyone at a path in a common group-owned folder;
+the socket is created group-writable.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import socketserver
+from collections import deque
+from typing import Dict, Optional
+
+
+DEFAULT_SOCKET = os.path.join(
+    os.getenv('XDG_RUNTIME_DIR') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'educational-video-maker.sock')
+SOCKET_PATH = os.getenv('COMPILE_DAEMON_SOCKET', DEFAULT_SOCKET)
+MAX_CONCURRENT_BUILDS = 1
+CONNECT_TIMEOUT = 2.0
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class ThreadLocalStdout:
+    """
+    sys.stdout replacement that routes writes per thread
+
+    compile_video reports progress with print(); while a job runs, its
+    thread's output goes to that job's client instead of the daemon log.
+    """
+    def __init__(self, fallback):
+        self.fallback = fallback
+        self.local = threading.local()
+
+    def set_target(self, target) -> None:
+        self.local.target = target
+
+    def _target(self):
+        return getattr(self.local, 'target', None) or self.fallback
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self.fallback, name)
+
+
+class ClientStream:
+    """File-like writer that sends text to a client as JSON 'log' messages"""
+    def __init__(self, handler: 'BuildRequestHandler'):
+        self.handler = handler
+
+    def write(self, text: str) -> int:
+        if text:
+            self.handler.send({'type': 'log', 'text': text})
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+class JobQueue:
+    """FIFO admission with a concurrency limit and one job per video folder"""
+    def __init__(self, max_concurrent: int):
+        self.max_concurrent = max_concurrent
+        self.condition = threading.Condition()
+        self.waiting = deque()
+        self.running: Dict[int, str] = {}
+        self.next_id = 1
+        self.completed = 0
+
+    def _can_start(self, job_id: int, video_folder: str) -> bool:
+        return (self.waiting[0][0] == job_id
+                and len(self.running) < self.max_concurrent
+                and video_folder not in self.running.values())
+
+    def acquire(self, video_folder: str, on_wait=None) -> int:
+        """Block until the job may run; on_wait(position) is called while queued"""
+        with self.condition:
+            job_id = self.next_id
+            self.next_id += 1
+            self.waiting.append((job_id, video_folder))
+            last_position = None
+            while not self._can_start(job_id, video_folder):
+                position = [j for j, _ in self.waiting].index(job_id) + 1
+                if on_wait and position != last_position:
+                    on_wait(position)
+                    last_position = position
+                self.condition.wait()
+            self.waiting.popleft()
+            self.running[job_id] = video_folder
+            self.condition.notify_all()
+            return job_id
+
+    def release(self, job_id: int) -> None:
+        with self.condition:
+            del self.running[job_id]
+            self.completed += 1
+            self.condition.notify_all()
+
+    def snapshot(self) -> Dict:
+        with self.condition:
+            return {
+                'running': sorted(self.running.values()),
+                'queued': [folder for _, folder in self.waiting],
+                'completed': self.completed,
+                'max_concurrent': self.max_concurrent,
+            }
+
+
+class BuildRequestHandler(socketserver.StreamRequestHandler):
+    """One JSON request line in, JSON message lines out"""
+
+    def send(self, message: Dict) -> None:
+        try:
+            self.wfile.write((json.dumps(message) + '\n').encode('utf-8'))
+            self.wfile.flush()
+        except OSError:
+            pass  # Client went away; the job still finishes
+
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line)
+        except ValueError:
+            self.send({'type': 'error', 'message': 'invalid request'})
+            return
+
+        command = request.get('cmd')
+        if command == 'build':
+            self.handle_build(request)
+        elif command == 'status':
+            self.send({'type': 'status', **self.server.status()})
+        elif command == 'stop':
+            self.send({'type': 'stopping'})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        else:
+            self.send({'type': 'error', 'message': f"unknown command: {command}"})
+
+    def handle_build(self, request: Dict) -> None:
+        compile_video = self.server.compile_module
+        video_folder = request.get('video_folder', '')
+        if not os.path.isdir(video_folder):
+            self.send({'type': 'done', 'result': f"ERROR: Video folder not found: {video_folder}"})
+            return
+
+        queue = self.server.queue
+        job_id = queue.acquire(video_folder,
+                               lambda position: self.send({'type': 'queued', 'position': position}))
+        started = time.time()
+        self.send({'type': 'started', 'job': job_id})
+        self.server.stdout.set_target(ClientStream(self))
+        try:
+            result = compile_video.compile_video(
+                video_folder,
+                segmented=request.get('segmented'),
+                jobs=max(1, int(request.get('jobs') or compile_video.RENDER_JOBS)),
+                force=bool(request.get('force')),
+                asr_backend=request.get('asr_backend') or compile_video.ASR_BACKEND,
+                asr_profile=request.get('asr_profile') or compile_video.ASR_PROFILE,
+                adaptive_crf=bool(request.get('adaptive_crf')))
+        except Exception as e:
+            result = f"ERROR: {e}"
+        finally:
+            self.server.stdout.set_target(None)
+            queue.release(job_id)
+
+        elapsed = time.time() - started
+        print(f"[daemon] job {job_id} {video_folder}: {result} ({elapsed:.1f}s)",
+              file=sys.stderr)
+        self.send({'type': 'done', 'result': result, 'seconds': elapsed})
+
+
+class CompileServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, max_concurrent: int):
+        self.queue = JobQueue(max_concurrent)
+        self.stdout = ThreadLocalStdout(sys.stdout)
+        self.started = time.time()
+
+        # Imported once; whisper/torch load with the first model (or --preload)
+        import compile_video
+        self.compile_module = compile_video
+
+        old_umask = os.umask(0o007)  # Group members may connect
+        try:
+            super().__init__(socket_path, BuildRequestHandler)
+        finally:
+            os.umask(old_umask)
+
+    def status(self) -> Dict:
+        from asr_backends import loaded_models
+
+        module = self.compile_module
+        return {
+            'pid': os.getpid(),
+            'uptime': time.time() - self.started,
+            'models': loaded_models(),
+            'cached_scripts': len(module._script_cache),
+            **self.queue.snapshot(),
+        }
+
+
+def remove_stale_socket(socket_path: str) -> None:
+    """Delete a socket file left behind by a daemon that is no longer running"""
+    if not os.path.exists(socket_path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"A daemon is already listening on {socket_path}")
+
+
+def serve(socket_path: str, max_concurrent: int, preload: Optional[str],
+          preload_backend: Optional[str] = None) -> None:
+    remove_stale_socket(socket_path)
+    os.makedirs(os.path.dirname(socket_path) or '.', exist_ok=True)
+
+    server = CompileServer(socket_path, max_concurrent)
+    sys.stdout = server.stdout
+    if preload:
+        backend = preload_backend or server.compile_module.ASR_BACKEND
+        print(f"[daemon] Loading {backend} model '{preload}'...", file=sys.stderr)
+        server.compile_module.load_whisper_model(preload, backend)
+
+    print(f"[daemon] Listening on {socket_path} "
+          f"(max {max_concurrent} concurrent build(s))", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        print("[daemon] Stopped", file=sys.stderr)
+
+
+# ---------------------------------------------------------------------------
+# Client (standard library only, so it starts in milliseconds)
+# ---------------------------------------------------------------------------
+
+def request(socket_path: str, message: Dict):
+    """Send one request and yield the daemon's response messages"""
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(CONNECT_TIMEOUT)
+    try:
+        client.connect(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        raise ConnectionError(f"No compile daemon on {socket_path} "
+                              f"(start one with: python3 compile_daemon.py serve)")
+    client.settimeout(None)
+    with client, client.makefile('rwb') as stream:
+        stream.write((json.dumps(message) + '\n').encode('utf-8'))
+        stream.flush()
+        for line in stream:
+            yield json.loads(line)
+
+
+def resolve_video_folder(video_folder: str) -> str:
+    """Absolute path, relative to the current directory or the repo root"""
+    if os.path.isabs(video_folder):
+        return video_folder
+    if os.path.isdir(video_folder):
+        return os.path.abspath(video_folder)
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, video_folder)
+
+
+def run_build(socket_path: str, args) -> int:
+    message = {'cmd': 'build', 'video_folder': resolve_video_folder(args.video_folder),
+               'segmented': args.segmented, 'jobs': args.jobs, 'force': args.force,
+               'asr_backend': args.asr_backend, 'asr_profile': args.asr_profile,
+               'adaptive_crf': args.adaptive_crf}
+    result = None
+    for response in request(socket_path, message):
+        kind = response['type']
+        if kind == 'log':
+            sys.stdout.write(response['text'])
+            sys.stdout.flush()
+        elif kind == 'queued':
+            print(f"⏳ Queued (position {response['position']})")
+        elif kind == 'done':
+            result = response['result']
+            if 'seconds' in response:
+                print(f"\n[daemon] Build finished in {response['seconds']:.1f}s")
+            elif result != 'SUCCESS':
+                print(result)
+        elif kind == 'error':
+            print(f"Error: {response['message']}")
+    return 0 if result == 'SUCCESS' else 1
+
+
+def run_status(socket_path: str) -> int:
+    for response in request(socket_path, {'cmd': 'status'}):
+        print(f"Daemon pid {response['pid']}, up {response['uptime'] / 60:.0f} min")
+        print(f"  ASR models loaded: {', '.join(response['models']) or 'none'}")
+        print(f"  Cached scripts: {response['cached_scripts']}")
+        print(f"  Running ({len(response['running'])}/{response['max_concurrent']}): "
+              f"{', '.join(response['running']) or '-'}")
+        print(f"  Queued: {', '.join(response['queued']) or '-'}")
+        print(f"  Completed: {response['completed']}")
+    return 0
+
+
+def main():
+    """Run the daemon or talk to it"""
+    parser = argparse.ArgumentParser(description="Resident compile server for compile_video.py")
+    parser.add_argument('--socket', default=SOCKET_PATH, help=f"Socket path (default {SOCKET_PATH})")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help="Start the daemon in the foreground")
+    serve_parser.add_argument('--max-concurrent', type=int, default=MAX_CONCURRENT_BUILDS,
+                              help=f"Builds run at once (default {MAX_CONCURRENT_BUILDS})")
+    serve_parser.add_argument('--preload', metavar='MODEL',
+                              help="Load this Whisper model at startup (e.g. small)")
+    serve_parser.add_argument('--preload-backend', metavar='BACKEND',
+                              help="ASR backend for --preload (default: compile_video.ASR_BACKEND)")
+
+    build_parser = commands.add_parser('build', help="Compile a video folder via the daemon")
+    build_parser.add_argument('video_folder', help="Video folder, e.g. Week-1/Video-1")
+    mode = build_parser.add_mutually_exclusive_group()
+    mode.add_argument('--segmented', dest='segmented', action='store_true', default=None)
+    mode.add_argument('--single-pass', dest='segmented', action='store_false')
+    build_parser.add_argument('--jobs', type=int, help="Parallel segment encoders")
+    build_parser.add_argument('--force', action='store_true', help="Rebuild even if up to date")
+    build_parser.add_argument('--asr-backend', help="ASR engine (see asr_backends.py)")
+    build_parser.add_argument('--asr-profile', help="ASR profile: accurate, default or fast")
+    build_parser.add_argument('--adaptive-crf', action='store_true',
+                              help="Pick the CRF from trial encodes (see encode_planner.py)")
+
+    commands.add_parser('status', help="Show loaded models, caches and queue")
+    commands.add_parser('stop', help="Shut the daemon down")
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'serve':
+            serve(args.socket, max(1, args.max_concurrent), args.preload, args.preload_backend)
+            exit_code = 0
+        elif args.command == 'build':
+            exit_code = run_build(args.socket, args)
+        elif args.command == 'status':
+            exit_code = run_status(args.socket)
+        else:
+            for response in request(args.socket, {'cmd': 'stop'}):
+                print("✓ Daemon stopping")
+            exit_code = 0
+    except (ConnectionError, RuntimeError) as e:
+        print(f"Error: {e}")
+        exit_code = 1
+
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
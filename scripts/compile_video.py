@@ -5,6 +5,8 @@ Compiles final video with transitions and subtitles
 
 Usage:
     python3 compile_video.py Week-1/Video-1
+    python3 compile_video.py Week-1/Video-1 --segmented --jobs 4
+    python3 compile_video.py Week-1/Video-1 --watch      # Rebuild on every edit
 
 Output:
     - final_video.mp4 (complete video with burned-in subtitles)
@@ -16,17 +18,67 @@ Course: FIN101 Introduction to Financial Concepts
 """
 
 import os
-import sys
 import re
+import sys
 import json
+import hashlib
+import argparse
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import Callable, List, Dict, Tuple, Optional
 from pathlib import Path
-import whisper
+from script_parser import iter_frames, ScriptIssue, ScriptParseError
+from word_timing import WordTimingTable
+from content_store import file_digest, write_file_atomic
+from atomic_io import (Journal, atomic_output, partial_path, remove_stale_partials,
+                       write_text_atomic, write_json_atomic)
+from audio_decode import DecodedAudio, decode_all, prune_decoded, DECODED_DIRNAME
+from vad import SpeechMap, speech_map_for, VAD_VERSION
+from verify_render import verify_render, describe as describe_verification
+from encode_planner import plan_encode, planned_crf, load_plan, describe_plan, EncodePlanError
+from chapters import write_chapters, CHAPTERS_VTT, THUMBNAILS_VTT, SPRITE_FILENAME
+from asr_backends import get_backend, ASR_BACKENDS, PROFILES
+from subtitles import (iter_frame_cues, write_subtitles, read_srt, Cue,
+                       MAX_CHARS_PER_LINE, MAX_LINES)
 import warnings
 warnings.filterwarnings("ignore", category=FutureWarning)
 
+# Video encoding settings
+VIDEO_WIDTH = 1920
+VIDEO_HEIGHT = 1080
+VIDEO_FPS = 30
+VIDEO_CRF = 23
+VIDEO_PRESET = "medium"
+FADE_DURATION = 0.5  # Crossfade in/out per frame (seconds)
+
+# Lectures with more frames than this are rendered segment-by-segment
+# (one FFmpeg process per frame + concat demuxer) instead of a single
+# filter graph with 2*N inputs, which hits argv, open-file and memory limits
+SEGMENTED_RENDER_THRESHOLD = 40
+RENDER_JOBS = max(1, min(4, (os.cpu_count() or 2) // 2))
+
+# Subtitle files written next to subtitles.srt (which is burned in)
+SUBTITLE_EXTRA_FORMATS = ('vtt',)
+TIMELINE_FILENAME = 'timeline.json'  # Actual frame times, written to .build/
+BUILD_STAMP_FILENAME = 'build_stamp.json'  # Inputs/settings of the last build, in .build/
+WATCH_DEBOUNCE_SECONDS = 1.0  # --watch: quiet period before a burst of saves triggers a rebuild
+
+# Whisper model used for word timestamps (see requirements.txt)
+WHISPER_MODEL = "small"
+ASR_BACKEND = "openai-whisper"  # See asr_backends.py (whisper-int8, faster-whisper)
+ASR_PROFILE = "default"         # Decoding profile: accurate, default or fast
+USE_VAD = True  # Only feed detected speech to Whisper and end cues with the speech (vad.py)
+
+# Burned-in subtitle styling: smaller, less intrusive, positioned near bottom
+SUBTITLE_STYLE = (
+    "Fontname=Arial,Fontsize=18,Bold=0,"
+    "PrimaryColour=&HFFFFFF&,OutlineColour=&H000000&,"
+    "BackColour=&H80000000&,BorderStyle=4,"
+    "Outline=2,Shadow=1,MarginV=50,Alignment=2"
+)
+
 
 class VideoCompilationError(Exception):
     """Base exception for compilation errors"""
@@ -50,6 +102,13 @@ class FFmpegError(VideoCompilationError):
 
 class FrameData:
     """Data structure for a single frame"""
+    __slots__ = (
+        'number', 'start_time', 'end_time', 'duration', 'words', 'narration',
+        'image_path', 'audio_path', 'actual_audio_duration',
+        'actual_start_time', 'actual_end_time', 'whisper_words', 'aligned_words',
+        'decoded', 'speech',
+    )
+
     def __init__(self, number: int, start_time: float, end_time: float,
                  words: int, narration: str):
         self.number = number
@@ -63,7 +122,10 @@ class FrameData:
         self.actual_audio_duration = None  # Measured from audio file
         self.actual_start_time = None  # Actual video timestamp (calculated)
         self.actual_end_time = None    # Actual video timestamp (calculated)
-        self.whisper_segments = None  # Word-level timestamps from Whisper
+        self.whisper_words = None  # WordTimingTable of Whisper word timestamps
+        self.aligned_words = None  # WordTimingTable of script words on Whisper timing
+        self.decoded = None  # DecodedAudio: cached 16 kHz ASR array + full-rate PCM
+        self.speech = None   # SpeechMap of the frame's audio (None without VAD)
 
 
 def parse_time_to_seconds(time_str: str) -> float:
@@ -84,51 +146,91 @@ def parse_time_to_seconds(time_str: str) -> float:
     return minutes * 60 + seconds
 
 
-def parse_script(script_path: str) -> List[FrameData]:
+# Resident caches: reused across builds by a long-running process (compile_daemon.py)
+_script_cache: Dict[Tuple[str, int, int], Tuple[list, list]] = {}
+_cache_lock = threading.Lock()
+
+
+def _file_key(path: str) -> Tuple[str, int, int]:
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+def parse_script(script_path: str, issues: Optional[List[ScriptIssue]] = None) -> List[FrameData]:
     """
     Parse script.md to extract frame timing and narration
 
+    Uses the shared streaming parser (script_parser.py); warnings about
+    pacing or word counts are appended to issues if given. Parsed records
+    are kept per (path, size, mtime), so an unchanged script is not
+    re-parsed within the same process.
+
     Returns list of FrameData objects
     """
+    key = _file_key(script_path)
+    with _cache_lock:
+        cached = _script_cache.get(key)
+    if cached is None:
+        script_issues: List[ScriptIssue] = []
+        records = list(iter_frames(script_path, issues=script_issues))
+        cached = (records, script_issues)
+        with _cache_lock:
+            _script_cache[key] = cached
+
+    records, script_issues = cached
+    if issues is not None:
+        issues.extend(script_issues)
+
+    # FrameData is filled in by the build, so always hand out fresh objects
     frames = []
+    for record in records:
+        frame = FrameData(record.number, record.start_time, record.end_time,
+                          record.words, record.narration)
+        frames.append(frame)
 
-    with open(script_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    return frames
 
-    # Pattern: ## Frame N (MM:SS-MM:SS) • NN words
-    pattern = r'## Frame (\d+) \((\d+:\d+)-(\d+:\d+)\) • (\d+) words?\s*\n\n(.*?)(?=\n---|\n##|\Z)'
 
-    matches = re.finditer(pattern, content, re.DOTALL)
+_whisper_lock = threading.Lock()  # One model load / inference at a time
 
-    for match in matches:
-        frame_num = int(match.group(1))
-        start_time = parse_time_to_seconds(match.group(2))
-        end_time = parse_time_to_seconds(match.group(3))
-        words = int(match.group(4))
-        narration = match.group(5).strip()
 
-        frame = FrameData(frame_num, start_time, end_time, words, narration)
-        frames.append(frame)
+def load_whisper_model(model_name: str, backend: str = ASR_BACKEND):
+    """
+    Load an ASR model once per process
 
-    return frames
+    Backends import their engine (whisper/torch, CTranslate2) on first load,
+    so cache-hit or up-to-date builds never pay for it.
+    """
+    with _whisper_lock:
+        return get_backend(backend).model(model_name)
 
 
-def get_audio_duration_ffprobe(audio_path: str) -> float:
+def transcript_cache_path(cache_dir: str, audio_path: str, model_name: str,
+                          variant: str = '') -> str:
     """
-    Get audio duration in seconds using ffprobe
+    Cache file for an audio file's transcript, keyed by content hash and model
+
+    The digest is memoized by inode/mtime (content_store.py), so audio linked
+    from the course content store is never re-read just to find its key.
+    variant distinguishes transcripts made from different input (e.g. VAD).
     """
-    cmd = [
-        'ffprobe', '-v', 'error',
-        '-show_entries', 'format=duration',
-        '-of', 'default=noprint_wrappers=1:nokey=1',
-        audio_path
-    ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    return float(result.stdout.strip())
+    key = hashlib.sha256(
+        f"{file_digest(audio_path)}:{model_name}{variant}".encode()).hexdigest()
+    return os.path.join(cache_dir, f"{key}.wtt")
+
+
+def transcript_variant(backend: str, profile: str, vad: bool) -> str:
+    """Cache key suffix for transcripts made with an ASR backend/profile (and VAD)"""
+    return f":{backend}:{profile}" + (f":vad{VAD_VERSION}" if vad else '')
 
 
 def transcribe_audio_with_whisper(audio_path: str, frame_start_time: float,
-                                  model_name: str = "small") -> Dict:
+                                  model_name: str = "small",
+                                  cache_dir: Optional[str] = None,
+                                  decoded: Optional[DecodedAudio] = None,
+                                  speech: Optional[SpeechMap] = None,
+                                  backend: str = ASR_BACKEND,
+                                  profile: str = ASR_PROFILE) -> WordTimingTable:
     """
     Transcribe audio file using Whisper to get word-level timestamps
 
@@ -136,36 +238,57 @@ def transcribe_audio_with_whisper(audio_path: str, frame_start_time: float,
         audio_path: Path to audio file
         frame_start_time: Start time of this frame in the final video
         model_name: Whisper model to use (tiny, base, small, medium, large)
+        cache_dir: Optional transcript cache folder; transcripts are stored
+                   relative to the frame so they survive timing changes
+        decoded: Already-decoded audio (audio_decode.py); Whisper then reads
+                 the 16 kHz array instead of running its own FFmpeg decode
+        speech: Speech regions of the decoded audio (vad.py); only these are
+                transcribed and word times are mapped back to frame time
+        backend: ASR engine (asr_backends.py)
+        profile: Decoding profile (accurate, default, fast)
 
     Returns:
-        Dictionary with segments containing word-level timestamps
+        WordTimingTable with timestamps relative to video start
     """
+    cache_path = None
+    if cache_dir:
+        variant = transcript_variant(backend, profile, speech is not None and decoded is not None)
+        cache_path = transcript_cache_path(cache_dir, audio_path, model_name, variant)
+        if os.path.exists(cache_path):
+            print(f"      Using cached transcript for {os.path.basename(audio_path)}")
+            with open(cache_path, 'rb') as f:
+                return WordTimingTable.from_bytes(f.read()).shifted(frame_start_time)
+
     print(f"      Transcribing {os.path.basename(audio_path)} with Whisper...")
 
     # Load model (cached after first use)
-    model = whisper.load_model(model_name)
+    load_whisper_model(model_name, backend)
+    asr = get_backend(backend)
 
-    # Transcribe with word-level timestamps
-    result = model.transcribe(
-        audio_path,
-        word_timestamps=True,
-        language="en"
-    )
+    audio = audio_path
+    if decoded is not None:
+        audio = decoded.load_asr()
+        if speech is not None:
+            audio = speech.compact(audio)
 
-    # Adjust timestamps to be relative to video start
-    for segment in result.get('segments', []):
-        segment['start'] += frame_start_time
-        segment['end'] += frame_start_time
+    # Transcribe with word-level timestamps (concurrent builds share the model)
+    with _whisper_lock:
+        words = asr.transcribe(audio, model_name, profile)
 
-        if 'words' in segment:
-            for word in segment['words']:
-                word['start'] += frame_start_time
-                word['end'] += frame_start_time
+    if speech is not None and decoded is not None:
+        words = speech.to_source_words(words)
 
-    return result
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Atomic, so a transcription killed mid-write is simply redone
+        write_file_atomic(cache_path, words.to_bytes())
+
+    # Adjust timestamps to be relative to video start
+    return words.shifted(frame_start_time)
 
 
-def align_script_to_whisper_timestamps(script_text: str, whisper_result: Dict) -> List[Dict]:
+def align_script_to_whisper_timestamps(script_text: str,
+                                       whisper_words: WordTimingTable) -> WordTimingTable:
     """
     Align actual script text with Whisper word timestamps
 
@@ -174,198 +297,63 @@ def align_script_to_whisper_timestamps(script_text: str, whisper_result: Dict) -
 
     Args:
         script_text: Ground truth text from script.md
-        whisper_result: Whisper transcription with timestamps
+        whisper_words: Whisper word timestamps
 
     Returns:
-        List of word dictionaries with corrected text and preserved timestamps
+        WordTimingTable with corrected text and preserved timestamps
     """
-    # Extract all Whisper words with timestamps
-    whisper_words = []
-    for segment in whisper_result.get('segments', []):
-        if 'words' in segment:
-            whisper_words.extend(segment['words'])
-
     # Clean and tokenize script text
     script_words = script_text.replace('\n', ' ').split()
 
     # Align script words to Whisper timestamps
     # Simple approach: assume same word count, map 1:1
-    aligned_words = []
+    aligned_words = WordTimingTable(whisper_words.strings)
 
     # If counts match, direct mapping
     if len(script_words) == len(whisper_words):
-        for script_word, whisper_word in zip(script_words, whisper_words):
-            aligned_words.append({
-                'word': script_word,  # Use actual script text
-                'start': whisper_word['start'],  # Use Whisper timing
-                'end': whisper_word['end']
-            })
+        for script_word, start, end in zip(script_words, whisper_words.starts,
+                                           whisper_words.ends):
+            # Use actual script text with Whisper timing
+            aligned_words.append(script_word, start, end)
     else:
         # Counts don't match - use proportional mapping
         # This handles cases where Whisper merges/splits words
-        total_duration = whisper_words[-1]['end'] - whisper_words[0]['start']
+        total_duration = whisper_words.ends[-1] - whisper_words.starts[0]
         time_per_word = total_duration / len(script_words)
 
-        current_time = whisper_words[0]['start']
+        current_time = whisper_words.starts[0]
         for script_word in script_words:
-            aligned_words.append({
-                'word': script_word,
-                'start': current_time,
-                'end': current_time + time_per_word
-            })
+            aligned_words.append(script_word, current_time, current_time + time_per_word)
             current_time += time_per_word
 
     return aligned_words
 
 
-def convert_to_srt_timestamp(seconds: float) -> str:
-    """
-    Convert seconds to SRT timestamp format: HH:MM:SS,mmm
-
-    Example: 65.5 -> 00:01:05,500
-    """
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    millis = int((seconds % 1) * 1000)
-
-    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
-
-
-def split_text_for_subtitles(text: str, max_chars_per_line: int = 42,
-                             max_lines: int = 2) -> List[str]:
-    """
-    Split text into subtitle-friendly segments
-
-    Rules:
-    - Max 42 characters per line
-    - Max 2 lines per subtitle
-    - Split at sentence/phrase boundaries when possible
-    """
-    segments = []
-    words = text.split()
-
-    current_lines = []
-    current_line = []
-    current_length = 0
-
-    for word in words:
-        word_length = len(word)
-
-        # Check if adding this word exceeds line length
-        if current_length + word_length + (1 if current_line else 0) > max_chars_per_line:
-            # Save current line and start new one
-            if current_line:
-                current_lines.append(' '.join(current_line))
-                current_line = [word]
-                current_length = word_length
-            else:
-                # Word is too long, add it anyway
-                current_lines.append(word)
-                current_line = []
-                current_length = 0
-
-            # Check if we've reached max lines
-            if len(current_lines) >= max_lines:
-                segments.append('\n'.join(current_lines))
-                current_lines = []
-        else:
-            current_line.append(word)
-            current_length += word_length + (1 if len(current_line) > 1 else 0)
-
-    # Add remaining words
-    if current_line:
-        current_lines.append(' '.join(current_line))
-    if current_lines:
-        segments.append('\n'.join(current_lines))
-
-    return segments
-
-
 def generate_subtitles_from_corrected_timestamps(frames: List[FrameData], output_path: str,
-                                                max_chars_per_line: int = 42) -> int:
+                                                extra_formats: Tuple[str, ...] = ()) -> int:
     """
-    Generate SRT subtitle file using corrected script text with Whisper timestamps
+    Generate subtitle files using corrected script text with Whisper timestamps
 
-    Uses actual script text (corrected) with Whisper timing (precise).
+    Uses actual script text (corrected) with Whisper timing (precise). Cue and
+    line breaks come from the subtitle engine (subtitles.py); the same cue list
+    is streamed to every requested format.
 
     Args:
         frames: List of FrameData objects with aligned words
-        output_path: Path to save SRT file
-        max_chars_per_line: Maximum characters per subtitle line
+        output_path: Path to save the SRT file
+        extra_formats: Additional formats ('vtt', 'ass') written next to it
 
     Returns number of subtitle entries created
     """
-    subtitle_entries = []
-    entry_id = 1
-
-    for frame in frames:
-        if not hasattr(frame, 'aligned_words') or not frame.aligned_words:
-            continue
-
-        # Group words into subtitle chunks (max 2 lines, max chars per line)
-        words = frame.aligned_words
-        current_chunk = []
-        current_line = []
-        current_length = 0
-        chunk_start_time = None
-
-        for word_info in words:
-            word = word_info['word'].strip()
-            if not word:
-                continue
-
-            if chunk_start_time is None:
-                chunk_start_time = word_info['start']
-
-            word_length = len(word)
-
-            # Check if adding this word exceeds line length
-            if current_length + word_length + (1 if current_line else 0) > max_chars_per_line:
-                # Start new line
-                if current_line:
-                    current_chunk.append(' '.join(current_line))
-                    current_line = [word]
-                    current_length = word_length
-                else:
-                    # Word too long, add anyway
-                    current_chunk.append(word)
-                    current_line = []
-                    current_length = 0
-
-                # Check if we've filled 2 lines (create subtitle entry)
-                if len(current_chunk) >= 2:
-                    text = '\n'.join(current_chunk)
-                    start_ts = convert_to_srt_timestamp(chunk_start_time)
-                    end_ts = convert_to_srt_timestamp(word_info['end'])
-                    subtitle_entries.append(f"{entry_id}\n{start_ts} --> {end_ts}\n{text}\n")
-                    entry_id += 1
-
-                    current_chunk = []
-                    chunk_start_time = None
-                    if current_line:
-                        # Continue with overflow word
-                        chunk_start_time = word_info['start']
-            else:
-                current_line.append(word)
-                current_length += word_length + (1 if len(current_line) > 1 else 0)
-
-        # Add remaining words as final subtitle entry
-        if current_line:
-            current_chunk.append(' '.join(current_line))
+    cues = list(iter_frame_cues(frames))
 
-        if current_chunk and chunk_start_time is not None:
-            text = '\n'.join(current_chunk)
-            start_ts = convert_to_srt_timestamp(chunk_start_time)
-            end_ts = convert_to_srt_timestamp(words[-1]['end'])
-            subtitle_entries.append(f"{entry_id}\n{start_ts} --> {end_ts}\n{text}\n")
-            entry_id += 1
+    num_entries = write_subtitles(cues, output_path, 'srt')
 
-    # Write SRT file
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(subtitle_entries))
+    base_path = os.path.splitext(output_path)[0]
+    for fmt in extra_formats:
+        write_subtitles(cues, f"{base_path}.{fmt}", fmt)
 
-    return len(subtitle_entries)
+    return num_entries
 
 
 def calculate_actual_frame_times(frames: List[FrameData]) -> None:
@@ -386,10 +374,93 @@ def calculate_actual_frame_times(frames: List[FrameData]) -> None:
               f"(audio: {frame.actual_audio_duration:.2f}s, script: {frame.duration:.2f}s)")
 
 
+def vad_totals(frames: List[FrameData]) -> Tuple[float, float]:
+    """(total audio seconds, silence seconds Whisper skips) across frames with speech maps"""
+    total = sum(frame.speech.duration for frame in frames if frame.speech)
+    silence = sum(frame.speech.silence_duration for frame in frames if frame.speech)
+    return total, silence
+
+
+def write_timeline(frames: List[FrameData], timeline_path: str) -> None:
+    """
+    Record each frame's actual start/end in the final video
+
+    Used by search_index.py to turn frame matches into final_video.mp4 links.
+    """
+    timeline = [
+        {'frame': frame.number, 'start': round(frame.actual_start_time, 3),
+         'end': round(frame.actual_end_time, 3)}
+        for frame in frames
+    ]
+    os.makedirs(os.path.dirname(timeline_path), exist_ok=True)
+    write_json_atomic(timeline_path, timeline, indent=1)
+
+
+def build_stamp(video_folder: str, asr_backend: str = ASR_BACKEND,
+                asr_profile: str = ASR_PROFILE) -> Dict:
+    """
+    Signature of everything a build depends on
+
+    Size and mtime of script.md, frames/*.png and audio/*.mp3 plus the
+    encoding, subtitle and ASR settings. Only stats files, so it costs
+    milliseconds even for long lectures.
+    """
+    inputs = {}
+    for folder_name, extension in (('.', '.md'), ('frames', '.png'), ('audio', '.mp3')):
+        folder = os.path.join(video_folder, folder_name)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            if name.endswith(extension) and (folder_name != '.' or name == 'script.md'):
+                stat = os.stat(os.path.join(folder, name))
+                inputs[f"{folder_name}/{name}"] = [stat.st_size, stat.st_mtime_ns]
+
+    settings = {
+        'video': [VIDEO_WIDTH, VIDEO_HEIGHT, VIDEO_FPS, VIDEO_CRF, VIDEO_PRESET, FADE_DURATION],
+        'subtitles': [SUBTITLE_STYLE, list(SUBTITLE_EXTRA_FORMATS), MAX_CHARS_PER_LINE, MAX_LINES],
+        'asr': [asr_backend, asr_profile, WHISPER_MODEL],
+        'vad': VAD_VERSION if USE_VAD else None,
+        'encode_plan': load_plan(video_folder).get('crf'),
+    }
+    return {'inputs': inputs, 'settings': settings}
+
+
+def is_up_to_date(video_folder: str, asr_backend: str = ASR_BACKEND,
+                  asr_profile: str = ASR_PROFILE) -> bool:
+    """True if final_video.mp4 was built from exactly the current inputs"""
+    stamp_path = os.path.join(video_folder, '.build', BUILD_STAMP_FILENAME)
+    output_path = os.path.join(video_folder, 'final_video.mp4')
+    try:
+        with open(stamp_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        output = os.stat(output_path)
+    except (OSError, ValueError):
+        return False
+
+    current = build_stamp(video_folder, asr_backend, asr_profile)
+    return (previous.get('output') == [output.st_size, output.st_mtime_ns]
+            and previous.get('inputs') == current['inputs']
+            and previous.get('settings') == current['settings'])
+
+
+def write_build_stamp(video_folder: str, asr_backend: str = ASR_BACKEND,
+                      asr_profile: str = ASR_PROFILE) -> None:
+    """Record the inputs final_video.mp4 was just built from"""
+    stamp = build_stamp(video_folder, asr_backend, asr_profile)
+    output = os.stat(os.path.join(video_folder, 'final_video.mp4'))
+    stamp['output'] = [output.st_size, output.st_mtime_ns]
+    stamp_path = os.path.join(video_folder, '.build', BUILD_STAMP_FILENAME)
+    os.makedirs(os.path.dirname(stamp_path), exist_ok=True)
+    write_json_atomic(stamp_path, stamp)
+
+
 def validate_input_files(video_folder: str, frames: List[FrameData]) -> Tuple[int, int, int]:
     """
     Validate that all required input files exist and measure actual audio durations
 
+    Audio is decoded once here (audio_decode.py); transcription and the
+    final mux reuse the decoded files.
+
     Returns: (num_frames, num_images, num_audio)
     """
     frames_dir = os.path.join(video_folder, 'frames')
@@ -417,8 +488,13 @@ def validate_input_files(video_folder: str, frames: List[FrameData]) -> Tuple[in
             raise FrameMismatchError(f"Missing audio: {audio_name}")
         frame.audio_path = audio_path
 
-        # Get actual audio duration
-        frame.actual_audio_duration = get_audio_duration_ffprobe(audio_path)
+    # Decode each MP3 once (cached by content); durations come from sample counts
+    decoded_dir = os.path.join(video_folder, '.build', DECODED_DIRNAME)
+    decoded = decode_all([frame.audio_path for frame in frames], decoded_dir)
+    for frame, audio in zip(frames, decoded):
+        frame.decoded = audio
+        frame.actual_audio_duration = audio.duration
+    prune_decoded(decoded_dir, decoded)
 
     # Calculate actual frame times based on real audio durations
     calculate_actual_frame_times(frames)
@@ -430,8 +506,20 @@ def validate_input_files(video_folder: str, frames: List[FrameData]) -> Tuple[in
     return num_frames, num_images, num_audio
 
 
+def mux_audio_path(frame: FrameData) -> str:
+    """Audio input for the final mux: the decoded PCM when available"""
+    return frame.decoded.pcm_path if frame.decoded is not None else frame.audio_path
+
+
+def subtitles_filter(subtitle_path: str) -> str:
+    """Build the FFmpeg subtitles filter that burns in styled subtitles"""
+    return f"subtitles={subtitle_path}:force_style='{SUBTITLE_STYLE}'"
+
+
 def build_ffmpeg_command(video_folder: str, frames: List[FrameData],
-                        subtitle_path: str) -> List[str]:
+                        subtitle_path: str, output_path: Optional[str] = None,
+                        crf: int = VIDEO_CRF,
+                        chapters_path: Optional[str] = None) -> List[str]:
     """
     Build FFmpeg command for video compilation with transitions
 
@@ -441,12 +529,18 @@ def build_ffmpeg_command(video_folder: str, frames: List[FrameData],
     - Burned-in subtitles (corrected text + Whisper timestamps)
 
     Audio and frames start/end simultaneously - no artificial delays.
+
+    Opens 2*N inputs, so this single-pass command is only used for short
+    lectures; see render_segmented() for long ones. output_path defaults to
+    final_video.mp4 (compile_video() renders to a partial file and renames).
+    crf overrides VIDEO_CRF (see encode_planner.py). chapters_path is an
+    ffmetadata file whose chapters are muxed in (see chapters.py).
     """
     cmd = ['ffmpeg', '-y']
 
     # Add audio inputs
     for frame in frames:
-        cmd.extend(['-i', frame.audio_path])
+        cmd.extend(['-i', mux_audio_path(frame)])
 
     # Add image inputs using ACTUAL audio duration
     for frame in frames:
@@ -457,25 +551,28 @@ def build_ffmpeg_command(video_folder: str, frames: List[FrameData],
             '-i', frame.image_path
         ])
 
+    # Chapter metadata comes after the audio and image inputs
+    if chapters_path:
+        cmd.extend(['-f', 'ffmetadata', '-i', chapters_path])
+
     # Build complex filter graph
     filter_parts = []
 
     # Process each image: scale, set frame rate, add fade transitions
     num_frames = len(frames)
-    fade_duration = 0.5  # 0.5 second crossfade
 
     for i, frame in enumerate(frames):
         input_idx = num_frames + i  # Images start after audio files
 
         # Calculate fade timings based on actual audio duration
-        fade_out_start = frame.actual_audio_duration - fade_duration
+        fade_out_start = frame.actual_audio_duration - FADE_DURATION
 
         # Scale, set fps, and add fades
         filter_str = (
-            f"[{input_idx}:v]scale=1920:1080:flags=lanczos,"
-            f"fps=30,"
-            f"fade=t=in:st=0:d={fade_duration},"
-            f"fade=t=out:st={fade_out_start}:d={fade_duration}[v{i}]"
+            f"[{input_idx}:v]scale={VIDEO_WIDTH}:{VIDEO_HEIGHT}:flags=lanczos,"
+            f"fps={VIDEO_FPS},"
+            f"fade=t=in:st=0:d={FADE_DURATION},"
+            f"fade=t=out:st={fade_out_start}:d={FADE_DURATION}[v{i}]"
         )
         filter_parts.append(filter_str)
 
@@ -490,15 +587,7 @@ def build_ffmpeg_command(video_folder: str, frames: List[FrameData],
     filter_parts.append(audio_concat)
 
     # Burn subtitles onto video
-    # Smaller, less intrusive subtitles positioned near bottom
-    subtitle_style = (
-        "Fontname=Arial,Fontsize=18,Bold=0,"
-        "PrimaryColour=&HFFFFFF&,OutlineColour=&H000000&,"
-        "BackColour=&H80000000&,BorderStyle=4,"
-        "Outline=2,Shadow=1,MarginV=50,Alignment=2"
-    )
-    subtitle_filter = f"[video]subtitles={subtitle_path}:force_style='{subtitle_style}'[final]"
-    filter_parts.append(subtitle_filter)
+    filter_parts.append(f"[video]{subtitles_filter(subtitle_path)}[final]")
 
     # Join all filter parts
     filter_complex = ';'.join(filter_parts)
@@ -507,30 +596,264 @@ def build_ffmpeg_command(video_folder: str, frames: List[FrameData],
 
     # Map outputs
     cmd.extend(['-map', '[final]', '-map', '[audio]'])
+    if chapters_path:
+        cmd.extend(['-map_chapters', str(2 * num_frames)])
 
     # Video encoding settings
-    cmd.extend([
+    cmd.extend(video_encoding_args(crf))
+
+    # Audio encoding settings
+    cmd.extend(audio_encoding_args())
+
+    # Output file
+    cmd.append(output_path or os.path.join(video_folder, 'final_video.mp4'))
+
+    return cmd
+
+
+def video_encoding_args(crf: int = VIDEO_CRF) -> List[str]:
+    """H.264 encoding settings shared by single-pass and segmented renders"""
+    return [
         '-c:v', 'libx264',
-        '-preset', 'medium',
-        '-crf', '23',
+        '-preset', VIDEO_PRESET,
+        '-crf', str(crf),
         '-pix_fmt', 'yuv420p',
-        '-r', '30'
-    ])
+        '-r', str(VIDEO_FPS)
+    ]
 
-    # Audio encoding settings
-    cmd.extend([
+
+def audio_encoding_args() -> List[str]:
+    """AAC encoding settings for the final mux"""
+    return [
         '-c:a', 'aac',
         '-b:a', '192k',
         '-ar', '48000'
-    ])
+    ]
 
-    # Output file
-    output_path = os.path.join(video_folder, 'final_video.mp4')
-    cmd.append(output_path)
 
+def segment_frame_range(frame: FrameData) -> Tuple[int, int]:
+    """
+    Return (first_video_frame, video_frame_count) for a frame's segment
+
+    Frame indices are rounded from the cumulative actual start/end times, so
+    per-segment rounding never accumulates into A/V drift over long lectures.
+    """
+    first = int(round(frame.actual_start_time * VIDEO_FPS))
+    last = int(round(frame.actual_end_time * VIDEO_FPS))
+    return first, max(1, last - first)
+
+
+def build_segment_command(frame: FrameData, subtitle_path: str,
+                          segment_path: str, crf: int = VIDEO_CRF) -> List[str]:
+    """
+    Build FFmpeg command that encodes one frame's video segment
+
+    The segment is shifted onto the final timeline before burning subtitles,
+    so the shared subtitles.srt lines up without per-segment subtitle files,
+    then shifted back to start at zero for concatenation.
+    """
+    first, count = segment_frame_range(frame)
+    offset = first / VIDEO_FPS
+    duration = count / VIDEO_FPS
+    fade_out_start = max(0.0, duration - FADE_DURATION)
+
+    filter_str = (
+        f"[0:v]scale={VIDEO_WIDTH}:{VIDEO_HEIGHT}:flags=lanczos,"
+        f"fps={VIDEO_FPS},"
+        f"fade=t=in:st=0:d={FADE_DURATION},"
+        f"fade=t=out:st={fade_out_start:.3f}:d={FADE_DURATION},"
+        f"setpts=PTS+{offset:.6f}/TB,"
+        f"{subtitles_filter(subtitle_path)},"
+        f"setpts=PTS-STARTPTS[v]"
+    )
+
+    cmd = [
+        'ffmpeg', '-y', '-v', 'error',
+        '-loop', '1', '-framerate', str(VIDEO_FPS),
+        '-i', frame.image_path,
+        '-filter_complex', filter_str,
+        '-map', '[v]',
+        '-frames:v', str(count),
+        '-an',
+    ]
+    cmd.extend(video_encoding_args(crf))
+    cmd.append(segment_path)
     return cmd
 
 
+def write_concat_playlist(entries: List[Tuple[str, Optional[float]]], playlist_path: str) -> None:
+    """
+    Write an FFmpeg concat demuxer playlist
+
+    Args:
+        entries: (file_path, duration) pairs; duration may be None
+        playlist_path: Where to write the playlist
+    """
+    lines = ["ffconcat version 1.0\n"]
+    for path, duration in entries:
+        escaped = os.path.abspath(path).replace("'", "'\\''")
+        lines.append(f"file '{escaped}'\n")
+        if duration is not None:
+            lines.append(f"duration {duration:.6f}\n")
+    write_text_atomic(playlist_path, ''.join(lines))
+
+
+def build_concat_mux_command(video_playlist: str, audio_playlist: str,
+                             output_path: str,
+                             chapters_path: Optional[str] = None) -> List[str]:
+    """
+    Build FFmpeg command that joins encoded segments with the narration
+
+    Video segments are stream-copied; audio is read from the decoded PCM
+    (see audio_decode.py) and encoded to AAC. The concat demuxer opens one file per playlist
+    at a time, so file handles and memory stay flat however long the lecture.
+    chapters_path is an ffmetadata file whose chapters are muxed in.
+    """
+    cmd = [
+        'ffmpeg', '-y',
+        '-f', 'concat', '-safe', '0', '-i', video_playlist,
+        '-f', 'concat', '-safe', '0', '-i', audio_playlist,
+    ]
+    if chapters_path:
+        cmd.extend(['-f', 'ffmetadata', '-i', chapters_path, '-map_chapters', '2'])
+    cmd.extend(['-map', '0:v', '-map', '1:a', '-c:v', 'copy'])
+    cmd.extend(audio_encoding_args())
+    cmd.extend(['-movflags', '+faststart', output_path])
+    return cmd
+
+
+def segment_cache_key(frame: FrameData, cues: List[Cue], crf: int = VIDEO_CRF) -> str:
+    """
+    Hash of everything that determines a frame's encoded segment
+
+    The image content, the segment's length in video frames, the subtitle
+    cues burned into it (relative to the segment start, so frames after an
+    edited one still match when only their position moved) and the
+    encoding settings.
+    """
+    first, count = segment_frame_range(frame)
+    offset = first / VIDEO_FPS
+    end = (first + count) / VIDEO_FPS
+    burned = [[round(cue.start - offset, 3), round(cue.end - offset, 3), cue.lines]
+              for cue in cues if cue.end > offset and cue.start < end]
+    key = [file_digest(frame.image_path), count, burned, video_encoding_args(crf),
+           FADE_DURATION, VIDEO_WIDTH, VIDEO_HEIGHT, SUBTITLE_STYLE]
+    return hashlib.sha256(json.dumps(key).encode('utf-8')).hexdigest()
+
+
+def encode_segments(frames: List[FrameData], subtitle_path: str,
+                    segments_dir: str, jobs: int = RENDER_JOBS,
+                    journal: Optional[Journal] = None,
+                    encoder: Optional[Callable] = None,
+                    crf: int = VIDEO_CRF) -> List[str]:
+    """
+    Encode every frame's video segment with a bounded pool of FFmpeg processes
+
+    Each finished segment is recorded in the video's build journal
+    (atomic_io.py) under its cache key; segments whose key still matches are
+    reused, so after editing one frame's image, audio or narration, or after
+    an interrupted render, only the affected or unfinished segments are
+    encoded. Segments are encoded to a partial file and renamed when done.
+
+    encoder, if given, replaces the local FFmpeg pool: it is called with
+    the pending (frame, segment_path, key, unit) jobs, the subtitle path
+    and the CRF, and must place every segment at its segment_path (see
+    render_farm.py).
+
+    Returns segment paths in frame order.
+    """
+    if journal is None:
+        journal = Journal(os.path.dirname(os.path.dirname(os.path.abspath(segments_dir))))
+    os.makedirs(segments_dir, exist_ok=True)
+    remove_stale_partials(segments_dir)
+    segment_paths = [os.path.join(segments_dir, f"segment_{frame.number}.mp4")
+                     for frame in frames]
+    with open(subtitle_path, 'r', encoding='utf-8') as f:
+        cues = list(read_srt(f))
+
+    pending = []
+    for frame, segment_path in zip(frames, segment_paths):
+        key = segment_cache_key(frame, cues, crf)
+        unit = os.path.basename(segment_path)
+        if not journal.is_done('segment', unit, key, segment_path):
+            pending.append((frame, segment_path, key, unit))
+
+    def encode(frame: FrameData, segment_path: str, key: str, unit: str) -> None:
+        with atomic_output(segment_path) as partial:
+            cmd = build_segment_command(frame, subtitle_path, partial, crf)
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise FFmpegError(f"Segment for frame {frame.number} failed "
+                                  f"with code {result.returncode}\n{result.stderr[-2000:]}")
+        journal.record('segment', unit, key, segment_path)
+
+    reused = len(frames) - len(pending)
+    if reused:
+        print(f"      ✓ Reusing {reused} unchanged segment(s)")
+
+    if encoder is not None:
+        if pending:
+            encoder(pending, subtitle_path, crf)
+        for _, segment_path, key, unit in pending:
+            journal.record('segment', unit, key, segment_path)
+        return segment_paths
+
+    completed = 0
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(encode, *job) for job in pending]
+        try:
+            for future in as_completed(futures):
+                future.result()
+                completed += 1
+                print(f"\r      Encoded segment {completed}/{len(pending)}", end='', flush=True)
+        except BaseException:
+            # Stop queued encodes; finished segments are journaled for the next run
+            for future in futures:
+                future.cancel()
+            raise
+    if pending:
+        print()
+
+    return segment_paths
+
+
+def render_segmented(video_folder: str, frames: List[FrameData], subtitle_path: str,
+                     jobs: int = RENDER_JOBS,
+                     output_path: Optional[str] = None,
+                     encoder: Optional[Callable] = None,
+                     crf: int = VIDEO_CRF,
+                     chapters_path: Optional[str] = None) -> Tuple[bool, str]:
+    """
+    Render the final video segment-by-segment for long lectures
+
+    1. Encode each frame (image + fades + burned subtitles) to its own segment
+    2. Concatenate segments (stream copy) and source audio via concat playlists,
+       muxing in the chapters from chapters_path if given
+
+    Returns: (success, output_message)
+    """
+    build_dir = os.path.join(video_folder, '.build')
+    segments_dir = os.path.join(build_dir, 'segments')
+
+    try:
+        segment_paths = encode_segments(frames, subtitle_path, segments_dir, jobs,
+                                        Journal(video_folder), encoder, crf)
+
+        video_playlist = os.path.join(build_dir, 'video_segments.txt')
+        audio_playlist = os.path.join(build_dir, 'audio_segments.txt')
+        write_concat_playlist([(path, None) for path in segment_paths], video_playlist)
+        write_concat_playlist([(mux_audio_path(f), f.actual_audio_duration) for f in frames],
+                              audio_playlist)
+
+        output_path = output_path or os.path.join(video_folder, 'final_video.mp4')
+        cmd = build_concat_mux_command(video_playlist, audio_playlist, output_path,
+                                       chapters_path)
+        return execute_ffmpeg(cmd)
+
+    except Exception as e:
+        return False, str(e)
+
+
 def execute_ffmpeg(cmd: List[str]) -> Tuple[bool, str]:
     """
     Execute FFmpeg command with progress monitoring
@@ -604,6 +927,9 @@ def verify_compilation(video_folder: str, frames: List[FrameData]) -> Dict:
     """
     Verify the compiled video meets requirements
 
+    The duration is checked against the measured audio total, and every
+    frame's picture, fade timing and audio are sampled (verify_render.py).
+
     Returns verification results dictionary
     """
     video_path = os.path.join(video_folder, 'final_video.mp4')
@@ -619,8 +945,8 @@ def verify_compilation(video_folder: str, frames: List[FrameData]) -> Dict:
     file_size = os.path.getsize(video_path)
     results['file_size_mb'] = file_size / (1024 * 1024)
 
-    # Check duration
-    expected_duration = frames[-1].end_time
+    # Check duration against the measured audio, not the script estimate
+    expected_duration = frames[-1].actual_end_time
     actual_duration = get_video_duration(video_path)
     results['expected_duration'] = expected_duration
     results['actual_duration'] = actual_duration
@@ -634,12 +960,16 @@ def verify_compilation(video_folder: str, frames: List[FrameData]) -> Dict:
     results['codec'] = video_info.get('codec_name', 'unknown')
     results['resolution_ok'] = (results['width'] == 1920 and results['height'] == 1080)
 
+    # Sample pictures and audio at every frame
+    results['sampled'] = verify_render(video_path, frames, FADE_DURATION)
+    results['sampling_ok'] = not results['sampled']['issues']
+
     return results
 
 
 def generate_report(video_folder: str, frames: List[FrameData],
                    num_subtitles: int, verification: Dict,
-                   compilation_time: float) -> str:
+                   compilation_time: float, crf: int = VIDEO_CRF) -> str:
     """
     Generate comprehensive compilation report
     """
@@ -655,22 +985,31 @@ def generate_report(video_folder: str, frames: List[FrameData],
         f"✓ Script parsed: {len(frames)} frames",
         f"✓ Images found: {len(frames)} PNG files (1920x1080)",
         f"✓ Audio found: {len(frames)} MP3 files",
-        f"✓ Total expected duration: {frames[-1].end_time:.0f} seconds",
+        f"✓ Total expected duration: {frames[-1].actual_end_time:.0f} seconds "
+        f"(script estimate: {frames[-1].end_time:.0f}s)",
         "",
         "SUBTITLE GENERATION",
         "-" * 70,
         f"✓ Subtitles created: {num_subtitles} subtitle entries",
-        f"✓ Format: SRT with Whisper word-level timestamps",
-        f"✓ Max line length: 42 characters",
-        f"✓ Max lines per subtitle: 2",
+        f"✓ Format: SRT with Whisper word-level timestamps"
+        + ''.join(f", {fmt.upper()}" for fmt in SUBTITLE_EXTRA_FORMATS),
+        f"✓ Max line length: {MAX_CHARS_PER_LINE} characters",
+        f"✓ Max lines per subtitle: {MAX_LINES}",
         f"✓ Timing: Perfectly synced using Whisper STT",
+    ]
+    total, silence = vad_totals(frames)
+    if total:
+        report_lines.append(
+            f"✓ Voice activity: {silence:.1f}s of {total:.1f}s audio was silence "
+            f"skipped by Whisper ({silence / total:.0%})")
+    report_lines += [
         "",
         "VIDEO COMPILATION",
         "-" * 70,
         f"✓ Frame transitions: Crossfade (0.5s)",
         f"✓ Audio timing: No artificial delay (Whisper-synced)",
         f"✓ Frame duration: Extended to prevent audio cutoff",
-        f"✓ Video codec: H.264 (libx264, CRF 23)",
+        f"✓ Video codec: H.264 (libx264, CRF {crf})",
         f"✓ Audio codec: AAC (192 kbps)",
         f"✓ Resolution: 1920x1080 @ 30fps",
         f"✓ Subtitles: Burned-in with styling",
@@ -695,6 +1034,7 @@ def generate_report(video_folder: str, frames: List[FrameData],
                               f"(expected 1920x1080)")
 
         report_lines.append(f"✓ Codec: {verification['codec']}")
+        report_lines.extend(describe_verification(verification['sampled']))
     else:
         report_lines.append("✗ Video file not created")
 
@@ -704,12 +1044,17 @@ def generate_report(video_folder: str, frames: List[FrameData],
         "-" * 70,
         f"✓ final_video.mp4 ({verification.get('file_size_mb', 0):.1f} MB)",
         f"✓ subtitles.srt",
+    ])
+    report_lines.extend(f"✓ subtitles.{fmt}" for fmt in SUBTITLE_EXTRA_FORMATS)
+    report_lines.extend([
+        f"✓ {CHAPTERS_VTT}, {THUMBNAILS_VTT}, {SPRITE_FILENAME}",
         f"✓ compilation_report.txt",
         "",
     ])
 
     # Overall status
-    if verification.get('exists') and verification.get('duration_ok') and verification.get('resolution_ok'):
+    if (verification.get('exists') and verification.get('duration_ok')
+            and verification.get('resolution_ok') and verification.get('sampling_ok')):
         report_lines.extend([
             "STATUS: ✓ COMPILATION SUCCESSFUL",
             "",
@@ -725,7 +1070,11 @@ def generate_report(video_folder: str, frames: List[FrameData],
     return '\n'.join(report_lines)
 
 
-def compile_video(video_folder: str) -> str:
+def compile_video(video_folder: str, segmented: Optional[bool] = None,
+                  jobs: int = RENDER_JOBS, force: bool = False,
+                  asr_backend: str = ASR_BACKEND, asr_profile: str = ASR_PROFILE,
+                  segment_encoder: Optional[Callable] = None,
+                  adaptive_crf: bool = False) -> str:
     """
     Main compilation function
 
@@ -736,6 +1085,19 @@ def compile_video(video_folder: str) -> str:
     4. Script text corrects Whisper transcription errors
     5. Perfect subtitle synchronization
 
+    Args:
+        video_folder: Path to Week-N/Video-M folder
+        segmented: Force segmented (True) or single-pass (False) rendering;
+                   None picks segmented above SEGMENTED_RENDER_THRESHOLD frames
+        jobs: Parallel FFmpeg processes for segmented rendering
+        force: Rebuild even if final_video.mp4 is up to date with its inputs
+        asr_backend: ASR engine for word timestamps (asr_backends.py)
+        asr_profile: ASR decoding profile (accurate, default, fast)
+        segment_encoder: Encodes segments elsewhere (render_farm.py); implies
+                         a segmented render
+        adaptive_crf: Plan the CRF from trial encodes if there is no current
+                      encode plan (encode_planner.py)
+
     Returns status message
     """
     start_time = datetime.now()
@@ -748,6 +1110,11 @@ def compile_video(video_folder: str) -> str:
     print("Subtitles: Script text + Whisper timing")
     print()
 
+    if not force and is_up_to_date(video_folder, asr_backend, asr_profile):
+        print("✓ Up to date: script, frames, audio and settings unchanged since the last build")
+        print(f"✓ Output: {video_folder}/final_video.mp4 (use --force to rebuild)")
+        return "SUCCESS"
+
     try:
         # Step 1: Parse script
         print("[1/8] Parsing script.md...")
@@ -755,8 +1122,13 @@ def compile_video(video_folder: str) -> str:
         if not os.path.exists(script_path):
             raise VideoCompilationError(f"Script not found: {script_path}")
 
-        frames = parse_script(script_path)
+        script_issues = []
+        frames = parse_script(script_path, script_issues)
+        if not frames:
+            raise VideoCompilationError(f"No frames found in {script_path}")
         print(f"      ✓ Parsed {len(frames)} frames")
+        for issue in script_issues:
+            print(f"      ⚠ {issue}")
         print(f"      ✓ Script duration: {frames[-1].end_time:.0f} seconds")
 
         # Step 2: Validate input files and measure audio durations
@@ -778,12 +1150,26 @@ def compile_video(video_folder: str) -> str:
 
         # Step 3: Transcribe audio with Whisper for precise timing
         print("\n[3/8] Transcribing audio with Whisper (this may take a minute)...")
+        print(f"      ASR: {asr_backend}, model '{WHISPER_MODEL}', {asr_profile} profile")
+        transcript_cache = os.path.join(video_folder, '.build', 'transcripts')
+        if USE_VAD:
+            for frame in frames:
+                frame.speech = speech_map_for(frame.decoded)
+            total, silence = vad_totals(frames)
+            if total:
+                print(f"      ✓ Voice activity: skipping {silence:.1f}s of silence "
+                      f"({silence / total:.0%} of {total:.1f}s audio)")
         for frame in frames:
             # Transcribe using ACTUAL frame start time
-            frame.whisper_segments = transcribe_audio_with_whisper(
+            frame.whisper_words = transcribe_audio_with_whisper(
                 frame.audio_path,
                 frame.actual_start_time,  # Use calculated actual time, not script estimate
-                model_name="small"
+                model_name=WHISPER_MODEL,
+                cache_dir=transcript_cache,
+                decoded=frame.decoded,
+                speech=frame.speech,
+                backend=asr_backend,
+                profile=asr_profile
             )
         print(f"      ✓ Transcribed all {len(frames)} audio files")
 
@@ -792,7 +1178,7 @@ def compile_video(video_folder: str) -> str:
         for frame in frames:
             frame.aligned_words = align_script_to_whisper_timestamps(
                 frame.narration,  # Ground truth text from script
-                frame.whisper_segments  # Precise timestamps from Whisper
+                frame.whisper_words  # Precise timestamps from Whisper
             )
         print(f"      ✓ Corrected transcription using actual script text")
         print(f"      ✓ Preserved Whisper word-level timestamps")
@@ -800,24 +1186,66 @@ def compile_video(video_folder: str) -> str:
         # Step 5: Generate subtitles with corrected text + Whisper timing
         print("\n[5/8] Generating perfectly-synced subtitles...")
         subtitle_path = os.path.join(video_folder, 'subtitles.srt')
-        num_subtitles = generate_subtitles_from_corrected_timestamps(frames, subtitle_path)
+        num_subtitles = generate_subtitles_from_corrected_timestamps(
+            frames, subtitle_path, SUBTITLE_EXTRA_FORMATS)
         print(f"      ✓ Created {num_subtitles} subtitle entries")
-        print(f"      ✓ Saved to: subtitles.srt")
+        print(f"      ✓ Saved to: subtitles.srt" +
+              ''.join(f", subtitles.{fmt}" for fmt in SUBTITLE_EXTRA_FORMATS))
         print(f"      ✓ Subtitles: Correct text + Whisper timing")
+        write_timeline(frames, os.path.join(video_folder, '.build', TIMELINE_FILENAME))
+        chapters_path = write_chapters(video_folder, frames)
+        print(f"      ✓ Chapters: {CHAPTERS_VTT}, {THUMBNAILS_VTT} + {SPRITE_FILENAME} "
+              f"(from source frames)")
 
         # Step 6: Build FFmpeg command
+        if segment_encoder is not None:
+            segmented = True
+        elif segmented is None:
+            segmented = len(frames) > SEGMENTED_RENDER_THRESHOLD
+
+        # Rendered under a partial name and renamed when complete, so a killed
+        # render never leaves a final_video.mp4 that looks finished
+        output_path = os.path.join(video_folder, 'final_video.mp4')
+        render_path = partial_path(output_path)
+        remove_stale_partials(video_folder)
+
         print("\n[6/8] Building FFmpeg command...")
-        ffmpeg_cmd = build_ffmpeg_command(video_folder, frames, subtitle_path)
-        print(f"      ✓ Filter graph created")
-        print(f"      ✓ {len(frames)} frames with 0.5s crossfade transitions")
+        crf = planned_crf(video_folder, frames)
+        if crf is None and adaptive_crf:
+            print("      Planning CRF from trial encodes...")
+            try:
+                crf = plan_encode(video_folder, frames)['crf']
+            except EncodePlanError as e:
+                print(f"      ⚠ Encode planning failed ({e}); using CRF {VIDEO_CRF}")
+        if crf is not None:
+            print(f"      ✓ Encode plan: {describe_plan(load_plan(video_folder))}")
+        else:
+            if load_plan(video_folder) and not adaptive_crf:
+                print(f"      ⚠ Encode plan is out of date (frames changed); using CRF {VIDEO_CRF} "
+                      f"- rerun with --adaptive-crf")
+            crf = VIDEO_CRF
+        if segmented:
+            where = 'on the render farm' if segment_encoder else f"{jobs} parallel encoder(s)"
+            print(f"      ✓ Segmented render: {len(frames)} segments, {where}")
+        else:
+            ffmpeg_cmd = build_ffmpeg_command(video_folder, frames, subtitle_path, render_path, crf,
+                                              chapters_path)
+            print(f"      ✓ Filter graph created")
+        print(f"      ✓ {len(frames)} frames with {FADE_DURATION}s crossfade transitions")
         print(f"      ✓ Using actual audio durations (no estimates)")
         print(f"      ✓ Frames and audio synchronized (no delay)")
 
         # Step 7: Execute compilation
         print("\n[7/8] Compiling video...")
-        success, message = execute_ffmpeg(ffmpeg_cmd)
-        if not success:
-            raise FFmpegError(message)
+        with atomic_output(output_path, render_path):
+            if segmented:
+                success, message = render_segmented(video_folder, frames, subtitle_path, jobs,
+                                                    render_path, segment_encoder, crf,
+                                                    chapters_path)
+            else:
+                success, message = execute_ffmpeg(ffmpeg_cmd)
+            if not success:
+                raise FFmpegError(message)
 
         # Step 8: Verify output
         print("\n[8/8] Verifying output...")
@@ -833,6 +1261,9 @@ def compile_video(video_folder: str) -> str:
         else:
             print(f"      ⚠ Resolution: {verification['width']}x{verification['height']}")
 
+        for line in describe_verification(verification['sampled']):
+            print(f"      {line}")
+
         print(f"      ✓ File size: {verification['file_size_mb']:.1f} MB")
 
         # Step 8: Generate report
@@ -842,14 +1273,14 @@ def compile_video(video_folder: str) -> str:
 
         report = generate_report(
             video_folder, frames, num_subtitles,
-            verification, compilation_time
+            verification, compilation_time, crf
         )
 
         report_path = os.path.join(video_folder, 'compilation_report.txt')
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(report)
+        write_text_atomic(report_path, report)
 
         print(f"      ✓ Report saved to: compilation_report.txt")
+        write_build_stamp(video_folder, asr_backend, asr_profile)
 
         # Print summary
         print("\n" + "=" * 70)
@@ -863,6 +1294,9 @@ def compile_video(video_folder: str) -> str:
 
         return "SUCCESS"
 
+    except ScriptParseError as e:
+        print(f"\n✗ ERROR: Invalid script - {e}")
+        return f"ERROR: {e}"
     except FrameMismatchError as e:
         print(f"\n✗ ERROR: Frame mismatch - {e}")
         return f"ERROR: {e}"
@@ -879,14 +1313,123 @@ def compile_video(video_folder: str) -> str:
         return f"ERROR: {e}"
 
 
+# ---------------------------------------------------------------------------
+# Watch mode
+# ---------------------------------------------------------------------------
+
+FRAME_FILE_PATTERN = re.compile(r'^(?:frames|audio)/frame_(\d+)\.(?:png|mp3)$')
+
+
+def is_build_input(rel_path: str) -> bool:
+    """True for the files a build reads (the same set build_stamp covers)"""
+    folder, _, name = rel_path.rpartition('/')
+    return ((folder == '' and name == 'script.md') or
+            (folder == 'frames' and name.endswith('.png')) or
+            (folder == 'audio' and name.endswith('.mp3')))
+
+
+def script_narrations(video_folder: str) -> Dict[int, str]:
+    """Frame number -> narration, or {} if script.md is missing or invalid"""
+    try:
+        return {frame.number: frame.narration
+                for frame in parse_script(os.path.join(video_folder, 'script.md'))}
+    except (OSError, ScriptParseError):
+        return {}
+
+
+def changed_frame_numbers(changed: set, before: Dict[int, str],
+                          after: Dict[int, str]) -> List[int]:
+    """Frames whose image, audio or narration changed"""
+    numbers = set()
+    for rel_path in changed:
+        match = FRAME_FILE_PATTERN.match(rel_path)
+        if match:
+            numbers.add(int(match.group(1)))
+    for number in set(before) | set(after):
+        if before.get(number) != after.get(number):
+            numbers.add(number)
+    return sorted(numbers)
+
+
+def watch(video_folder: str, jobs: int = RENDER_JOBS,
+          debounce: float = WATCH_DEBOUNCE_SECONDS,
+          asr_backend: str = ASR_BACKEND, asr_profile: str = ASR_PROFILE,
+          adaptive_crf: bool = False) -> None:
+    """
+    Rebuild final_video.mp4 whenever script.md, a frame image or audio changes
+
+    Always renders segmented: transcripts are cached by audio content and
+    segments by their inputs (segment_cache_key), so a rebuild re-transcribes
+    only changed audio, re-encodes only the affected segments and
+    stream-copies the rest into the final video.
+    """
+    from file_watcher import FileWatcher
+
+    watcher = FileWatcher(video_folder, ('frames', 'audio'), is_build_input)
+    narrations = script_narrations(video_folder)
+    compile_video(video_folder, segmented=True, jobs=jobs,
+                  asr_backend=asr_backend, asr_profile=asr_profile,
+                  adaptive_crf=adaptive_crf)
+    print(f"\n👀 Watching {video_folder} ({watcher.backend}), Ctrl+C to stop")
+
+    try:
+        while True:
+            changed = watcher.wait(debounce)
+            current = script_narrations(video_folder)
+            numbers = changed_frame_numbers(changed, narrations, current)
+            narrations = current
+
+            print(f"\n↻ Changed: {', '.join(sorted(changed))}")
+            if numbers:
+                print(f"  Affected frames: {', '.join(str(n) for n in numbers)}")
+            compile_video(video_folder, segmented=True, jobs=jobs,
+                          asr_backend=asr_backend, asr_profile=asr_profile,
+                          adaptive_crf=adaptive_crf)
+            print(f"\n👀 Watching {video_folder}, Ctrl+C to stop")
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    finally:
+        watcher.close()
+
+
 def main():
     """Main entry point"""
-    if len(sys.argv) < 2:
-        print("Usage: python3 compile_video.py Week-N/Video-M")
-        print("\nExample: python3 compile_video.py Week-1/Video-1")
-        sys.exit(1)
-
-    video_folder = sys.argv[1]
+    parser = argparse.ArgumentParser(
+        description="Compile final video with transitions and subtitles",
+        epilog="Example: python3 compile_video.py Week-1/Video-1"
+    )
+    parser.add_argument('video_folder', help="Video folder, e.g. Week-1/Video-1")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--segmented', dest='segmented', action='store_true', default=None,
+                      help="Render frame segments then concatenate (default for "
+                           f"more than {SEGMENTED_RENDER_THRESHOLD} frames)")
+    mode.add_argument('--single-pass', dest='segmented', action='store_false',
+                      help="Render with one FFmpeg filter graph over all frames")
+    parser.add_argument('--jobs', type=int, default=RENDER_JOBS,
+                        help=f"Parallel segment encoders (default: {RENDER_JOBS})")
+    parser.add_argument('--force', action='store_true',
+                        help="Rebuild even if the video is up to date with its inputs")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep running and rebuild the changed frames on every edit "
+                             "(segmented render)")
+    parser.add_argument('--debounce', type=float, default=WATCH_DEBOUNCE_SECONDS,
+                        help=f"--watch: seconds of quiet before rebuilding "
+                             f"(default: {WATCH_DEBOUNCE_SECONDS})")
+
+    parser.add_argument('--adaptive-crf', action='store_true',
+                        help="Pick the CRF from trial encodes when the frames have no "
+                             "current encode plan (see encode_planner.py)")
+    parser.add_argument('--asr-backend', choices=sorted(ASR_BACKENDS), default=ASR_BACKEND,
+                        help=f"Speech recognition engine (default: {ASR_BACKEND})")
+    parser.add_argument('--asr-profile', choices=list(PROFILES), default=ASR_PROFILE,
+                        help=f"Decoding speed/accuracy profile (default: {ASR_PROFILE}); "
+                             "see benchmark_asr.py")
+    args = parser.parse_args()
+
+    if args.watch and args.segmented is False:
+        parser.error("--watch always renders segmented; drop --single-pass")
+
+    video_folder = args.video_folder
 
     # Convert to absolute path if needed
     if not os.path.isabs(video_folder):
@@ -897,7 +1440,15 @@ def main():
         print(f"Error: Video folder not found: {video_folder}")
         sys.exit(1)
 
-    result = compile_video(video_folder)
+    if args.watch:
+        watch(video_folder, jobs=max(1, args.jobs), debounce=args.debounce,
+              asr_backend=args.asr_backend, asr_profile=args.asr_profile,
+              adaptive_crf=args.adaptive_crf)
+        return
+
+    result = compile_video(video_folder, segmented=args.segmented, jobs=max(1, args.jobs),
+                           force=args.force, asr_backend=args.asr_backend,
+                           asr_profile=args.asr_profile, adaptive_crf=args.adaptive_crf)
 
     if result == "SUCCESS":
         sys.exit(0)
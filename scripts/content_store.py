@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Course-wide Content-Addressed Asset Store
+
+Every PNG and MP3 in a video's frames/, audio/ and assets/ folders is stored
+once as a blob named by its sha256 under `<course>/.objects/ab/abcdef...`,
+and the working folders hold copy-on-write reflinks of those blobs (btrfs,
+xfs). Identical files across videos share one copy on disk, and editing a
+working file in place only changes that file.
+
+Where the filesystem cannot reflink, working files are hard links to the
+blob and the blob is made read-only, so an in-place write fails instead of
+changing every video that shares the file; replace such files (temp file +
+rename, as the pipeline scripts do). Root is not stopped by the mode, so as
+root, and without hard links, working files are plain copies. Blobs are
+re-hashed before they are reused or deduplicated into, so one modified
+anyway is dropped rather than spread.
+
+Because a path's content only changes when the file is replaced, a file's
+digest can be memoized by (device, inode, size, mtime): caches that key on
+file_digest() (transcripts, encoded segments, probes) get the hash for free
+after the first time. The memo is persisted in `.objects/digests.json`.
+
+Which blobs are still needed is recorded explicitly: every ingested video
+folder, and any other user of the store such as the render farm, writes a
+manifest of the digests it uses to `.objects/refs/`. --gc removes blobs no
+manifest lists (link counts say nothing about reflinked or copied files).
+
+Usage:
+    python3 content_store.py /path/to/course            # Link all video folders
+    python3 content_store.py /path/to/course --gc       # Also drop unused blobs
+"""
+
+import os
+import sys
+import json
+import errno
+import shutil
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+
+
+STORE_DIRNAME = '.objects'
+DIGEST_MEMO_FILENAME = 'digests.json'
+REFS_DIRNAME = 'refs'
+VIDEO_REFS_PREFIX = 'video--'
+LINKED_FOLDERS = ('frames', 'audio', 'assets')
+HASH_CHUNK_SIZE = 1 << 20
+FICLONE = 0x40049409  # Linux ioctl for copy-on-write clones (btrfs, xfs)
+BLOB_MODE = 0o444
+# Hard links are only safe while the read-only mode actually stops writes
+LINK_READ_ONLY = not hasattr(os, 'geteuid') or os.geteuid() != 0
+
+# (dev, ino, size, mtime_ns) -> sha256 hex, shared by the whole process
+_digest_memo: Dict[Tuple[int, int, int, int], str] = {}
+_digest_lock = threading.Lock()
+
+
+def _stat_key(stat: os.stat_result) -> Tuple[int, int, int, int]:
+    return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def file_digest(path: str) -> str:
+    """
+    sha256 of a file's contents, memoized by inode and mtime
+
+    Hard-linked working files share the blob's inode, so every link to the
+    same content resolves from the memo without reading the file.
+    """
+    key = _stat_key(os.stat(path))
+    with _digest_lock:
+        digest = _digest_memo.get(key)
+    if digest is not None:
+        return digest
+
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+    with _digest_lock:
+        _digest_memo[key] = digest
+    return digest
+
+
+def write_file_atomic(path: str, data: bytes) -> None:
+    """
+    Write data to path via a temp file and rename
+
+    Replacing the directory entry means a hard link to a shared blob is
+    swapped out rather than overwritten, and readers never see a partial file.
+    """
+    tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def copy_file_atomic(src: str, dst: str) -> None:
+    """Copy src to dst via a temp file and rename (see write_file_atomic)"""
+    tmp_path = f"{dst}.tmp.{os.getpid()}.{threading.get_ident()}"
+    try:
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class CorruptBlobError(OSError):
+    """A blob's contents no longer match its digest"""
+
+
+def _clone_file(src: str, dst: str, link: bool = False, copy: bool = True) -> Optional[str]:
+    """
+    Materialize src at dst without duplicating data where possible
+
+    Tries a copy-on-write reflink, then a hard link if link is set (only for
+    read-only blobs: a hard link shares every later write), then a plain copy
+    unless copy is False. Returns the method used, or None if nothing was made.
+    """
+    try:
+        import fcntl
+        with open(src, 'rb') as source, open(dst, 'wb') as target:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        return 'reflink'
+    except (ImportError, OSError):
+        if os.path.exists(dst):
+            os.remove(dst)
+
+    if link:
+        try:
+            os.link(src, dst)
+            return 'link'
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EMLINK, errno.EPERM, errno.ENOTSUP):
+                raise
+
+    if not copy:
+        return None
+    shutil.copyfile(src, dst)
+    return 'copy'
+
+
+def clone_file_atomic(src: str, dst: str, link: bool = False) -> str:
+    """
+    Reflink (or copy) src to dst via a temp name and rename
+
+    Returns the method used (see _clone_file).
+    """
+    tmp_dst = f"{dst}.tmp.{os.getpid()}.{threading.get_ident()}"
+    try:
+        method = _clone_file(src, tmp_dst, link=link)
+        os.replace(tmp_dst, dst)
+    except BaseException:
+        if os.path.exists(tmp_dst):
+            os.remove(tmp_dst)
+        raise
+    return method
+
+
+class ContentStore:
+    """sha256-addressed blob store rooted at <course>/.objects"""
+
+    def __init__(self, course_root: str):
+        self.course_root = Path(course_root).resolve()
+        self.root = self.course_root / STORE_DIRNAME
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.memo_path = self.root / DIGEST_MEMO_FILENAME
+        self._load_memo()
+
+    def _load_memo(self) -> None:
+        try:
+            with open(self.memo_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        with _digest_lock:
+            for key, digest in entries:
+                _digest_memo.setdefault(tuple(key), digest)
+
+    def save_memo(self) -> None:
+        """Persist digests of every blob-backed file seen by this process"""
+        blob_inodes = set()
+        for blob in self.iter_blobs():
+            stat = blob.stat()
+            blob_inodes.add((stat.st_dev, stat.st_ino))
+        with _digest_lock:
+            # Working files that are links share the blob's inode; copies
+            # and unrelated files are not worth persisting
+            entries = [[list(key), digest] for key, digest in _digest_memo.items()
+                       if key[:2] in blob_inodes]
+        write_file_atomic(str(self.memo_path), json.dumps(entries).encode('utf-8'))
+
+    def blob_path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def has(self, digest: str) -> bool:
+        """
+        Whether an intact blob is stored for digest
+
+        The blob is re-hashed (memoized until its inode or mtime changes); one
+        modified in place is removed so the next put stores it again.
+        """
+        blob = self.blob_path(digest)
+        if not blob.exists():
+            return False
+        if file_digest(str(blob)) == digest:
+            return True
+        blob.unlink()
+        return False
+
+    def iter_blobs(self) -> Iterator[Path]:
+        for shard in sorted(self.root.iterdir()):
+            if shard.is_dir() and len(shard.name) == 2:
+                yield from sorted(shard.iterdir())
+
+    def put(self, path: str) -> Tuple[str, str]:
+        """
+        Store a working file and make it share its blob's data
+
+        Returns (digest, action) where action is 'linked' (already a link to
+        the blob, or this filesystem can only copy), 'deduplicated' (content
+        already stored; the file now shares it) or 'stored'.
+        """
+        digest = file_digest(path)
+        blob = self.blob_path(digest)
+
+        if self.has(digest):
+            if os.path.samefile(blob, path):
+                self._protect(digest)
+                return digest, 'linked'
+            method = self._share(digest, path)
+            return digest, 'deduplicated' if method else 'linked'
+
+        # A reflinked or copied blob leaves the working file as it was; a
+        # hard-linked one makes it read-only together with the blob
+        blob.parent.mkdir(exist_ok=True)
+        tmp_blob = f"{blob}.tmp.{os.getpid()}.{threading.get_ident()}"
+        _clone_file(path, tmp_blob, link=LINK_READ_ONLY)
+        os.chmod(tmp_blob, BLOB_MODE)
+        os.replace(tmp_blob, blob)
+        with _digest_lock:
+            _digest_memo[_stat_key(blob.stat())] = digest
+        return digest, 'stored'
+
+    def put_bytes(self, data: bytes) -> str:
+        """Store data directly and return its digest"""
+        digest = hashlib.sha256(data).hexdigest()
+        blob = self.blob_path(digest)
+        if not self.has(digest):
+            blob.parent.mkdir(exist_ok=True)
+            tmp_blob = f"{blob}.tmp.{os.getpid()}.{threading.get_ident()}"
+            with open(tmp_blob, 'wb') as f:
+                f.write(data)
+            os.chmod(tmp_blob, BLOB_MODE)
+            os.replace(tmp_blob, blob)
+        return digest
+
+    def _protect(self, digest: str) -> str:
+        """Make a blob read-only (blobs stored by older versions were not)"""
+        blob = str(self.blob_path(digest))
+        if os.stat(blob).st_mode & 0o222:
+            os.chmod(blob, BLOB_MODE)
+        return blob
+
+    def _share(self, digest: str, dest: str, copy: bool = False) -> Optional[str]:
+        """
+        Replace dest with a reflink of (or read-only hard link to) a blob
+
+        With copy set, falls back to a plain copy; otherwise dest is left
+        alone when the filesystem cannot share data. Returns the method used.
+        """
+        blob = self._protect(digest)
+        tmp_dest = f"{dest}.tmp.{os.getpid()}.{threading.get_ident()}"
+        try:
+            method = _clone_file(blob, tmp_dest, link=LINK_READ_ONLY, copy=copy)
+            if method is None:
+                return None
+            os.replace(tmp_dest, dest)
+        except BaseException:
+            if os.path.exists(tmp_dest):
+                os.remove(tmp_dest)
+            raise
+        with _digest_lock:
+            _digest_memo[_stat_key(os.stat(dest))] = digest
+        return method
+
+    def checkout(self, digest: str, dest: str) -> str:
+        """
+        Write a blob's content to dest (atomically replacing any existing file)
+
+        Raises CorruptBlobError if the blob was modified since it was stored.
+        """
+        if not self.has(digest):
+            raise CorruptBlobError(f"Blob missing or modified: {digest}")
+        return self._share(digest, dest, copy=True)
+
+    def set_refs(self, name: str, digests: Iterable[str]) -> None:
+        """Record the blobs one user of the store needs (replaces its manifest)"""
+        refs_dir = self.root / REFS_DIRNAME
+        refs_dir.mkdir(exist_ok=True)
+        write_file_atomic(str(refs_dir / f"{name}.json"),
+                          json.dumps(sorted(set(digests))).encode('utf-8'))
+
+    def referenced(self) -> Set[str]:
+        """Every digest listed in a manifest"""
+        digests = set()
+        refs_dir = self.root / REFS_DIRNAME
+        if refs_dir.is_dir():
+            for manifest in refs_dir.glob('*.json'):
+                with open(manifest, 'r', encoding='utf-8') as f:
+                    digests.update(json.load(f))
+        return digests
+
+    def video_refs_name(self, video_folder: str) -> str:
+        rel_path = Path(video_folder).resolve().relative_to(self.course_root)
+        return VIDEO_REFS_PREFIX + '--'.join(rel_path.parts)
+
+    def ingest_video_folder(self, video_folder: str) -> Dict[str, int]:
+        """
+        Link every file in a video's frames/, audio/ and assets/ to the store
+
+        The digests are recorded as the video's manifest. Returns counts per
+        action plus 'bytes_saved' for deduplicated files.
+        """
+        counts = {'stored': 0, 'deduplicated': 0, 'linked': 0, 'bytes_saved': 0}
+        digests = []
+        for folder_name in LINKED_FOLDERS:
+            folder = Path(video_folder) / folder_name
+            if not folder.is_dir():
+                continue
+            for path in sorted(folder.iterdir()):
+                if not path.is_file() or path.name.startswith('.') or '.tmp.' in path.name:
+                    continue
+                size = path.stat().st_size
+                digest, action = self.put(str(path))
+                digests.append(digest)
+                counts[action] += 1
+                if action == 'deduplicated':
+                    counts['bytes_saved'] += size
+        self.set_refs(self.video_refs_name(video_folder), digests)
+        return counts
+
+    def collect_garbage(self) -> Tuple[int, int]:
+        """
+        Remove blobs that no manifest lists
+
+        Manifests of video folders that no longer exist are dropped first.
+        Video manifests are only as current as the last ingest, so run this
+        after ingesting the course (as main() does). Returns (blobs, bytes)
+        freed.
+        """
+        refs_dir = self.root / REFS_DIRNAME
+        live_videos = {self.video_refs_name(str(video))
+                       for video in iter_video_folders(str(self.course_root))}
+        if refs_dir.is_dir():
+            for manifest in refs_dir.glob(f"{VIDEO_REFS_PREFIX}*.json"):
+                if manifest.stem not in live_videos:
+                    manifest.unlink()
+
+        referenced = self.referenced()
+        removed = 0
+        freed = 0
+        for blob in list(self.iter_blobs()):
+            if '.tmp.' in blob.name:
+                continue
+            stat = blob.stat()
+            if blob.name not in referenced:
+                blob.unlink()
+                removed += 1
+                freed += stat.st_size
+        return removed, freed
+
+
+def iter_video_folders(course_root: str) -> Iterator[Path]:
+    """Every Week-N/Video-M folder under the course root"""
+    for week in sorted(Path(course_root).glob('Week-*')):
+        for video in sorted(week.glob('Video-*')):
+            if video.is_dir():
+                yield video
+
+
+def main():
+    """Link every video folder in a course to the content store"""
+    parser = argparse.ArgumentParser(description="Deduplicate course assets into a content store")
+    parser.add_argument('course_folder', help="Course root containing Week-N/Video-M folders")
+    parser.add_argument('--gc', action='store_true', help="Remove blobs no manifest references")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.course_folder):
+        print(f"Error: Folder not found: {args.course_folder}")
+        sys.exit(1)
+
+    store = ContentStore(args.course_folder)
+    totals = {'stored': 0, 'deduplicated': 0, 'linked': 0, 'bytes_saved': 0}
+    for video_folder in iter_video_folders(str(store.course_root)):
+        counts = store.ingest_video_folder(str(video_folder))
+        for key, value in counts.items():
+            totals[key] += value
+        print(f"  {video_folder.relative_to(store.course_root)}: "
+              f"{counts['stored']} stored, {counts['deduplicated']} deduplicated, "
+              f"{counts['linked']} already linked")
+
+    print(f"\n✓ {totals['stored']} new blobs, {totals['deduplicated']} duplicates linked "
+          f"({totals['bytes_saved'] / 1024 / 1024:.1f} MB saved)")
+
+    if args.gc:
+        removed, freed = store.collect_garbage()
+        print(f"✓ Removed {removed} unused blobs ({freed / 1024 / 1024:.1f} MB)")
+
+    store.save_memo()
+
+
+if __name__ == '__main__':
+    main()
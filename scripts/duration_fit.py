@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+TTS Duration Fitting
+
+Murf audio rarely lands exactly on a frame's target duration (the time range
+in its script.md header). Instead of editing SPEAKING_RATE and paying for
+another synthesis, moderate deviations are fixed locally with a
+pitch-preserving time-stretch:
+
+- FFmpeg's rubberband filter when FFmpeg was built with it, otherwise atempo
+  (WSOLA, always available)
+- Only within MAX_STRETCH_RATIO (default 1.25× faster or slower); beyond
+  that the voice sounds unnatural and the frame is flagged for re-synthesis
+- The untouched take is kept in .build/tts_originals/, so refitting after a
+  header edit always stretches the original, never a stretched copy. The
+  manifest records the digests of both files; if the audio was replaced by
+  anything else (a new synthesis), the kept take is discarded
+
+Every frame's target, synthesized and fitted duration is recorded in
+audio/manifest.json. compile_video.py measures the fitted MP3s from their
+decoded sample counts, so frame timing follows automatically.
+
+Usage:
+    python3 duration_fit.py Week-1/Video-1                 # Refit existing audio
+    python3 duration_fit.py Week-1/Video-1 --max-ratio 1.15 --dry-run
+
+generate_tts.py runs this after every synthesized frame.
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import subprocess
+import threading
+from functools import lru_cache
+from typing import Dict
+
+from atomic_io import Journal
+from audio_decode import decode_audio, AudioDecodeError, DECODED_DIRNAME
+from content_store import copy_file_atomic, file_digest, write_file_atomic
+
+
+DURATION_TOLERANCE = 2.0      # Seconds off target that need no fitting
+MAX_STRETCH_RATIO = 1.25      # Largest tempo change applied locally (either direction)
+STRETCH_METHOD = 'auto'       # 'auto' (rubberband if available), 'rubberband' or 'atempo'
+MP3_QUALITY = '2'             # libmp3lame VBR quality for fitted files (~190 kbps)
+MANIFEST_FILENAME = 'manifest.json'
+MANIFEST_VERSION = 1
+ORIGINALS_DIR = os.path.join('.build', 'tts_originals')
+
+
+class DurationFitError(Exception):
+    """FFmpeg could not time-stretch a file"""
+    pass
+
+
+@lru_cache(maxsize=1)
+def has_rubberband() -> bool:
+    """True if the FFmpeg on PATH was built with librubberband"""
+    try:
+        result = subprocess.run(['ffmpeg', '-hide_banner', '-filters'],
+                                capture_output=True, text=True)
+    except OSError:
+        return False
+    return any(line.split()[1:2] == ['rubberband'] for line in result.stdout.splitlines())
+
+
+def stretch_filter(tempo: float, method: str = STRETCH_METHOD) -> str:
+    """
+    FFmpeg audio filter that speeds audio up by tempo (<1 slows it down)
+
+    atempo is chained for factors outside 0.5-2.0, which older FFmpeg
+    builds reject in a single instance.
+    """
+    if method == 'rubberband' or (method == 'auto' and has_rubberband()):
+        return f"rubberband=tempo={tempo:.6f}:pitchq=quality"
+
+    stages = []
+    remaining = tempo
+    while remaining > 2.0:
+        stages.append(2.0)
+        remaining /= 2.0
+    while remaining < 0.5:
+        stages.append(0.5)
+        remaining /= 0.5
+    stages.append(remaining)
+    return ','.join(f"atempo={stage:.6f}" for stage in stages)
+
+
+def stretch_audio(source: str, output_path: str, tempo: float,
+                  method: str = STRETCH_METHOD) -> str:
+    """
+    Write a time-stretched MP3 of source to output_path (atomically)
+
+    Returns the filter method used ('rubberband' or 'atempo').
+    """
+    audio_filter = stretch_filter(tempo, method)
+    tmp_path = f"{output_path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    cmd = ['ffmpeg', '-v', 'error', '-nostdin', '-y', '-i', source,
+           '-filter:a', audio_filter, '-c:a', 'libmp3lame', '-q:a', MP3_QUALITY,
+           '-f', 'mp3', tmp_path]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise DurationFitError(f"Time-stretch of {source} failed: "
+                                   f"{result.stderr.strip()[-500:]}")
+        os.replace(tmp_path, output_path)
+    except OSError as e:
+        raise DurationFitError(f"Could not run ffmpeg: {e}")
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return audio_filter.split('=', 1)[0]
+
+
+def measure(audio_path: str, video_folder: str) -> float:
+    """Exact duration from the decoded sample count (shared with compile_video.py)"""
+    return decode_audio(audio_path, os.path.join(video_folder, '.build', DECODED_DIRNAME)).duration
+
+
+def original_path(video_folder: str, frame_number: int) -> str:
+    return os.path.join(video_folder, ORIGINALS_DIR, f"frame_{frame_number}.mp3")
+
+
+def fit_frame_audio(video_folder: str, frame_number: int, target: float,
+                    max_ratio: float = MAX_STRETCH_RATIO,
+                    tolerance: float = DURATION_TOLERANCE,
+                    method: str = STRETCH_METHOD, dry_run: bool = False) -> Dict:
+    """
+    Bring audio/frame_N.mp3 to its target duration if it is off by more than tolerance
+
+    The stretch always starts from the kept original take (saved on first
+    fit). Returns a manifest entry; status is 'ok' (within tolerance),
+    'fitted', or 'resynthesize' (needs a tempo change beyond max_ratio).
+    """
+    audio_path = os.path.join(video_folder, 'audio', f"frame_{frame_number}.mp3")
+    original = original_path(video_folder, frame_number)
+    before = file_digest(audio_path) if os.path.exists(audio_path) else None
+    stale = False
+    if os.path.exists(original) and before is not None:
+        manifest = load_manifest(os.path.dirname(audio_path))
+        entry = manifest['frames'].get(str(frame_number), {})
+        # The kept take belongs to the audio this module last wrote; a newer
+        # synthesis (whichever script wrote it and its manifest entry)
+        # replaces it. A dry run only reports as if it had been dropped.
+        stale = (entry.get('sha256') != before
+                 or entry.get('original_sha256') != file_digest(original))
+        if stale and not dry_run:
+            os.remove(original)
+
+    source = original if os.path.exists(original) and not stale else audio_path
+    synthesized = measure(source, video_folder)
+    tempo = synthesized / target if target > 0 else 1.0
+    entry = {
+        'file': os.path.basename(audio_path),
+        'target': target,
+        'synthesized': round(synthesized, 3),
+        'duration': round(synthesized, 3),
+        'tempo': 1.0,
+        'method': None,
+    }
+
+    if target <= 0 or abs(synthesized - target) <= tolerance:
+        if source == original and not dry_run:
+            # Back within tolerance of a new target: restore the original take
+            copy_file_atomic(original, audio_path)
+        entry['status'] = 'ok'
+    elif max(tempo, 1 / tempo) > max_ratio:
+        entry['status'] = 'resynthesize'
+        entry['required_tempo'] = round(tempo, 3)
+    else:
+        entry['status'] = 'fitted'
+        entry['tempo'] = round(tempo, 4)
+        if dry_run:
+            entry['duration'] = round(target, 3)
+        else:
+            if source == audio_path:
+                os.makedirs(os.path.dirname(original), exist_ok=True)
+                copy_file_atomic(audio_path, original)
+            entry['method'] = stretch_audio(original, audio_path, tempo, method)
+            entry['duration'] = round(measure(audio_path, video_folder), 3)
+
+    if os.path.exists(audio_path):
+        entry['sha256'] = file_digest(audio_path)
+        if before is not None and entry['sha256'] != before:
+            follow_refit(video_folder, frame_number, before, audio_path)
+    if os.path.exists(original) and not (dry_run and stale):
+        entry['original_sha256'] = file_digest(original)
+    return entry
+
+
+def follow_refit(video_folder: str, frame_number: int, before: str, audio_path: str) -> None:
+    """
+    Keep the TTS journal entry of refit audio valid
+
+    generate_tts.py journals each frame with its audio's digest. Refitting
+    changes the file but not the narration, so an entry that recorded the
+    audio as it was before the refit is re-recorded with the new digest;
+    otherwise the next TTS run would synthesize the frame again.
+    """
+    journal = Journal(video_folder)
+    unit = f"frame_{frame_number}"
+    entry = journal.get('tts', unit)
+    if entry and entry.get('sha256') == before:
+        journal.record('tts', unit, entry['key'], audio_path)
+
+
+def load_manifest(audio_dir: str) -> Dict:
+    try:
+        with open(os.path.join(audio_dir, MANIFEST_FILENAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {'version': MANIFEST_VERSION, 'frames': {}}
+
+
+def update_manifest(audio_dir: str, entries: Dict[int, Dict], **fields) -> None:
+    """Merge per-frame entries (and top-level fields such as voice/rate) into the manifest"""
+    manifest = load_manifest(audio_dir)
+    manifest.update(fields)
+    for number, entry in entries.items():
+        manifest['frames'][str(number)] = entry
+    manifest['frames'] = dict(sorted(manifest['frames'].items(), key=lambda item: int(item[0])))
+    write_file_atomic(os.path.join(audio_dir, MANIFEST_FILENAME),
+                      json.dumps(manifest, indent=1).encode('utf-8'))
+
+
+def main():
+    """Refit every frame's audio to its script.md target duration"""
+    from script_parser import iter_frames, ScriptParseError
+
+    parser = argparse.ArgumentParser(description="Time-stretch frame audio to target durations")
+    parser.add_argument('video_folder', help="Video folder with script.md and audio/")
+    parser.add_argument('--max-ratio', type=float, default=MAX_STRETCH_RATIO,
+                        help=f"Largest tempo change to apply (default {MAX_STRETCH_RATIO})")
+    parser.add_argument('--tolerance', type=float, default=DURATION_TOLERANCE,
+                        help=f"Seconds off target left alone (default {DURATION_TOLERANCE})")
+    parser.add_argument('--method', choices=['auto', 'rubberband', 'atempo'],
+                        default=STRETCH_METHOD)
+    parser.add_argument('--dry-run', action='store_true', help="Report without changing files")
+    args = parser.parse_args()
+
+    if shutil.which('ffmpeg') is None:
+        print("Error: ffmpeg must be on PATH")
+        sys.exit(1)
+
+    audio_dir = os.path.join(args.video_folder, 'audio')
+    try:
+        frames = list(iter_frames(os.path.join(args.video_folder, 'script.md')))
+    except (OSError, ScriptParseError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    entries = {}
+    exit_code = 0
+    for frame in frames:
+        name = f"frame_{frame.number}.mp3"
+        if not os.path.exists(os.path.join(audio_dir, name)):
+            print(f"  ✗ {name}: missing")
+            exit_code = 1
+            continue
+        try:
+            entry = fit_frame_audio(args.video_folder, frame.number, frame.end_time - frame.start_time,
+                                    args.max_ratio, args.tolerance, args.method, args.dry_run)
+        except (AudioDecodeError, DurationFitError) as e:
+            print(f"  ✗ {name}: {e}")
+            exit_code = 1
+            continue
+        entries[frame.number] = entry
+        print_fit(entry)
+
+    if entries and not args.dry_run:
+        update_manifest(audio_dir, entries)
+    resynthesize = [n for n, e in entries.items() if e['status'] == 'resynthesize']
+    if resynthesize:
+        print(f"\n⚠ Beyond {args.max_ratio}× — re-synthesize frame(s): "
+              f"{', '.join(str(n) for n in resynthesize)}")
+    sys.exit(exit_code)
+
+
+def print_fit(entry: Dict, indent: str = '  ') -> None:
+    """One-line summary of a fit result"""
+    if entry['status'] == 'fitted':
+        print(f"{indent}✓ {entry['file']}: {entry['synthesized']:.1f}s → {entry['duration']:.1f}s "
+              f"(target {entry['target']}s, tempo {entry['tempo']:.3f}×"
+              f"{', ' + entry['method'] if entry['method'] else ''})")
+    elif entry['status'] == 'resynthesize':
+        print(f"{indent}⚠ {entry['file']}: {entry['synthesized']:.1f}s vs target {entry['target']}s "
+              f"needs tempo {entry['required_tempo']:.2f}× — re-synthesize")
+    else:
+        print(f"{indent}✓ {entry['file']}: {entry['duration']:.1f}s (target {entry['target']}s) - OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Encode Planning: Content-Adaptive CRF
+
+compile_video.py encodes at a fixed CRF (VIDEO_CRF), which spends more bits
+than needed on plain white slides and can be borderline on dense ones. The
+planner picks the CRF per video from measured quality instead:
+
+1. Sample up to MAX_SAMPLES distinct frame images (spread over the lecture)
+2. Trial-encode a short still clip of each at a candidate CRF, with the same
+   scaling and encoder settings as the real render
+3. Score each clip against the lossless scaled source (SSIM, or VMAF when
+   FFmpeg has libvmaf)
+4. Binary-search for the highest CRF at which every sample meets the target
+
+The chosen CRF, every probe's worst score and the projected file size are
+written to .build/encode_plan.json. compile_video.py uses the plan whenever
+its frame images still match; a changed image makes it fall back to
+VIDEO_CRF until the video is planned again.
+
+Burned-in subtitles are not part of the samples; their white-on-black text
+is no harder to encode than the slides' own line art.
+
+Usage:
+    python3 encode_planner.py Week-1/Video-1                  # Plan and print
+    python3 encode_planner.py Week-1/Video-1 --metric vmaf --target 95
+    python3 encode_planner.py Week-1/Video-1 --show           # Print the saved plan
+    python3 compile_video.py Week-1/Video-1 --adaptive-crf    # Plan (if needed) and build
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import math
+import shutil
+import argparse
+import tempfile
+import contextlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from atomic_io import write_json_atomic
+from content_store import file_digest
+
+
+PLAN_FILENAME = 'encode_plan.json'
+PLAN_VERSION = 1
+METRIC = 'ssim'               # 'ssim' (always available) or 'vmaf' (needs libvmaf)
+TARGETS = {
+    'ssim': 0.995,            # ~23 dB; text and line art stay crisp
+    'vmaf': 94.0,             # Around the usual "visually transparent" range (93-95)
+}
+MIN_CRF = 18
+MAX_CRF = 34
+MAX_SAMPLES = 16
+SAMPLE_FRAMES = 10            # Video frames per trial clip (stills: the keyframe dominates)
+KEYINT = 250                  # x264's default GOP length, used for size projection
+PLAN_JOBS = max(1, (os.cpu_count() or 2) // 2)
+
+SCORE_PATTERNS = {
+    'ssim': re.compile(r'SSIM .*All:([0-9.]+)'),
+    'vmaf': re.compile(r'VMAF score: ([0-9.]+)'),
+}
+
+
+class EncodePlanError(Exception):
+    """A trial encode or quality measurement failed"""
+    pass
+
+
+@lru_cache(maxsize=1)
+def has_vmaf() -> bool:
+    """True if the FFmpeg on PATH was built with libvmaf"""
+    try:
+        result = subprocess.run(['ffmpeg', '-hide_banner', '-filters'],
+                                capture_output=True, text=True)
+    except OSError:
+        return False
+    return any(line.split()[1:2] == ['libvmaf'] for line in result.stdout.splitlines())
+
+
+def scale_filter() -> str:
+    from compile_video import VIDEO_WIDTH, VIDEO_HEIGHT, VIDEO_FPS
+    return f"scale={VIDEO_WIDTH}:{VIDEO_HEIGHT}:flags=lanczos,fps={VIDEO_FPS}"
+
+
+def plan_settings() -> Dict:
+    """Render settings a plan is only valid for"""
+    from compile_video import VIDEO_WIDTH, VIDEO_HEIGHT, VIDEO_FPS, VIDEO_PRESET
+    return {'width': VIDEO_WIDTH, 'height': VIDEO_HEIGHT, 'fps': VIDEO_FPS,
+            'preset': VIDEO_PRESET}
+
+
+def run_ffmpeg(cmd: List[str]) -> str:
+    """Run FFmpeg and return its stderr (where the metric filters log)"""
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except OSError as e:
+        raise EncodePlanError(f"Could not run ffmpeg: {e}")
+    if result.returncode != 0:
+        raise EncodePlanError(f"FFmpeg failed: {result.stderr.strip()[-500:]}")
+    return result.stderr
+
+
+def encode_sample(image_path: str, crf: int, output_path: str) -> int:
+    """Trial-encode a still clip of an image at crf; returns its size in bytes"""
+    from compile_video import VIDEO_FPS, video_encoding_args
+
+    cmd = ['ffmpeg', '-v', 'error', '-nostdin', '-y',
+           '-loop', '1', '-framerate', str(VIDEO_FPS), '-i', image_path,
+           '-vf', scale_filter(), '-frames:v', str(SAMPLE_FRAMES), '-an']
+    cmd.extend(video_encoding_args(crf))
+    cmd.append(output_path)
+    run_ffmpeg(cmd)
+    return os.path.getsize(output_path)
+
+
+def measure_quality(sample_path: str, image_path: str, metric: str) -> float:
+    """Score a trial clip against the scaled source (mean over its frames)"""
+    from compile_video import VIDEO_FPS
+
+    measure = 'ssim' if metric == 'ssim' else f"libvmaf=n_threads={PLAN_JOBS}"
+    graph = (f"[1:v]{scale_filter()},format=yuv420p[ref];"
+             f"[0:v]format=yuv420p[enc];[enc][ref]{measure}")
+    cmd = ['ffmpeg', '-hide_banner', '-nostats', '-nostdin',
+           '-i', sample_path,
+           '-loop', '1', '-framerate', str(VIDEO_FPS), '-i', image_path,
+           '-lavfi', graph, '-frames:v', str(SAMPLE_FRAMES), '-f', 'null', '-']
+    match = SCORE_PATTERNS[metric].search(run_ffmpeg(cmd))
+    if not match:
+        raise EncodePlanError(f"No {metric.upper()} score for {os.path.basename(image_path)}")
+    return float(match.group(1))
+
+
+def pick_samples(frames: List, max_samples: int = MAX_SAMPLES) -> List:
+    """Frames with distinct images, evenly spread when there are too many"""
+    distinct = {}
+    for frame in frames:
+        distinct.setdefault(file_digest(frame.image_path), frame)
+    unique = list(distinct.values())
+    if len(unique) <= max_samples:
+        return unique
+    step = len(unique) / max_samples
+    return [unique[int(i * step)] for i in range(max_samples)]
+
+
+def search_crf(probe, target: float, low: int = MIN_CRF, high: int = MAX_CRF) -> Optional[int]:
+    """
+    Highest CRF in [low, high] whose probe(crf) score meets target
+
+    Quality falls as CRF rises, so a binary search over the default range
+    needs 4-5 probes. Returns None if even low misses the target.
+    """
+    best = None
+    while low <= high:
+        crf = (low + high) // 2
+        if probe(crf) >= target:
+            best = crf
+            low = crf + 1
+        else:
+            high = crf - 1
+    return best
+
+
+def audio_bytes_per_second() -> float:
+    from compile_video import audio_encoding_args
+    args = audio_encoding_args()
+    return int(args[args.index('-b:a') + 1].rstrip('k')) * 1000 / 8
+
+
+def project_video_size(frames: List, sample_bytes: Dict[str, int]) -> int:
+    """
+    Projected size of the video stream from trial-encode sizes
+
+    A still frame costs about one keyframe per GOP, so each frame is its
+    sample size times the GOPs in its duration (frames that were not
+    sampled use the average sample). Fades and subtitles are not sampled,
+    so this is an estimate, best used to compare CRFs.
+    """
+    from compile_video import VIDEO_FPS
+
+    average = sum(sample_bytes.values()) / len(sample_bytes)
+    total = 0.0
+    for frame in frames:
+        gops = max(1, math.ceil(frame.actual_audio_duration * VIDEO_FPS / KEYINT))
+        total += sample_bytes.get(file_digest(frame.image_path), average) * gops
+    return int(total)
+
+
+def plan_encode(video_folder: str, frames: List, metric: str = METRIC,
+                target: Optional[float] = None, jobs: int = PLAN_JOBS) -> Dict:
+    """
+    Find the highest CRF meeting the quality target and save the plan
+
+    frames are compile_video FrameData with image paths and measured audio
+    durations (validate_input_files). Returns the plan.
+    """
+    from compile_video import VIDEO_CRF
+
+    if metric == 'vmaf' and not has_vmaf():
+        raise EncodePlanError("FFmpeg was built without libvmaf; use --metric ssim")
+    target = TARGETS[metric] if target is None else target
+    samples = pick_samples(frames)
+    probes: Dict[int, Dict] = {}
+    work_dir = tempfile.mkdtemp(prefix='encode-plan-')
+
+    def trial(frame, crf: int) -> Tuple[float, int]:
+        clip = os.path.join(work_dir, f"frame_{frame.number}_crf{crf}.mp4")
+        size = encode_sample(frame.image_path, crf, clip)
+        score = measure_quality(clip, frame.image_path, metric)
+        os.remove(clip)
+        return score, size
+
+    def probe(crf: int) -> float:
+        if crf not in probes:
+            results = list(pool.map(lambda frame: trial(frame, crf), samples))
+            worst = min(range(len(samples)), key=lambda i: results[i][0])
+            sizes = {file_digest(frame.image_path): size
+                     for frame, (_, size) in zip(samples, results)}
+            probes[crf] = {
+                'score': round(results[worst][0], 5),
+                'worst_frame': samples[worst].number,
+                'video_bytes': project_video_size(frames, sizes),
+            }
+            print(f"      CRF {crf}: worst {metric.upper()} {results[worst][0]:.4f} "
+                  f"(frame {samples[worst].number})")
+        return probes[crf]['score']
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            crf = search_crf(probe, target)
+            if crf is None:
+                print(f"      ⚠ No CRF reaches {metric.upper()} {target}; using CRF {MIN_CRF}")
+                crf = MIN_CRF
+            probe(VIDEO_CRF)  # Baseline for the size comparison
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    plan = {
+        'version': PLAN_VERSION,
+        'crf': crf,
+        'metric': metric,
+        'target': target,
+        'score': probes[crf]['score'],
+        'video_bytes': probes[crf]['video_bytes'],
+        'default_crf': VIDEO_CRF,
+        'default_video_bytes': probes[VIDEO_CRF]['video_bytes'],
+        'audio_bytes': int(sum(frame.actual_audio_duration for frame in frames)
+                           * audio_bytes_per_second()),
+        'samples': [frame.number for frame in samples],
+        'probes': {str(c): probes[c] for c in sorted(probes)},
+        'settings': plan_settings(),
+        'frames': {str(frame.number): file_digest(frame.image_path) for frame in frames},
+    }
+    plan_path = os.path.join(video_folder, '.build', PLAN_FILENAME)
+    os.makedirs(os.path.dirname(plan_path), exist_ok=True)
+    write_json_atomic(plan_path, plan, indent=1)
+    return plan
+
+
+def load_plan(video_folder: str) -> Dict:
+    try:
+        with open(os.path.join(video_folder, '.build', PLAN_FILENAME), 'r', encoding='utf-8') as f:
+            plan = json.load(f)
+        if plan.get('version') == PLAN_VERSION:
+            return plan
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def planned_crf(video_folder: str, frames: List) -> Optional[int]:
+    """The plan's CRF if it was made for these frame images and settings, else None"""
+    plan = load_plan(video_folder)
+    if not plan or plan.get('settings') != plan_settings():
+        return None
+    current = {str(frame.number): file_digest(frame.image_path) for frame in frames}
+    return plan['crf'] if plan.get('frames') == current else None
+
+
+def format_size(size: float) -> str:
+    return f"{size / 1e6:.1f} MB"
+
+
+def describe_plan(plan: Dict) -> str:
+    """One-line summary: CRF, target and projected sizes against the default CRF"""
+    change = plan['video_bytes'] / plan['default_video_bytes'] - 1
+    return (f"CRF {plan['crf']} ({plan['metric'].upper()} {plan['score']} ≥ {plan['target']}), "
+            f"video {format_size(plan['video_bytes'])} vs "
+            f"{format_size(plan['default_video_bytes'])} at CRF {plan['default_crf']} "
+            f"({change:+.0%}), projected file {format_size(plan['video_bytes'] + plan['audio_bytes'])}")
+
+
+def main():
+    """Plan a video's CRF from trial encodes"""
+    import compile_video
+
+    parser = argparse.ArgumentParser(description="Pick the highest CRF that meets a quality target")
+    parser.add_argument('video_folder', help="Video folder with script.md, frames/ and audio/")
+    parser.add_argument('--metric', choices=sorted(TARGETS), default=METRIC,
+                        help=f"Quality metric (default {METRIC})")
+    parser.add_argument('--target', type=float,
+                        help=f"Minimum score per sample (default: {TARGETS})")
+    parser.add_argument('--jobs', type=int, default=PLAN_JOBS,
+                        help=f"Parallel trial encodes (default {PLAN_JOBS})")
+    parser.add_argument('--show', action='store_true', help="Print the saved plan and exit")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.video_folder):
+        print(f"Error: Folder not found: {args.video_folder}")
+        sys.exit(1)
+
+    if args.show:
+        plan = load_plan(args.video_folder)
+        if not plan:
+            print("No encode plan saved")
+            sys.exit(1)
+        print(f"✓ {describe_plan(plan)}")
+        for crf, probe in plan['probes'].items():
+            print(f"  CRF {crf:>2}: {probe['score']:.4f} worst (frame {probe['worst_frame']}), "
+                  f"video {format_size(probe['video_bytes'])}")
+        return
+
+    if shutil.which('ffmpeg') is None:
+        print("Error: ffmpeg must be on PATH")
+        sys.exit(1)
+
+    try:
+        frames = compile_video.parse_script(os.path.join(args.video_folder, 'script.md'))
+        with contextlib.redirect_stdout(io.StringIO()):
+            compile_video.validate_input_files(args.video_folder, frames)
+        print(f"Planning {len(frames)} frames ({args.metric.upper()}, "
+              f"{min(len(frames), MAX_SAMPLES)} samples max)")
+        plan = plan_encode(args.video_folder, frames, args.metric, args.target, args.jobs)
+    except (OSError, compile_video.VideoCompilationError, EncodePlanError) as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+    print(f"\n✓ {describe_plan(plan)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+File Watcher for Live Rebuilds
+
+Reports which files under a video folder changed, with a debounce so a
+burst of saves (an editor writing a backup then the file, a TTS run
+regenerating twelve MP3s) turns into one change set.
+
+Uses Linux inotify directly through ctypes, so there is no dependency and
+no CPU spent while nothing changes. On other platforms, or if inotify is
+unavailable (e.g. the watch limit is exhausted), it falls back to polling
+file sizes and mtimes.
+
+Used by `compile_video.py --watch`.
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+
+POLL_INTERVAL = 0.5       # Seconds between scans in polling mode
+DEBOUNCE_SECONDS = 1.0    # Quiet period that ends a burst of changes
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+class _Inotify:
+    """Minimal inotify wrapper; raises OSError if inotify is unavailable"""
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, "inotify is Linux-only")
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+    def add_watch(self, path: str) -> int:
+        import ctypes
+
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), path)
+        return wd
+
+    def read_events(self, timeout: float) -> Iterable[Tuple[int, int, str]]:
+        """(wd, mask, name) for every event available within timeout"""
+        readable, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'replace')
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """
+    Watch a folder and some of its subfolders for changes to selected files
+
+    Paths are reported relative to root with '/' separators (e.g.
+    'frames/frame_3.png'); accept(rel_path) decides which files matter.
+    Subfolders that do not exist yet are picked up when they are created.
+    """
+
+    def __init__(self, root: str, subdirs: Iterable[str], accept: Callable[[str], bool],
+                 poll_interval: float = POLL_INTERVAL):
+        self.root = os.path.abspath(root)
+        self.subdirs = tuple(subdirs)
+        self.accept = accept
+        self.poll_interval = poll_interval
+        self._watches: Dict[int, str] = {}
+        self._snapshot: Dict[str, Tuple[int, int]] = {}
+        try:
+            self._inotify: Optional[_Inotify] = _Inotify()
+            self._watch_dir('')
+            for subdir in self.subdirs:
+                if os.path.isdir(os.path.join(self.root, subdir)):
+                    self._watch_dir(subdir)
+            self.backend = 'inotify'
+        except OSError:
+            if getattr(self, '_inotify', None):
+                self._inotify.close()
+            self._inotify = None
+            self._snapshot = self._scan()
+            self.backend = 'polling'
+
+    def _watch_dir(self, rel_dir: str) -> None:
+        wd = self._inotify.add_watch(os.path.join(self.root, rel_dir))
+        self._watches[wd] = rel_dir
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """size/mtime of every accepted file (polling backend)"""
+        snapshot = {}
+        for rel_dir in ('',) + self.subdirs:
+            folder = os.path.join(self.root, rel_dir)
+            try:
+                entries = list(os.scandir(folder))
+            except OSError:
+                continue
+            for entry in entries:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                if not self.accept(rel_path):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                snapshot[rel_path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def _poll(self, timeout: float) -> Set[str]:
+        """Changed paths seen within timeout (may be empty)"""
+        if self._inotify is None:
+            time.sleep(min(timeout, self.poll_interval))
+            snapshot = self._scan()
+            changed = {path for path in set(snapshot) | set(self._snapshot)
+                       if snapshot.get(path) != self._snapshot.get(path)}
+            self._snapshot = snapshot
+            return changed
+
+        changed = set()
+        for wd, mask, name in self._inotify.read_events(timeout):
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; report everything so nothing is missed
+                changed.update(self._scan())
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            rel_dir = self._watches.get(wd)
+            if rel_dir is None or not name:
+                continue
+            rel_path = f"{rel_dir}/{name}" if rel_dir else name
+            if mask & IN_ISDIR:
+                if rel_dir == '' and name in self.subdirs and mask & (IN_CREATE | IN_MOVED_TO):
+                    self._watch_dir(name)
+                    # Files may have landed before the watch existed
+                    changed.update(path for path in self._scan()
+                                   if path.startswith(name + '/'))
+                continue
+            if self.accept(rel_path):
+                changed.add(rel_path)
+        return changed
+
+    def wait(self, debounce: float = DEBOUNCE_SECONDS) -> Set[str]:
+        """
+        Block until something changes, then until debounce seconds pass quietly
+
+        Returns every path that changed during the burst.
+        """
+        changed: Set[str] = set()
+        while not changed:
+            changed = self._poll(3600.0)
+
+        quiet_until = time.monotonic() + debounce
+        while True:
+            remaining = quiet_until - time.monotonic()
+            if remaining <= 0:
+                return changed
+            more = self._poll(remaining)
+            if more:
+                changed |= more
+                quiet_until = time.monotonic() + debounce
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
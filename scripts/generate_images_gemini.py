@@ -16,21 +16,46 @@ This demonstrates how to:
 """
 
 import os
-import requests
+import sys
+import shutil
+import hashlib
 import json
 import time
-import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
+from image_stream import InlineImageStreamDecoder, ImageSink
+from asset_index import AssetIndex, find_course_root, image_hashes
+from content_store import copy_file_atomic, clone_file_atomic, file_digest
+from optimize_assets import optimize_image
 
-# Load API key from environment
+# Load API key from environment (only required when a prompt is not cached)
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY environment variable not set. Add it to your .env file.")
 
 # Gemini API endpoint for image generation
+# GEMINI_API_BASE can point at a local mock server (see mock_gemini_server.py)
 GEMINI_MODEL = "gemini-2.5-flash-image"
-GEMINI_ENDPOINT = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent"
+GEMINI_API_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta")
+GEMINI_ENDPOINT = f"{GEMINI_API_BASE}/models/{GEMINI_MODEL}:generateContent"
+
+GENERATION_CONFIG = {
+    "temperature": 0.4,
+    "topK": 32,
+    "topP": 1,
+    "maxOutputTokens": 8192
+}
+
+# Concurrency and retry settings
+MAX_PARALLEL_REQUESTS = 4
+MAX_RETRIES = 5
+RETRY_BASE_DELAY = 2.0   # seconds, doubled on each consecutive 429/503
+RETRY_MAX_DELAY = 60.0
+STREAM_CHUNK_SIZE = 64 * 1024  # Response bytes decoded per step
+
+# Persistent cache of generated images, keyed by prompt hash
+IMAGE_CACHE_DIR = Path(os.getenv("GEMINI_IMAGE_CACHE",
+                                 Path.home() / ".cache" / "educational-video-maker" / "gemini"))
 
 # Base style descriptor for all images
 BASE_STYLE = """Hand-drawn illustration in Excalidraw style, black and white line art,
@@ -44,36 +69,57 @@ color, colors, colorful, photorealistic, photograph, realistic lighting,
 3d render, gradient, shadow, shading, texture, complex details,
 gray tones, watercolor, painting style"""
 
-def generate_image_gemini(subject, context_modifier="", num_images=2):
+class AdaptiveBackoff:
     """
-    Generate images using Gemini Imagen API
-
-    Args:
-        subject: What to generate (e.g., "black swan", "dice")
-        context_modifier: Additional context (e.g., "side view", "showing probability")
-        num_images: Number of images to generate
+    Shared pacing for all worker threads
 
-    Returns:
-        List of image data (base64 or URLs)
+    A 429/503 doubles the spacing between request starts (or honours
+    Retry-After); every success halves it again, down to zero. Throttles
+    that arrive together from parallel requests count as one.
     """
-    # Construct full prompt
+    def __init__(self):
+        self.delay = 0.0
+        self.next_start = 0.0
+        self.last_throttle = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.delay
+        if start > now:
+            time.sleep(start - now)
+
+    def throttled(self, retry_after=None):
+        with self.lock:
+            now = time.monotonic()
+            if now - self.last_throttle >= self.delay:
+                self.delay = min(RETRY_MAX_DELAY, max(RETRY_BASE_DELAY, self.delay * 2))
+                self.last_throttle = now
+            if retry_after:
+                self.delay = min(RETRY_MAX_DELAY, max(self.delay, retry_after))
+            self.next_start = max(self.next_start, now + self.delay)
+            return self.delay
+
+    def succeeded(self):
+        with self.lock:
+            self.delay = self.delay / 2 if self.delay > 0.25 else 0.0
+
+
+backoff = AdaptiveBackoff()
+
+
+def build_prompt(subject, context_modifier=""):
+    """Construct the full request text sent to Gemini"""
     full_prompt = f"{BASE_STYLE} {subject}"
     if context_modifier:
         full_prompt += f", {context_modifier}"
 
-    print(f"\nGenerating {num_images} image(s) for: {subject}")
-    print(f"Style: Hand-drawn, black & white, Excalidraw-compatible")
-
-    url = f"{GEMINI_ENDPOINT}?key={GEMINI_API_KEY}"
-
-    headers = {
-        "Content-Type": "application/json"
-    }
-
     # Gemini 2.5 Flash uses generateContent format
     # Request image generation by asking in the prompt
     # Include negative prompt explicitly in the text
-    full_request = f"""Generate an image: {full_prompt}
+    return f"""Generate an image: {full_prompt}
 
 IMPORTANT:
 - Do NOT include any text, labels, annotations, words, letters, or numbers in the image
@@ -82,79 +128,247 @@ IMPORTANT:
 
 Avoid: {NEGATIVE_PROMPT}"""
 
+
+def prompt_cache_key(subject, context_modifier=""):
+    """Hash of everything that determines the generated images"""
+    key_data = json.dumps({
+        'base_style': BASE_STYLE,
+        'subject': subject,
+        'context': context_modifier,
+        'model': GEMINI_MODEL,
+        'generation_config': GENERATION_CONFIG,
+    }, sort_keys=True)
+    return hashlib.sha256(key_data.encode('utf-8')).hexdigest()
+
+
+def load_cached_images(cache_key):
+    """Return cached image records for a prompt, or None on a cache miss"""
+    entry_dir = IMAGE_CACHE_DIR / cache_key[:2] / cache_key
+    meta_path = entry_dir / 'meta.json'
+    if not meta_path.exists():
+        return None
+
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+
+    images = []
+    for item in meta['images']:
+        path = entry_dir / item['file']
+        if not path.exists():
+            return None
+        images.append({
+            'path': path,
+            'mime_type': item['mime_type'],
+            # Entries cached before streaming did not record size/dimensions
+            'size': item.get('size') or path.stat().st_size,
+            'width': item.get('width'),
+            'height': item.get('height'),
+        })
+    return images
+
+
+def new_cache_entry(cache_key):
+    """Create a private temp folder to stream a new cache entry into"""
+    final_dir = IMAGE_CACHE_DIR / cache_key[:2] / cache_key
+    tmp_dir = final_dir.parent / f".{cache_key}.{os.getpid()}.{threading.get_ident()}"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    return tmp_dir
+
+
+def commit_cache_entry(cache_key, tmp_dir, subject, context_modifier, images):
+    """
+    Write metadata for streamed images and move the entry into place
+
+    The entry is renamed into place only once complete, so a crashed run
+    never leaves a half-written cache entry behind. Invalid images are
+    dropped. Returns the cached image records.
+    """
+    final_dir = IMAGE_CACHE_DIR / cache_key[:2] / cache_key
+    meta = {
+        'subject': subject,
+        'context': context_modifier,
+        'model': GEMINI_MODEL,
+        'generation_config': GENERATION_CONFIG,
+        'date': datetime.now().strftime('%Y-%m-%d'),
+        'images': [],
+    }
+    for image in images:
+        filename = os.path.basename(image['path'])
+        if not image['valid']:
+            print(f"  ✗ Discarding {filename}: not a complete PNG")
+            os.remove(image['path'])
+            continue
+        meta['images'].append({
+            'file': filename,
+            'mime_type': image['mime_type'],
+            'size': image['size'],
+            'width': image['width'],
+            'height': image['height'],
+        })
+
+    if not meta['images']:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return []
+
+    with open(tmp_dir / 'meta.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+
+    try:
+        os.rename(tmp_dir, final_dir)
+    except OSError:
+        # Another worker stored the same prompt first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return load_cached_images(cache_key) or []
+
+
+def call_gemini_api(request_text):
+    """
+    POST one generateContent request, retrying 429/503 with adaptive backoff
+
+    Returns the successful response opened with stream=True; the caller
+    reads the body incrementally and must close it.
+    """
+    import requests
+
+    if not GEMINI_API_KEY:
+        raise ValueError("GEMINI_API_KEY environment variable not set. Add it to your .env file.")
+
+    url = f"{GEMINI_ENDPOINT}?key={GEMINI_API_KEY}"
+    headers = {
+        "Content-Type": "application/json"
+    }
     data = {
         "contents": [{
             "parts": [{
-                "text": full_request
+                "text": request_text
             }]
         }],
-        "generationConfig": {
-            "temperature": 0.4,
-            "topK": 32,
-            "topP": 1,
-            "maxOutputTokens": 8192
-        }
+        "generationConfig": GENERATION_CONFIG
     }
 
-    try:
-        print(f"  Calling Gemini API...")
-        response = requests.post(url, headers=headers, json=data, timeout=60)
+    for attempt in range(MAX_RETRIES + 1):
+        backoff.wait()
+        response = requests.post(url, headers=headers, json=data, timeout=60, stream=True)
+
+        if response.status_code in (429, 503) and attempt < MAX_RETRIES:
+            retry_after = response.headers.get('Retry-After')
+            response.close()
+            try:
+                retry_after = float(retry_after) if retry_after else None
+            except ValueError:
+                retry_after = None
+            delay = backoff.throttled(retry_after)
+            print(f"  ⚠ HTTP {response.status_code}, backing off {delay:.1f}s "
+                  f"(retry {attempt + 1}/{MAX_RETRIES})")
+            continue
+
         response.raise_for_status()
-        result = response.json()
+        backoff.succeeded()
+        return response
+
+
+def generate_image_gemini(subject, context_modifier="", num_images=2, use_cache=True):
+    """
+    Generate images using Gemini Imagen API
+
+    The response body is stream-decoded (image_stream.py): each inline
+    base64 image is written to the cache as it arrives and validated as a
+    PNG on the fly, so memory stays constant per image.
+
+    Args:
+        subject: What to generate (e.g., "black swan", "dice")
+        context_modifier: Additional context (e.g., "side view", "showing probability")
+        num_images: Number of images to generate
+        use_cache: Return cached images for an identical prompt without any API call
+
+    Returns:
+        List of image records: {'path': cached PNG path, 'mime_type', 'size', ...}
+    """
+    cache_key = prompt_cache_key(subject, context_modifier)
+    if use_cache:
+        cached = load_cached_images(cache_key)
+        if cached is not None:
+            print(f"\n✓ Cached {len(cached)} image(s) for: {subject}")
+            return cached
 
-        # Extract generated images from candidates
-        candidates = result.get('candidates', [])
+    import requests  # Only needed on a cache miss
 
-        if not candidates:
+    print(f"\nGenerating {num_images} image(s) for: {subject}")
+    print(f"Style: Hand-drawn, black & white, Excalidraw-compatible")
+
+    tmp_dir = None
+    try:
+        print(f"  Calling Gemini API...")
+        response = call_gemini_api(build_prompt(subject, context_modifier))
+
+        # Decode inline images straight into a new cache entry
+        tmp_dir = new_cache_entry(cache_key)
+        decoder = InlineImageStreamDecoder(
+            lambda index: ImageSink(str(tmp_dir / f"image_{index + 1:02d}.png")))
+        try:
+            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                decoder.feed(chunk)
+        finally:
+            response.close()
+        images = decoder.close()
+
+        if not images:
             print(f"  ✗ No images generated")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
             return []
 
-        generated_images = []
-        for candidate in candidates:
-            content = candidate.get('content', {})
-            parts = content.get('parts', [])
-
-            for part in parts:
-                # Check for inline_data (images are returned as inline_data)
-                if 'inline_data' in part or 'inlineData' in part:
-                    inline = part.get('inline_data') or part.get('inlineData')
-                    if inline and 'data' in inline:
-                        generated_images.append({
-                            'data': inline['data'],
-                            'format': 'base64',
-                            'mime_type': inline.get('mime_type', 'image/png')
-                        })
-
-        print(f"  ✓ Generated {len(generated_images)} image(s)")
+        generated_images = commit_cache_entry(cache_key, tmp_dir, subject,
+                                              context_modifier, images)
+        print(f"  ✓ Generated {len(generated_images)} image(s) for: {subject}")
         return generated_images
 
     except requests.exceptions.RequestException as e:
         print(f"  ✗ Error calling Gemini API: {e}")
         if hasattr(e, 'response') and e.response is not None:
             print(f"  Response: {e.response.text}")
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
         return []
     except Exception as e:
         print(f"  ✗ Unexpected error: {e}")
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
         return []
 
-def save_image(image_data, filename, assets_folder):
-    """Save base64 image data to file"""
-    try:
-        filepath = assets_folder / filename
 
-        # Decode base64 and save
-        image_bytes = base64.b64decode(image_data['data'])
+def generate_images_concurrently(images_to_generate, max_workers=MAX_PARALLEL_REQUESTS,
+                                 use_cache=True):
+    """
+    Generate every configured subject with bounded parallelism
+
+    Returns a list of (img_config, generated_images) in input order.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(generate_image_gemini, cfg['subject'], cfg['context'],
+                        cfg['num'], use_cache)
+            for cfg in images_to_generate
+        ]
+        return [(cfg, future.result()) for cfg, future in zip(images_to_generate, futures)]
 
-        with open(filepath, 'wb') as f:
-            f.write(image_bytes)
 
-        # Verify file was saved
-        if os.path.getsize(filepath) > 0:
-            size_kb = os.path.getsize(filepath) / 1024
-            return True, size_kb
-        else:
-            os.remove(filepath)
-            return False, 0
+def save_image(image_data, filename, assets_folder):
+    """
+    Copy a generated image from the cache into the assets folder
+
+    The image was already validated as a complete PNG while streaming; the
+    copy is then fitted to the video canvas by optimize_assets.py.
+    """
+    filepath = assets_folder / filename
+    try:
+        copy_file_atomic(image_data['path'], filepath)
+
+        # Scale down to the video canvas and reduce line art to a grey palette
+        result = optimize_image(str(filepath), letterbox=False)
+        if result['error']:
+            print(f"(not optimized: {result['error']})", end=' ')
+        return True, result['after'] / 1024
 
     except Exception as e:
         print(f"  Error saving {filename}: {e}")
@@ -162,6 +376,27 @@ def save_image(image_data, filename, assets_folder):
             os.remove(filepath)
         return False, 0
 
+def reuse_asset(index, rel_path, assets_folder, prompt_key=None):
+    """
+    Make an indexed course asset available in this video's assets folder
+
+    The file is reflinked (or copied) under its own name, unless this
+    folder already has the same content. Returns (path in this folder,
+    True if it was added).
+    """
+    source = index.root / rel_path
+    dest = assets_folder / source.name
+    if dest.exists():
+        if os.path.samefile(source, dest) or file_digest(str(source)) == file_digest(str(dest)):
+            index.add(str(dest), prompt_key)
+            return dest, False
+        # A different image already has this name here
+        dest = assets_folder / f"{source.stem}_{source.parent.parent.name.lower()}{source.suffix}"
+
+    clone_file_atomic(str(source), str(dest))
+    index.add(str(dest), prompt_key)
+    return dest, True
+
 def clean_filename(subject):
     """Convert subject to clean filename"""
     filename = subject.lower()
@@ -192,7 +427,7 @@ def create_attribution_entry(filename, subject, prompt, generation_date):
 def main():
     """Test generation of black swan and dice images"""
 
-    video_folder = '/path/to/your/course/Week-1/Video-1'
+    video_folder = sys.argv[1] if len(sys.argv) > 1 else '/path/to/your/course/Week-1/Video-1'
     assets_folder = Path(video_folder) / 'assets'
     assets_folder.mkdir(parents=True, exist_ok=True)
 
@@ -217,28 +452,75 @@ def main():
         }
     ]
 
+    # Index every asset in the course so duplicates are caught before any
+    # API call or disk write (hashes are cached by mtime in .asset_index.json)
+    index = AssetIndex(find_course_root(video_folder))
+    index.refresh()
+
+    def reuse(rel_path, subject, context, prompt_key):
+        dest, added = reuse_asset(index, rel_path, assets_folder, prompt_key)
+        if not added:
+            print(f"already in this video as {dest.name}")
+            return
+        print(f"✓ linked as {dest.name}")
+        all_attributions.append({
+            'filename': dest.name,
+            'subject': subject,
+            'prompt': f"{BASE_STYLE} {subject}, {context}"[:100] + "...",
+            'date': datetime.now().strftime('%Y-%m-%d')
+        })
+
+    # Subjects the index already holds images for (recorded by prompt when
+    # they were saved) are linked into this video without an API call
+    pending = []
     for img_config in images_to_generate:
+        prompt_key = prompt_cache_key(img_config['subject'], img_config['context'])
+        existing = index.find_prompt(prompt_key)
+        if not existing:
+            pending.append(img_config)
+            continue
+        # One path per distinct image (videos that reused it hold links)
+        distinct = {}
+        for rel_path in existing:
+            distinct.setdefault(file_digest(str(index.root / rel_path)), rel_path)
+        for rel_path in distinct.values():
+            print(f"ℹ {img_config['subject']}: course already has {rel_path},", end=' ')
+            reuse(rel_path, img_config['subject'], img_config['context'], prompt_key)
+
+    # Generate all subjects in parallel (cached prompts never hit the API)
+    results = generate_images_concurrently(pending)
+
+    for img_config, generated_images in results:
         subject = img_config['subject']
         context = img_config['context']
-        num_images = img_config['num']
-
-        # Generate images
-        generated_images = generate_image_gemini(subject, context, num_images)
 
         if not generated_images:
             print(f"  ⚠ No images generated for {subject}, skipping...")
             continue
 
         # Save images
+        prompt_key = prompt_cache_key(subject, context)
         clean_name = clean_filename(subject)
         for i, img_data in enumerate(generated_images, 1):
             filename = f"{clean_name}_ai_{i:02d}.png"
 
+            # Link near-identical images the course already has instead of
+            # writing another variant
+            try:
+                similar = index.find_similar(image_hashes(str(img_data['path'])))
+            except OSError:
+                similar = []
+            if similar:
+                print(f"  ℹ {filename}: similar to {similar[0][1]},", end=' ')
+                reuse(similar[0][1], subject, context, prompt_key)
+                continue
+
             print(f"  Saving {filename}...", end=' ')
             success, size_kb = save_image(img_data, filename, assets_folder)
 
             if success:
                 print(f"✓ ({size_kb:.0f} KB)")
+                index.add(str(assets_folder / filename), prompt_key)
 
                 # Create attribution info
                 full_prompt = f"{BASE_STYLE} {subject}, {context}"
@@ -252,11 +534,11 @@ def main():
             else:
                 print("✗ Failed")
 
-        time.sleep(2)  # Rate limiting
+    index.save()
 
     # Print summary
     print("\n" + "=" * 70)
-    print(f"✓ Successfully generated {len(all_attributions)} AI images")
+    print(f"✓ {len(all_attributions)} AI images added to this video")
     print(f"Images saved to: {assets_folder}")
     print("=" * 70)
 
@@ -6,20 +6,25 @@ Generates individual MP3 files for each frame using Murf API
 
 import os
 import sys
-import re
 import time
-import requests
 import json
+import shutil
+import hashlib
+import argparse
 from pathlib import Path
-from dotenv import load_dotenv
-from mutagen.mp3 import MP3
-
-# Load environment variables
+from script_parser import iter_frames, clean_narration_text, ScriptParseError
+from content_store import write_file_atomic, file_digest
+from audio_decode import AudioDecodeError
+from duration_fit import (fit_frame_audio, update_manifest, DurationFitError,
+                          DURATION_TOLERANCE, MAX_STRETCH_RATIO)
+from tts_batch import plan_batches, synthesize_batch, batch_label
+from atomic_io import Journal, remove_stale_partials
+
+# Environment file (loaded on first use by load_api_key)
 env_path = Path(__file__).parent.parent.parent.parent / '.env'
-load_dotenv(env_path)
 
 # API Configuration
-MURF_API_KEY = os.getenv('MURF_API_KEY')
+MURF_API_KEY = None  # Set by load_api_key()
 MURF_API_ENDPOINT = "https://api.murf.ai/v1/speech/generate"
 VOICE_ID = "en-AU-leyton"  # Australian male, professional (supports Narration style)
 VOICE_STYLE = "Narration"  # Professional narration for educational content
@@ -27,10 +32,31 @@ SPEAKING_RATE = -15        # Slower rate (-50 to 50, negative is slower)
 OUTPUT_FORMAT = "MP3"
 SAMPLE_RATE = 44100
 
+# Murf rate change per 1% of speed (rate 0 = normal); used to pick a
+# re-synthesis rate when a frame is too far off to time-stretch
+RATE_PER_PERCENT = 1.0
+MIN_RATE, MAX_RATE = -50, 50
+
 # Retry settings
 MAX_RETRIES = 3
 RETRY_DELAY = 2  # seconds
 
+def load_api_key():
+    """
+    Read MURF_API_KEY, loading .env the first time it is needed
+
+    dotenv and requests are imported lazily so usage errors, script parse
+    errors and other early exits start instantly.
+    """
+    global MURF_API_KEY
+    if MURF_API_KEY is None:
+        if 'MURF_API_KEY' not in os.environ:
+            from dotenv import load_dotenv
+            load_dotenv(env_path)
+        MURF_API_KEY = os.getenv('MURF_API_KEY')
+    return MURF_API_KEY
+
+
 class Frame:
     """Represents a single frame with narration"""
     def __init__(self, number, start_time, end_time, word_count, text):
@@ -63,64 +89,41 @@ def parse_script(script_path):
     ## Frame X (MM:SS-MM:SS) • NN words
 
     [narration text]
+
+    Parsing is shared with compile_video.py (see script_parser.py).
     """
     frames = []
+    issues = []
 
-    if not os.path.exists(script_path):
-        raise FileNotFoundError(f"Script file not found: {script_path}")
-
-    with open(script_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    # Pattern to match frame headers
-    # ## Frame 0 (0:00-0:15) • 38 words
-    pattern = r'## Frame (\d+) \((\d+:\d+)-(\d+:\d+)\) • (\d+) words\n\n(.*?)(?=\n## |\Z)'
-
-    matches = re.finditer(pattern, content, re.DOTALL)
-
-    for match in matches:
-        frame_num = int(match.group(1))
-        start_time = match.group(2)
-        end_time = match.group(3)
-        word_count = int(match.group(4))
-        text = match.group(5).strip()
-
+    for record in iter_frames(script_path, issues=issues):
         # Clean the text - remove markdown formatting
-        text = clean_narration_text(text)
+        text = clean_narration_text(record.narration)
 
-        frame = Frame(frame_num, start_time, end_time, word_count, text)
+        frame = Frame(record.number, record.start_label, record.end_label,
+                      record.words, text)
         frames.append(frame)
 
-    return frames
-
-
-def clean_narration_text(text):
-    """Remove markdown formatting and clean narration text"""
-    # Remove markdown bold/italic
-    text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)
-    text = re.sub(r'\*(.+?)\*', r'\1', text)
-
-    # Remove markdown links [text](url)
-    text = re.sub(r'\[(.+?)\]\(.+?\)', r'\1', text)
-
-    # Remove excess whitespace
-    text = ' '.join(text.split())
+    for issue in issues:
+        print(f"⚠ {issue}")
 
-    return text
+    return frames
 
 
-def call_murf_api(text, retry_count=0):
+def call_murf_api(text, retry_count=0, rate=None):
     """
-    Call Murf API to generate audio from text
+    Call Murf API to generate audio from text (at SPEAKING_RATE unless rate is given)
 
     Returns:
         bytes: Audio file content
     """
-    if not MURF_API_KEY:
+    import requests
+
+    api_key = load_api_key()
+    if not api_key:
         raise ValueError("MURF_API_KEY not found in environment variables")
 
     headers = {
-        'api-key': MURF_API_KEY,
+        'api-key': api_key,
         'Content-Type': 'application/json'
     }
 
@@ -128,7 +131,7 @@ def call_murf_api(text, retry_count=0):
         'text': text,
         'voiceId': VOICE_ID,
         'style': VOICE_STYLE,
-        'rate': SPEAKING_RATE,
+        'rate': SPEAKING_RATE if rate is None else rate,
         'format': OUTPUT_FORMAT,
         'sampleRate': SAMPLE_RATE,
         'modelVersion': 'GEN2'
@@ -159,7 +162,7 @@ def call_murf_api(text, retry_count=0):
                 wait_time = RETRY_DELAY * (2 ** retry_count)
                 print(f"  Rate limited. Waiting {wait_time}s before retry...")
                 time.sleep(wait_time)
-                return call_murf_api(text, retry_count + 1)
+                return call_murf_api(text, retry_count + 1, rate)
             else:
                 raise Exception(f"Rate limit exceeded after {MAX_RETRIES} retries")
 
@@ -170,7 +173,7 @@ def call_murf_api(text, retry_count=0):
         if retry_count < MAX_RETRIES:
             print(f"  Request failed. Retrying ({retry_count + 1}/{MAX_RETRIES})...")
             time.sleep(RETRY_DELAY)
-            return call_murf_api(text, retry_count + 1)
+            return call_murf_api(text, retry_count + 1, rate)
         else:
             raise Exception(f"Failed after {MAX_RETRIES} retries: {str(e)}")
 
@@ -178,6 +181,7 @@ def call_murf_api(text, retry_count=0):
 def get_audio_duration(file_path):
     """Get duration of MP3 file in seconds"""
     try:
+        from mutagen.mp3 import MP3
         audio = MP3(file_path)
         return audio.info.length
     except Exception as e:
@@ -185,18 +189,111 @@ def get_audio_duration(file_path):
         return None
 
 
-def generate_audio_for_frames(frames, output_dir):
+def rate_for_tempo(rate, tempo):
+    """Murf rate expected to speed speech up by tempo (<1 slows it down)"""
+    adjusted = rate + (tempo - 1) * 100 * RATE_PER_PERCENT
+    return int(round(min(MAX_RATE, max(MIN_RATE, adjusted))))
+
+
+def fit_duration(frame, video_folder, max_ratio, rate=SPEAKING_RATE, resynthesize=True):
+    """
+    Time-stretch a frame's audio to its target, re-synthesizing once if needed
+
+    Deviations up to max_ratio are stretched locally (duration_fit.py);
+    beyond that Murf is called again at an adjusted rate and whatever
+    remains is stretched. Returns the manifest entry.
+    """
+    entry = fit_frame_audio(video_folder, frame.number, frame.duration, max_ratio)
+    entry['rate'] = rate
+    if entry['status'] != 'resynthesize' or not resynthesize:
+        return entry
+
+    new_rate = rate_for_tempo(rate, entry['required_tempo'])
+    if new_rate == rate:
+        return entry
+    print(f"  {entry['synthesized']:.1f}s is beyond {max_ratio}× of the target - "
+          f"re-synthesizing at rate {new_rate}")
+    output_path = os.path.join(video_folder, 'audio', entry['file'])
+    write_file_atomic(output_path, call_murf_api(frame.text, rate=new_rate))
+    return fit_duration(frame, video_folder, max_ratio, new_rate, resynthesize=False)
+
+
+def synthesis_key(frame):
+    """Hash of everything Murf's audio for a frame depends on (journal key)"""
+    settings = [frame.text, VOICE_ID, VOICE_STYLE, SPEAKING_RATE, OUTPUT_FORMAT, SAMPLE_RATE]
+    return hashlib.sha256(json.dumps(settings).encode('utf-8')).hexdigest()
+
+
+def synthesize_batches(frames, output_dir, journal):
+    """
+    Synthesize runs of short frames with one Murf request each (tts_batch.py)
+
+    Returns {frame number: batch label} for frames whose audio was written;
+    frames of a batch that fails verification are left for the per-frame loop.
+    """
+    batched = {}
+    batches = [batch for batch in plan_batches(frames) if len(batch) > 1]
+    for batch in batches:
+        label = batch_label(batch)
+        print(f"\nSynthesizing frames {label} in one request ({len(batch)} frames)...")
+        try:
+            bounds = synthesize_batch(batch, output_dir, call_murf_api)
+        except Exception as e:
+            print(f"  ⚠ Batch not used ({e}) - synthesizing these frames separately")
+            continue
+        for frame in batch:
+            start, end = bounds[frame.number]
+            print(f"  ✓ frame_{frame.number}.mp3: {start:.2f}s-{end:.2f}s of the batch")
+            batched[frame.number] = label
+            output_path = os.path.join(output_dir, f"frame_{frame.number}.mp3")
+            journal.record('tts', f"frame_{frame.number}", synthesis_key(frame), output_path)
+        time.sleep(1)
+    return batched
+
+
+def generate_audio_for_frames(frames, output_dir, fit=True, max_ratio=MAX_STRETCH_RATIO,
+                              batch=False, force=False):
     """
     Generate audio files for all frames
 
+    With fit, frames off target by more than DURATION_TOLERANCE are
+    time-stretched (or re-synthesized) and audio/manifest.json is updated.
+    With batch, consecutive short frames share one Murf request.
+
+    Every finished frame is recorded in the video's build journal
+    (atomic_io.py), so a re-run (e.g. after a crash at frame 30 of 40) only
+    synthesizes frames that are missing or whose narration or voice settings
+    changed. force regenerates everything.
+
     Returns:
         list: Report entries for each frame
     """
     results = []
+    manifest_entries = {}
+    video_folder = os.path.dirname(os.path.abspath(output_dir))
+    if fit and shutil.which('ffmpeg') is None:
+        print("⚠ ffmpeg not found - durations will not be fitted")
+        fit = False
+
+    if batch and shutil.which('ffmpeg') is None:
+        print("⚠ ffmpeg not found - frames will not be batched")
+        batch = False
 
     # Create audio directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
 
+    remove_stale_partials(output_dir)
+    journal = Journal(video_folder)
+    if force:
+        journal.clear('tts')
+    done = {frame.number for frame in frames
+            if journal.is_done('tts', f"frame_{frame.number}", synthesis_key(frame),
+                               os.path.join(output_dir, f"frame_{frame.number}.mp3"))}
+    if done:
+        print(f"\nResuming: {len(done)} of {len(frames)} frame(s) already generated")
+    pending = [frame for frame in frames if frame.number not in done]
+    batched = synthesize_batches(pending, output_dir, journal) if batch else {}
+
     for frame in frames:
         frame_filename = f"frame_{frame.number}.mp3"
         output_path = os.path.join(output_dir, frame_filename)
@@ -207,17 +304,45 @@ def generate_audio_for_frames(frames, output_dir):
         print(f"  Text preview: {frame.text[:60]}...")
 
         try:
-            # Generate audio
-            audio_data = call_murf_api(frame.text)
+            if frame.number in done:
+                print(f"  ✓ Already generated")
+            elif frame.number in batched:
+                print(f"  ✓ From batch {batched[frame.number]}")
+            else:
+                # Generate audio
+                audio_data = call_murf_api(frame.text)
 
-            # Save to file
-            with open(output_path, 'wb') as f:
-                f.write(audio_data)
+                # Save to file
+                # Replace rather than overwrite: the file may be a hard link into
+                # the course content store
+                write_file_atomic(output_path, audio_data)
 
-            print(f"  ✓ Saved to {frame_filename}")
+                print(f"  ✓ Saved to {frame_filename}")
 
             # Verify duration
             actual_duration = get_audio_duration(output_path)
+            fitted = None
+
+            if actual_duration and fit and abs(actual_duration - frame.duration) > DURATION_TOLERANCE:
+                try:
+                    fitted = fit_duration(frame, video_folder, max_ratio,
+                                          resynthesize=frame.number not in done)
+                    manifest_entries[frame.number] = fitted
+                    if fitted['status'] == 'fitted':
+                        print(f"  Stretched {fitted['synthesized']:.1f}s → {fitted['duration']:.1f}s "
+                              f"(tempo {fitted['tempo']:.3f}×, {fitted['method']})")
+                    actual_duration = fitted['duration']
+                except (AudioDecodeError, DurationFitError) as e:
+                    print(f"  ⚠ Could not fit duration: {e}")
+            elif actual_duration and frame.number not in done:
+                manifest_entries[frame.number] = {
+                    'file': frame_filename, 'target': frame.duration,
+                    'synthesized': round(actual_duration, 3), 'duration': round(actual_duration, 3),
+                    'tempo': 1.0, 'method': None, 'status': 'ok', 'rate': SPEAKING_RATE,
+                    'sha256': file_digest(output_path),
+                }
+            if frame.number in manifest_entries and frame.number in batched:
+                manifest_entries[frame.number]['batch'] = batched[frame.number]
 
             if actual_duration:
                 difference = actual_duration - frame.duration
@@ -230,17 +355,20 @@ def generate_audio_for_frames(frames, output_dir):
                     'difference': difference,
                     'status': 'success'
                 }
+                if fitted and fitted['status'] == 'fitted':
+                    result['fitted'] = fitted
 
                 # Check if timing is acceptable (within 2 seconds)
-                if abs(difference) > 2:
+                if abs(difference) > DURATION_TOLERANCE:
                     result['warning'] = True
-                    suggested_speed = SPEAKING_RATE * (actual_duration / frame.duration)
-                    result['suggested_speed'] = round(suggested_speed, 2)
+                    rate = fitted['rate'] if fitted else SPEAKING_RATE
+                    result['suggested_speed'] = rate_for_tempo(rate, actual_duration / frame.duration)
                 else:
                     result['warning'] = False
 
                 results.append(result)
                 print(f"  Duration: {actual_duration:.1f}s (diff: {difference:+.1f}s)")
+                journal.record('tts', f"frame_{frame.number}", synthesis_key(frame), output_path)
             else:
                 results.append({
                     'frame': frame.number,
@@ -250,6 +378,7 @@ def generate_audio_for_frames(frames, output_dir):
                     'warning': False,
                     'note': 'Could not verify duration'
                 })
+                journal.record('tts', f"frame_{frame.number}", synthesis_key(frame), output_path)
 
         except Exception as e:
             print(f"  ✗ Failed: {str(e)}")
@@ -261,8 +390,13 @@ def generate_audio_for_frames(frames, output_dir):
                 'error': str(e)
             })
 
-        # Small delay between frames to avoid rate limiting
-        time.sleep(1)
+        # Small delay between requests to avoid rate limiting
+        if frame.number not in batched and frame.number not in done:
+            time.sleep(1)
+
+    if manifest_entries:
+        update_manifest(output_dir, manifest_entries, voice=VOICE_ID, style=VOICE_STYLE,
+                        tolerance=DURATION_TOLERANCE, max_ratio=max_ratio)
 
     return results
 
@@ -277,6 +411,7 @@ def print_report(results):
     successful = 0
     failed = 0
     needs_adjustment = 0
+    fitted = 0
     total_actual_duration = 0
     total_target_duration = 0
 
@@ -292,7 +427,11 @@ def print_report(results):
                     needs_adjustment += 1
                     print(f"⚠ {result['filename']}: {result['actual']:.1f}s (target: {result['target']}s) - "
                           f"{abs(result['difference']):.1f}s {'short' if result['difference'] < 0 else 'long'} - "
-                          f"consider speed {result['suggested_speed']}x")
+                          f"consider rate {result['suggested_speed']}")
+                elif 'fitted' in result:
+                    fitted += 1
+                    print(f"✓ {result['filename']}: {result['actual']:.1f}s (target: {result['target']}s) - "
+                          f"stretched from {result['fitted']['synthesized']:.1f}s")
                 else:
                     print(f"✓ {result['filename']}: {result['actual']:.1f}s (target: {result['target']}s) - OK")
             else:
@@ -305,6 +444,7 @@ def print_report(results):
     print("Summary:")
     print(f"- Total frames: {len(results)}")
     print(f"- Successful: {successful}")
+    print(f"- Time-stretched: {fitted}")
     print(f"- Need adjustment: {needs_adjustment}")
     print(f"- Failed: {failed}")
 
@@ -331,15 +471,22 @@ def format_time(seconds):
 
 def main():
     """Main execution function"""
-    if len(sys.argv) < 2:
-        print("Usage: python generate_tts.py <path_to_script.md>")
-        print()
-        print("Example:")
-        print("  python generate_tts.py Week-1/Video-1/script.md")
-        print("  python generate_tts.py ../Week-2/Video-3/script.md")
-        sys.exit(1)
-
-    script_path = sys.argv[1]
+    parser = argparse.ArgumentParser(
+        description="Generate frame narration with Murf",
+        epilog="Example: python generate_tts.py Week-1/Video-1/script.md")
+    parser.add_argument('script_path', help="Path to script.md")
+    parser.add_argument('--no-fit', action='store_true',
+                        help="Keep Murf's durations (no time-stretch or re-synthesis)")
+    parser.add_argument('--force', action='store_true',
+                        help="Regenerate every frame, even ones already generated")
+    parser.add_argument('--batch', action='store_true',
+                        help="Synthesize consecutive short frames in one request and split the audio")
+    parser.add_argument('--max-stretch', type=float, default=MAX_STRETCH_RATIO,
+                        help=f"Largest tempo change applied locally before re-synthesizing "
+                             f"(default {MAX_STRETCH_RATIO})")
+    args = parser.parse_args()
+
+    script_path = args.script_path
 
     # Determine output directory (same directory as script, in 'audio' subfolder)
     script_dir = os.path.dirname(script_path)
@@ -355,7 +502,7 @@ def main():
     print("=" * 60)
 
     # Verify API key
-    if not MURF_API_KEY:
+    if not load_api_key():
         print("\n✗ Error: MURF_API_KEY not found in environment")
         print("  Please check your .env file")
         sys.exit(1)
@@ -367,12 +514,13 @@ def main():
         print(f"✓ Found {len(frames)} frames")
 
         # Generate audio
-        results = generate_audio_for_frames(frames, audio_dir)
+        results = generate_audio_for_frames(frames, audio_dir, not args.no_fit, args.max_stretch,
+                                            args.batch, args.force)
 
         # Print report
         print_report(results)
 
-    except FileNotFoundError as e:
+    except (FileNotFoundError, ScriptParseError) as e:
         print(f"\n✗ Error: {e}")
         sys.exit(1)
     except Exception as e:
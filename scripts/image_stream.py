@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Streaming Decoder for Gemini inline image payloads
+
+Gemini returns generated images as base64 strings inside the JSON response:
+
+    {"candidates": [{"content": {"parts": [
+        {"inlineData": {"mimeType": "image/png", "data": "iVBORw0KGgo..."}}
+    ]}}]}
+
+InlineImageStreamDecoder consumes the HTTP body chunk by chunk, tracks just
+enough JSON structure to recognise inlineData/inline_data "data" strings, and
+base64-decodes them straight into files. Memory use is one network chunk per
+image regardless of image size, and PNG signature, IHDR and IEND are checked
+on the fly so nothing has to be re-read from disk afterwards.
+"""
+
+import json
+import struct
+import binascii
+from typing import Callable, Dict, List, Optional
+
+
+INLINE_KEYS = ('inlineData', 'inline_data')
+MIME_KEYS = ('mimeType', 'mime_type')
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_IEND = b'\x00\x00\x00\x00IEND\xaeB`\x82'
+MAX_SMALL_STRING = 1 << 20  # Keys, mime types and text parts are kept in memory
+
+
+class ImageSink:
+    """
+    Writes one decoded image to disk while validating it as a PNG
+
+    Only the first 33 bytes (signature + IHDR) and a 12-byte tail (IEND) are
+    retained; everything else goes straight to the file.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.size = 0
+        self.head = bytearray()
+        self.tail = b''
+        self.mime_type = None
+
+    def write(self, data: bytes) -> None:
+        if not data:
+            return
+        if len(self.head) < 33:
+            self.head.extend(data[:33 - len(self.head)])
+        self.tail = (self.tail + data)[-12:]
+        self.size += len(data)
+        self.file.write(data)
+
+    def close(self) -> Dict:
+        """Close the file and return image info including PNG validation"""
+        self.file.close()
+        info = {
+            'path': self.path,
+            'size': self.size,
+            'mime_type': self.mime_type or 'image/png',
+            'width': None,
+            'height': None,
+            'valid': False,
+        }
+        head = bytes(self.head)
+        if head.startswith(PNG_SIGNATURE) and head[12:16] == b'IHDR' and len(head) >= 24:
+            info['width'], info['height'] = struct.unpack('>II', head[16:24])
+            info['valid'] = self.tail == PNG_IEND and info['width'] > 0 and info['height'] > 0
+        return info
+
+
+class _Base64Writer:
+    """Incremental base64 decoder feeding an ImageSink"""
+    def __init__(self, sink: ImageSink):
+        self.sink = sink
+        self.pending = b''
+
+    def feed(self, data: bytes) -> None:
+        data = self.pending + data
+        usable = len(data) - len(data) % 4
+        self.pending = data[usable:]
+        if usable:
+            self.sink.write(binascii.a2b_base64(data[:usable]))
+
+    def finish(self) -> None:
+        if self.pending:
+            padded = self.pending + b'=' * (-len(self.pending) % 4)
+            self.sink.write(binascii.a2b_base64(padded))
+            self.pending = b''
+
+
+class _Container:
+    """One open JSON object or array"""
+    __slots__ = ('is_object', 'parent_key', 'key', 'expecting_key', 'fields', 'sink')
+
+    def __init__(self, is_object: bool, parent_key: Optional[str]):
+        self.is_object = is_object
+        self.parent_key = parent_key
+        self.key = None
+        self.expecting_key = is_object
+        self.fields = {}
+        self.sink = None
+
+
+class InlineImageStreamDecoder:
+    """
+    Incremental JSON scanner that streams inline image data to sinks
+
+    Args:
+        sink_factory: Called with the image index (0, 1, ...) and returns a
+                      new ImageSink for each inline image found
+    """
+    def __init__(self, sink_factory: Callable[[int], ImageSink]):
+        self.sink_factory = sink_factory
+        self.stack: List[_Container] = []
+        self.images: List[Dict] = []
+        self.sinks: List[ImageSink] = []
+
+        self.in_string = False
+        self.escape = False
+        self.string_buffer = bytearray()
+        self.string_is_key = False
+        self.data_writer: Optional[_Base64Writer] = None
+
+    def _value_container(self) -> Optional[_Container]:
+        return self.stack[-1] if self.stack else None
+
+    def _start_string(self) -> None:
+        top = self._value_container()
+        self.in_string = True
+        self.escape = False
+        self.string_buffer = bytearray()
+        self.string_is_key = bool(top and top.is_object and top.expecting_key)
+        self.data_writer = None
+
+        if (top and top.is_object and not self.string_is_key and top.key == 'data'
+                and top.parent_key in INLINE_KEYS):
+            sink = self.sink_factory(len(self.sinks))
+            self.sinks.append(sink)
+            top.sink = sink
+            self.data_writer = _Base64Writer(sink)
+
+    def _end_string(self) -> None:
+        self.in_string = False
+        top = self._value_container()
+
+        if self.data_writer is not None:
+            self.data_writer.finish()
+            self.data_writer = None
+        elif self.string_is_key:
+            top.key = json.loads(b'"' + bytes(self.string_buffer) + b'"')
+            top.expecting_key = False
+        elif top and top.is_object and top.key in MIME_KEYS:
+            top.fields['mime_type'] = json.loads(b'"' + bytes(self.string_buffer) + b'"')
+
+        self.string_buffer = bytearray()
+
+    def _feed_data_string(self, chunk: bytes, pos: int) -> int:
+        """Fast path inside a base64 "data" string; returns the new position"""
+        end = len(chunk)
+        while pos < end:
+            if self.escape:
+                # JSON may escape '/' as '\/'; other escapes are not base64
+                if chunk[pos:pos + 1] == b'/':
+                    self.data_writer.feed(b'/')
+                self.escape = False
+                pos += 1
+                continue
+
+            quote = chunk.find(b'"', pos)
+            backslash = chunk.find(b'\\', pos, quote if quote >= 0 else end)
+            if backslash >= 0:
+                self.data_writer.feed(chunk[pos:backslash])
+                self.escape = True
+                pos = backslash + 1
+            elif quote >= 0:
+                self.data_writer.feed(chunk[pos:quote])
+                self._end_string()
+                return quote + 1
+            else:
+                self.data_writer.feed(chunk[pos:end])
+                return end
+        return pos
+
+    def feed(self, chunk: bytes) -> None:
+        """Consume the next chunk of the HTTP response body"""
+        pos = 0
+        end = len(chunk)
+        while pos < end:
+            if self.in_string:
+                if self.data_writer is not None:
+                    pos = self._feed_data_string(chunk, pos)
+                    continue
+
+                byte = chunk[pos]
+                if self.escape:
+                    self.escape = False
+                elif byte == 0x5c:  # backslash
+                    self.escape = True
+                elif byte == 0x22:  # quote
+                    self._end_string()
+                    pos += 1
+                    continue
+                if len(self.string_buffer) < MAX_SMALL_STRING:
+                    self.string_buffer.append(byte)
+                pos += 1
+                continue
+
+            byte = chunk[pos]
+            top = self._value_container()
+            if byte == 0x22:
+                self._start_string()
+            elif byte in (0x7b, 0x5b):  # { [
+                parent_key = top.key if top and top.is_object else None
+                self.stack.append(_Container(byte == 0x7b, parent_key))
+            elif byte in (0x7d, 0x5d):  # } ]
+                closed = self.stack.pop() if self.stack else None
+                if closed is not None and closed.sink is not None:
+                    closed.sink.mime_type = closed.fields.get('mime_type')
+                    self.images.append(closed.sink.close())
+                    closed.sink = None
+            elif byte == 0x2c and top and top.is_object:  # ,
+                top.expecting_key = True
+                top.key = None
+            pos += 1
+
+    def close(self) -> List[Dict]:
+        """
+        Finish decoding and return info for every image, in response order
+
+        Sinks left open by a truncated response are closed and reported as
+        invalid.
+        """
+        for sink in self.sinks:
+            if not sink.file.closed:
+                info = sink.close()
+                info['valid'] = False
+                self.images.append(info)
+        order = {sink.path: i for i, sink in enumerate(self.sinks)}
+        return sorted(self.images, key=lambda info: order[info['path']])
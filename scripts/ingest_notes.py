@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Lecture Notes Ingestion (PDF / PPTX)
+
+Extracts the text and tables of every page (PDF) or slide (PPTX) of the
+week's lecture notes into one compact JSON file that plan.md and script.md
+authoring can read instead of pasting notes into prompts by hand.
+
+- Pages are opened lazily and split into page ranges that are extracted in
+  a process pool, so large decks use every core and never sit in memory whole
+- Each page's result is cached by the file's sha256 and page number, so
+  re-running on unchanged notes does no extraction at all and an interrupted
+  run resumes with the pages it had not finished
+- The output includes a term index (word -> pages) for quick lookup
+
+Output (next to the notes as <name>.notes.json unless --output is given):
+    {"source": "...", "sha256": "...", "type": "pdf", "page_count": 12,
+     "pages": [{"page": 1, "title": "...", "text": "...", "tables": [[["a","b"]]]}],
+     "index": {"volatility": [2, 5], ...}}
+
+Usage:
+    python3 ingest_notes.py Week-1/Week-1-Lecture-Notes-SAMPLE.pdf
+    python3 ingest_notes.py Week-2/slides.pptx --jobs 8
+    python3 ingest_notes.py Week-1/Week-1-Lecture-Notes-SAMPLE.pdf --search "standard deviation"
+
+Requires pdfplumber (PDF) and python-pptx (PPTX), listed in requirements.txt.
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from content_store import file_digest, write_file_atomic
+
+
+EXTRACTOR_VERSION = 1          # Bump to invalidate cached page results
+PAGES_PER_TASK = 8             # Pages extracted per process-pool task
+INGEST_JOBS = min(8, os.cpu_count() or 1)
+NOTES_CACHE_DIR = Path(os.getenv(
+    'NOTES_CACHE_DIR',
+    Path.home() / '.cache' / 'educational-video-maker' / 'notes'))
+MIN_INDEX_WORD_LENGTH = 3
+INDEX_STOPWORDS = frozenset(
+    "the and for are but not you all any can had her was one our out has him his how its "
+    "may new now old see two way who did get let put say she too use that with have this "
+    "will your from they been were what when which their there than them then into more "
+    "some such only also each other these those would could should about".split())
+WORD_PATTERN = re.compile(r"[a-z0-9][a-z0-9'\-]*[a-z0-9]|[a-z0-9]")
+UNMAPPED_GLYPH_PATTERN = re.compile(r'\(cid:\d+\)')  # pdfminer's placeholder for bullets etc.
+
+
+def notes_type(path: str) -> str:
+    suffix = Path(path).suffix.lower()
+    if suffix == '.pdf':
+        return 'pdf'
+    if suffix == '.pptx':
+        return 'pptx'
+    raise ValueError(f"Unsupported notes format '{suffix}' (expected .pdf or .pptx)")
+
+
+def count_pages(path: str) -> int:
+    """Page/slide count without extracting any content"""
+    if notes_type(path) == 'pdf':
+        import pdfplumber
+        with pdfplumber.open(path) as pdf:
+            return len(pdf.pages)
+    from pptx import Presentation
+    return len(Presentation(path).slides)
+
+
+def _clean_cell(cell) -> str:
+    return ' '.join(str(cell).split()) if cell is not None else ''
+
+
+def _first_line(text: str) -> str:
+    for line in text.splitlines():
+        if line.strip():
+            return line.strip()
+    return ''
+
+
+def _pdf_title(page) -> str:
+    """The page's largest-font line (running headers are usually smaller)"""
+    words = page.extract_words(extra_attrs=['size'])
+    if not words:
+        return ''
+    largest = max(word['size'] for word in words)
+    heading = [word for word in words if word['size'] >= largest - 0.5]
+    first_top = min(word['top'] for word in heading)
+    line = [word for word in heading if abs(word['top'] - first_top) < largest / 2]
+    return ' '.join(word['text'] for word in sorted(line, key=lambda w: w['x0']))
+
+
+def _iter_pdf_pages(path: str, pages: List[int]) -> Iterator[Dict]:
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        for number in pages:
+            page = pdf.pages[number - 1]
+            text = UNMAPPED_GLYPH_PATTERN.sub('•', page.extract_text() or '')
+            tables = [[[_clean_cell(cell) for cell in row] for row in table]
+                      for table in page.extract_tables()]
+            title = _pdf_title(page) or _first_line(text)
+            # Drop parsed objects so memory stays bounded by one page
+            page.close()
+            yield {'page': number, 'title': title, 'text': text.strip(), 'tables': tables}
+
+
+def _iter_pptx_slides(path: str, pages: List[int]) -> Iterator[Dict]:
+    from pptx import Presentation
+
+    slides = Presentation(path).slides
+    for number in pages:
+        slide = slides[number - 1]
+        title = ''
+        blocks = []
+        tables = []
+        for shape in slide.shapes:
+            if shape.has_text_frame:
+                text = shape.text_frame.text.strip()
+                if not text:
+                    continue
+                if shape == slide.shapes.title:
+                    title = text
+                blocks.append(text)
+            elif getattr(shape, 'has_table', False) and shape.has_table:
+                tables.append([[_clean_cell(cell.text) for cell in row.cells]
+                               for row in shape.table.rows])
+
+        record = {'page': number, 'title': title or _first_line('\n'.join(blocks)),
+                  'text': '\n'.join(blocks), 'tables': tables}
+        if slide.has_notes_slide:
+            notes = slide.notes_slide.notes_text_frame.text.strip()
+            if notes:
+                record['notes'] = notes
+        yield record
+
+
+def page_cache_path(cache_dir: Path, digest: str, page: int) -> Path:
+    return cache_dir / digest[:2] / digest / f"v{EXTRACTOR_VERSION}-{page:05d}.json"
+
+
+def extract_page_range(path: str, pages: List[int], digest: str,
+                       cache_dir: Optional[str]) -> List[Dict]:
+    """
+    Extract the given pages (1-based) and cache each result
+
+    Runs inside a worker process; only the pages in this range are parsed.
+    """
+    extractor = _iter_pdf_pages if notes_type(path) == 'pdf' else _iter_pptx_slides
+    records = []
+    for record in extractor(path, pages):
+        records.append(record)
+        if cache_dir:
+            cache_path = page_cache_path(Path(cache_dir), digest, record['page'])
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            write_file_atomic(str(cache_path),
+                              json.dumps(record, separators=(',', ':')).encode('utf-8'))
+    return records
+
+
+def load_cached_page(cache_dir: Path, digest: str, page: int) -> Optional[Dict]:
+    try:
+        with open(page_cache_path(cache_dir, digest, page), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def contiguous_ranges(pages: List[int], size: int) -> List[List[int]]:
+    """Group sorted page numbers into runs of consecutive pages, at most size long"""
+    ranges: List[List[int]] = []
+    for page in pages:
+        if ranges and page == ranges[-1][-1] + 1 and len(ranges[-1]) < size:
+            ranges[-1].append(page)
+        else:
+            ranges.append([page])
+    return ranges
+
+
+def build_term_index(pages: List[Dict]) -> Dict[str, List[int]]:
+    """Map each significant lowercased word to the pages it appears on"""
+    index: Dict[str, List[int]] = {}
+    for record in pages:
+        text = ' '.join([record['title'], record['text'], record.get('notes', '')] +
+                        [cell for table in record['tables'] for row in table for cell in row])
+        for word in set(WORD_PATTERN.findall(text.lower())):
+            if len(word) >= MIN_INDEX_WORD_LENGTH and word not in INDEX_STOPWORDS:
+                index.setdefault(word, []).append(record['page'])
+    return {word: index[word] for word in sorted(index)}
+
+
+def ingest_notes(path: str, jobs: int = INGEST_JOBS,
+                 cache_dir: Optional[Path] = NOTES_CACHE_DIR) -> Tuple[Dict, int]:
+    """
+    Extract every page of a PDF/PPTX, reusing cached pages
+
+    Returns (notes, extracted) where extracted is how many pages had to be
+    parsed (0 when everything came from the cache).
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Notes file not found: {path}")
+
+    kind = notes_type(path)
+    digest = file_digest(path)
+    page_count = count_pages(path)
+
+    pages: Dict[int, Dict] = {}
+    if cache_dir is not None:
+        for number in range(1, page_count + 1):
+            record = load_cached_page(cache_dir, digest, number)
+            if record is not None:
+                pages[number] = record
+
+    missing = [n for n in range(1, page_count + 1) if n not in pages]
+    ranges = contiguous_ranges(missing, PAGES_PER_TASK)
+    cache_arg = str(cache_dir) if cache_dir is not None else None
+
+    if len(ranges) <= 1 or jobs <= 1:
+        for page_range in ranges:
+            for record in extract_page_range(path, page_range, digest, cache_arg):
+                pages[record['page']] = record
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(ranges))) as pool:
+            futures = [pool.submit(extract_page_range, path, page_range, digest, cache_arg)
+                       for page_range in ranges]
+            for future in futures:
+                for record in future.result():
+                    pages[record['page']] = record
+
+    ordered = [pages[n] for n in range(1, page_count + 1)]
+    notes = {
+        'source': os.path.basename(path),
+        'sha256': digest,
+        'type': kind,
+        'page_count': page_count,
+        'pages': ordered,
+        'index': build_term_index(ordered),
+    }
+    return notes, len(missing)
+
+
+def default_output_path(path: str) -> str:
+    return str(Path(path).with_suffix('.notes.json'))
+
+
+def search_notes(notes: Dict, query: str) -> List[Dict]:
+    """Pages containing every word of the query (via the term index)"""
+    words = [w for w in WORD_PATTERN.findall(query.lower())
+             if len(w) >= MIN_INDEX_WORD_LENGTH and w not in INDEX_STOPWORDS]
+    if not words:
+        return []
+    matching = set(notes['index'].get(words[0], []))
+    for word in words[1:]:
+        matching &= set(notes['index'].get(word, []))
+    return [record for record in notes['pages'] if record['page'] in matching]
+
+
+def main():
+    """Ingest lecture notes into compact JSON"""
+    parser = argparse.ArgumentParser(description="Extract lecture notes (PDF/PPTX) to JSON")
+    parser.add_argument('notes', nargs='+', help="Lecture notes .pdf or .pptx files")
+    parser.add_argument('--output', help="Output JSON path (single input only)")
+    parser.add_argument('--jobs', type=int, default=INGEST_JOBS,
+                        help=f"Parallel worker processes (default {INGEST_JOBS})")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore the per-page cache")
+    parser.add_argument('--search', help="Print the pages matching these words")
+    args = parser.parse_args()
+
+    if args.output and len(args.notes) > 1:
+        parser.error("--output can only be used with a single notes file")
+
+    exit_code = 0
+    for path in args.notes:
+        try:
+            notes, extracted = ingest_notes(path, args.jobs,
+                                            None if args.no_cache else NOTES_CACHE_DIR)
+        except (FileNotFoundError, ValueError, ImportError) as e:
+            print(f"✗ {path}: {e}")
+            exit_code = 1
+            continue
+
+        output_path = args.output or default_output_path(path)
+        write_file_atomic(output_path,
+                          json.dumps(notes, ensure_ascii=False,
+                                     separators=(',', ':')).encode('utf-8'))
+        tables = sum(len(record['tables']) for record in notes['pages'])
+        print(f"✓ {path}: {notes['page_count']} pages ({extracted} extracted, "
+              f"{notes['page_count'] - extracted} cached), {tables} tables → {output_path}")
+
+        if args.search:
+            for record in search_notes(notes, args.search):
+                print(f"  p.{record['page']}: {record['title'][:70]}")
+
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
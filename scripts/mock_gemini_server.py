@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Local Mock of the Gemini generateContent Endpoint
+
+Serves small generated PNGs in the same response shape as Gemini so the
+image generator can be exercised offline, including 429/503 throttling.
+
+Usage:
+    python3 mock_gemini_server.py --port 8765 --throttle-rate 0.3
+    GEMINI_API_BASE=http://127.0.0.1:8765/v1beta GEMINI_API_KEY=mock \
+        python3 generate_images_gemini.py /tmp/Week-1/Video-1
+
+GET /stats returns request counts as JSON.
+"""
+
+import json
+import time
+import zlib
+import base64
+import random
+import struct
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_png(width: int, height: int, seed: int) -> bytes:
+    """Small white PNG with one black stroke whose position depends on seed"""
+    rng = random.Random(seed)
+    y0 = rng.randrange(height)
+    rows = bytearray()
+    for y in range(height):
+        rows.append(0)
+        shade = 0 if abs(y - y0) < 2 else 255
+        rows.extend(bytes([shade]) * width)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return (struct.pack('>I', len(data)) + tag + data +
+                struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+    return (b'\x89PNG\r\n\x1a\n' +
+            chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)) +
+            chunk(b'IDAT', zlib.compress(bytes(rows))) +
+            chunk(b'IEND', b''))
+
+
+class MockGeminiHandler(BaseHTTPRequestHandler):
+    """Handles generateContent POSTs and /stats GETs"""
+    server_version = "MockGemini/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith('/stats'):
+            with self.server.lock:
+                self.send_json(200, dict(self.server.stats))
+        else:
+            self.send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+
+        if ':generateContent' not in self.path:
+            self.send_json(404, {'error': {'message': 'unknown method'}})
+            return
+
+        with self.server.lock:
+            self.server.stats['requests'] += 1
+            throttle = self.server.rng.random() < self.server.throttle_rate
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if throttle:
+            status = self.server.rng.choice([429, 503])
+            with self.server.lock:
+                self.server.stats[f'http_{status}'] += 1
+            self.send_json(status, {'error': {'code': status, 'message': 'throttled'}},
+                           {'Retry-After': '1'})
+            return
+
+        prompt = request.get('contents', [{}])[0].get('parts', [{}])[0].get('text', '')
+        seed = zlib.crc32(prompt.encode('utf-8'))
+        parts = []
+        for i in range(self.server.images_per_request):
+            png = make_png(self.server.image_size, self.server.image_size, seed + i)
+            parts.append({'inlineData': {'mimeType': 'image/png',
+                                         'data': base64.b64encode(png).decode('ascii')}})
+
+        with self.server.lock:
+            self.server.stats['http_200'] += 1
+        self.send_json(200, {'candidates': [{'content': {'parts': parts}}]})
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Mock Gemini image generation server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--throttle-rate', type=float, default=0.0,
+                        help="Fraction of requests answered with 429/503")
+    parser.add_argument('--latency', type=float, default=0.5, help="Seconds per request")
+    parser.add_argument('--images', type=int, default=2, help="Images per response")
+    parser.add_argument('--size', type=int, default=512, help="Image width/height")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), MockGeminiHandler)
+    server.lock = threading.Lock()
+    server.rng = random.Random(args.seed)
+    server.stats = {'requests': 0, 'http_200': 0, 'http_429': 0, 'http_503': 0}
+    server.throttle_rate = args.throttle_rate
+    server.latency = args.latency
+    server.images_per_request = args.images
+    server.image_size = args.size
+    server.verbose = args.verbose
+
+    print(f"Mock Gemini listening on http://{args.host}:{args.port}/v1beta")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Frame and Asset PNG Optimizer
+
+Post-processing stage for a video folder's images:
+- frames/: scaled down to fit the 1920x1080 video canvas, and padded with
+  white to its 16:9 aspect ratio so FFmpeg's scale to the canvas never
+  stretches them
+- assets/: AI images and downloads larger than the canvas are scaled down to fit
+
+Images are never scaled up (that only makes the PNG bigger; FFmpeg scales
+frames to the output size anyway).
+
+Colour images are reduced to the smallest mode that represents them exactly
+(greyscale, or a palette of up to 256 colours). Hand-drawn black-and-white
+art is quantized: near-grey pixels become grey, nearly two-tone art becomes
+1-bit, and anti-aliased line art keeps 16 grey levels in a 4-bit palette.
+The PNG is then recompressed, and a file is only replaced when the result
+is smaller.
+
+Images are processed in parallel in a process pool.
+
+Usage:
+    python3 optimize_assets.py Week-1/Video-1
+    python3 optimize_assets.py Week-1/Video-1 --jobs 8 --dry-run
+
+Requires Pillow (listed in requirements.txt).
+"""
+
+import os
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+CANVAS_SIZE = (1920, 1080)        # Must match VIDEO_WIDTH/VIDEO_HEIGHT in compile_video.py
+CANVAS_BACKGROUND = (255, 255, 255)
+PNG_COMPRESS_LEVEL = 9
+IMAGE_EXTENSIONS = ('.png',)
+ASPECT_SLACK = 2                  # Padding of a pixel or two (rounding) is left out
+GREY_TOLERANCE = 16               # Max R/G/B spread of any pixel for greyscale art
+INK_RANGE = 32                    # Levels from pure black/white counted as ink or paper
+LINE_ART_SHARE = 0.9              # Share of ink/paper pixels that makes an image line art
+BILEVEL_SHARE = 0.998             # Share above which line art is stored as 1-bit
+LINE_ART_LEVELS = 16              # Grey levels kept for anti-aliased line art
+OPTIMIZE_JOBS = min(8, os.cpu_count() or 1)
+
+
+def _flatten(image):
+    """Composite transparency onto the white canvas background"""
+    from PIL import Image
+
+    if image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGBA', image.size, CANVAS_BACKGROUND + (255,))
+        return Image.alpha_composite(background, image).convert('RGB')
+    if image.mode not in ('RGB', 'L', '1'):
+        return image.convert('RGB')
+    return image
+
+
+def fit_to_canvas(image, canvas: Tuple[int, int], letterbox: bool):
+    """
+    Scale an image down to fit inside canvas, preserving aspect ratio
+
+    Never scales up. With letterbox=True an image whose aspect ratio
+    differs from the canvas is centred on white padding with the canvas
+    aspect ratio, at its own resolution. Returns (image, changed).
+    """
+    from PIL import Image
+
+    width, height = image.size
+    scale = min(1.0, canvas[0] / width, canvas[1] / height)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    changed = size != image.size
+    if changed:
+        if image.mode == '1':
+            image = image.convert('L')
+        image = image.resize(size, Image.LANCZOS)
+    if not letterbox:
+        return image, changed
+
+    # Smallest box with the canvas aspect ratio that holds the image
+    box = (max(size[0], round(size[1] * canvas[0] / canvas[1])),
+           max(size[1], round(size[0] * canvas[1] / canvas[0])))
+    if box[0] - size[0] <= ASPECT_SLACK and box[1] - size[1] <= ASPECT_SLACK:
+        return image, changed
+
+    if image.mode == '1':
+        image = image.convert('L')
+    background = CANVAS_BACKGROUND if image.mode == 'RGB' else 255
+    framed = Image.new(image.mode, box, background)
+    framed.paste(image, ((box[0] - size[0]) // 2, (box[1] - size[1]) // 2))
+    return framed, True
+
+
+def reduce_colors(image):
+    """
+    Convert to the smallest mode that represents the image
+
+    Colour images are only reduced losslessly: to a palette image when
+    they have at most 256 distinct colours. Images where no pixel's R, G
+    and B differ by more than GREY_TOLERANCE are black-and-white art and
+    become greyscale, then are quantized by quantize_grey().
+    """
+    from PIL import Image, ImageChops
+
+    if image.mode == 'RGB':
+        r, g, b = image.split()
+        spread = max(ImageChops.difference(x, y).getextrema()[1]
+                     for x, y in ((r, g), (g, b), (r, b)))
+        if spread > GREY_TOLERANCE:
+            colors = image.getcolors(256)
+            if colors is None:
+                return image
+            paletted = image.quantize(colors=len(colors), method=Image.Quantize.FASTOCTREE,
+                                      dither=Image.Dither.NONE)
+            # Only keep the palette if it reproduces every pixel
+            return paletted if paletted.convert('RGB').tobytes() == image.tobytes() else image
+        image = image.convert('L') if spread else r
+
+    if image.mode == 'L':
+        return quantize_grey(image)
+    return image
+
+
+def quantize_grey(image):
+    """
+    Lossy palette reduction for greyscale line art
+
+    Counts pixels within INK_RANGE of pure black or white. Nearly all of
+    them (BILEVEL_SHARE) gives 1-bit; most of them (LINE_ART_SHARE, the
+    rest being anti-aliased edges) gives LINE_ART_LEVELS evenly spaced greys
+    in a 4-bit palette. Other greyscale images (photos) are kept as they are.
+    """
+    from PIL import Image
+
+    histogram = image.histogram()
+    ink = sum(histogram[:INK_RANGE + 1]) + sum(histogram[255 - INK_RANGE:])
+    share = ink / (image.width * image.height)
+    if share >= BILEVEL_SHARE:
+        return image.convert('1', dither=Image.Dither.NONE)
+    if share < LINE_ART_SHARE:
+        return image
+
+    step = 255 / (LINE_ART_LEVELS - 1)
+    paletted = image.point(lambda v: round(v / step)).convert('P')
+    paletted.putpalette([round(i * step) for i in range(LINE_ART_LEVELS) for _ in range(3)])
+    return paletted
+
+
+def optimize_image(path: str, letterbox: bool, dry_run: bool = False,
+                   canvas: Tuple[int, int] = CANVAS_SIZE) -> Dict:
+    """
+    Optimize one PNG in place (via temp file + rename)
+
+    The file is only replaced when the result is smaller. Returns {'path',
+    'before', 'after', 'mode', 'fitted', 'replaced'}; with dry_run the
+    optimized size is measured but nothing is written.
+    """
+    from PIL import Image
+
+    before = os.path.getsize(path)
+    result = {'path': path, 'before': before, 'after': before, 'mode': None,
+              'fitted': False, 'replaced': False, 'error': None}
+    try:
+        with Image.open(path) as source:
+            source.load()
+            image = _flatten(source)
+        image, fitted = fit_to_canvas(image, canvas, letterbox)
+        image = reduce_colors(image)
+
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        image.save(tmp_path, 'PNG', optimize=True, compress_level=PNG_COMPRESS_LEVEL)
+        after = os.path.getsize(tmp_path)
+
+        result.update(mode=image.mode, fitted=fitted)
+        if after < before and not dry_run:
+            os.replace(tmp_path, path)  # Breaks any content-store hard link
+            result.update(after=after, replaced=True)
+        else:
+            os.remove(tmp_path)
+            if dry_run and after < before:
+                result['after'] = after
+    except (OSError, ValueError) as e:
+        result['error'] = str(e)
+    return result
+
+
+def collect_images(video_folder: str) -> List[Tuple[str, bool]]:
+    """(path, letterbox) for every frame and asset image in a video folder"""
+    jobs = []
+    for folder_name, letterbox in (('frames', True), ('assets', False)):
+        folder = Path(video_folder) / folder_name
+        if not folder.is_dir():
+            continue
+        for path in sorted(folder.iterdir()):
+            if path.suffix.lower() in IMAGE_EXTENSIONS and '.tmp.' not in path.name:
+                jobs.append((str(path), letterbox))
+    return jobs
+
+
+def optimize_folder(video_folder: str, jobs: int = OPTIMIZE_JOBS,
+                    dry_run: bool = False) -> List[Dict]:
+    """Optimize every image in a video folder using a process pool"""
+    images = collect_images(video_folder)
+    if not images:
+        return []
+    if jobs <= 1 or len(images) == 1:
+        return [optimize_image(path, letterbox, dry_run) for path, letterbox in images]
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(images))) as pool:
+        return list(pool.map(optimize_image,
+                             [path for path, _ in images],
+                             [letterbox for _, letterbox in images],
+                             [dry_run] * len(images),
+                             chunksize=4))
+
+
+def format_bytes(size: int) -> str:
+    if abs(size) >= 1024 * 1024:
+        return f"{size / 1024 / 1024:.1f} MB"
+    return f"{size / 1024:.0f} KB"
+
+
+def main():
+    """Optimize a video folder's frames and assets and report savings"""
+    parser = argparse.ArgumentParser(description="Optimize frame and asset PNGs")
+    parser.add_argument('video_folder', help="Video folder containing frames/ and assets/")
+    parser.add_argument('--jobs', type=int, default=OPTIMIZE_JOBS,
+                        help=f"Parallel worker processes (default {OPTIMIZE_JOBS})")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Report savings without modifying files")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.video_folder):
+        print(f"Error: Folder not found: {args.video_folder}")
+        sys.exit(1)
+
+    results = optimize_folder(args.video_folder, args.jobs, args.dry_run)
+    if not results:
+        print("No PNG images found in frames/ or assets/")
+        return
+
+    total_before = 0
+    total_after = 0
+    errors = 0
+    for result in results:
+        name = os.path.relpath(result['path'], args.video_folder)
+        if result['error']:
+            errors += 1
+            print(f"  ✗ {name}: {result['error']}")
+            continue
+        total_before += result['before']
+        total_after += result['after']
+        saved = result['before'] - result['after']
+        notes = [result['mode']]
+        if result['fitted']:
+            notes.append('fitted to canvas')
+        if saved <= 0:
+            notes = ['kept, optimized file was not smaller']
+        print(f"  {'✓' if saved > 0 else '·'} {name}: "
+              f"{format_bytes(result['before'])} → {format_bytes(result['after'])} "
+              f"({', '.join(notes)})")
+
+    saved = total_before - total_after
+    percent = saved / total_before * 100 if total_before else 0
+    verb = "Would save" if args.dry_run else "Saved"
+    print(f"\n✓ {verb} {format_bytes(saved)} of {format_bytes(total_before)} "
+          f"({percent:.0f}%) across {len(results) - errors} images")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
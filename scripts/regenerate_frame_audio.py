@@ -1,20 +1,22 @@
 #!/usr/bin/env python3
 """
 Quick script to regenerate a single frame
+
+Usage:
+    python regenerate_frame_audio.py Week-1/Video-1/script.md 7
 """
 
 import os
-import requests
+import sys
 import time
 from pathlib import Path
-from dotenv import load_dotenv
+from script_parser import iter_frames, clean_narration_text
+from content_store import write_file_atomic
 
-# Load environment variables
+# Environment file (loaded when audio is generated)
 env_path = Path(__file__).parent.parent.parent.parent / '.env'
-load_dotenv(env_path)
 
 # API Configuration
-MURF_API_KEY = os.getenv('MURF_API_KEY')
 MURF_API_ENDPOINT = "https://api.murf.ai/v1/speech/generate"
 VOICE_ID = "en-AU-leyton"
 VOICE_STYLE = "Narration"
@@ -24,9 +26,14 @@ SAMPLE_RATE = 44100
 
 def generate_audio(text, output_path):
     """Generate audio for a single frame"""
+    # Imported here so usage errors and frame lookups start instantly
+    import requests
+    from dotenv import load_dotenv
+
+    load_dotenv(env_path)
 
     headers = {
-        'api-key': MURF_API_KEY,
+        'api-key': os.getenv('MURF_API_KEY'),
         'Content-Type': 'application/json'
     }
 
@@ -58,8 +65,7 @@ def generate_audio(text, output_path):
             print(f"Downloading audio from: {audio_url[:50]}...")
             audio_response = requests.get(audio_url, timeout=60)
 
-            with open(output_path, 'wb') as f:
-                f.write(audio_response.content)
+            write_file_atomic(output_path, audio_response.content)
 
             print(f"✓ Saved to {output_path}")
             return True
@@ -70,18 +76,37 @@ def generate_audio(text, output_path):
         print(f"✗ API error {response.status_code}: {response.text}")
         return False
 
-# Frame 7 text from script.md
-text = """Car insurance premiums demonstrate measurable risk. Actuarial tables allow insurance companies to assign probabilities to different accident types using driver age, past accidents, location, and vehicle type.
 
-Your insurer analyzes your profile against millions of data points. They calculate precise accident probabilities for your demographic. Known probabilities mean measurable risk."""
+def find_frame_text(script_path, frame_number):
+    """Return cleaned narration for one frame of script.md, or None"""
+    for frame in iter_frames(script_path):
+        if frame.number == frame_number:
+            return clean_narration_text(frame.narration)
+    return None
+
+
+if len(sys.argv) < 3:
+    print("Usage: python regenerate_frame_audio.py <path_to_script.md> <frame_number>")
+    print()
+    print("Example:")
+    print("  python regenerate_frame_audio.py Week-1/Video-1/script.md 7")
+    sys.exit(1)
+
+script_path = sys.argv[1]
+frame_number = int(sys.argv[2])
+
+text = find_frame_text(script_path, frame_number)
+if text is None:
+    print(f"✗ Frame {frame_number} not found in {script_path}")
+    sys.exit(1)
 
-output_path = "/path/to/your/course/Week-1/Video-1/audio/frame_07.mp3"
+output_path = os.path.join(os.path.dirname(script_path), 'audio', f"frame_{frame_number}.mp3")
 
 print("=" * 60)
-print("Regenerating Frame 7")
+print(f"Regenerating Frame {frame_number}")
 print("=" * 60)
 
 if generate_audio(text, output_path):
-    print("\n✓ Frame 7 regenerated successfully!")
+    print(f"\n✓ Frame {frame_number} regenerated successfully!")
 else:
-    print("\n✗ Failed to regenerate frame 7")
+    print(f"\n✗ Failed to regenerate frame {frame_number}")
@@ -0,0 +1,662 @@
+#!/usr/bin/env python3
+"""
+Render Farm: Distribute Builds Across Machines via a Shared Course Folder
+
+When a whole course is re-voiced, one render box is the bottleneck. The farm
+splits the work into independent jobs and lets any number of worker
+processes, on any machine that mounts the course folder, pick them up:
+
+- tts:        synthesize one frame's narration (Murf)
+- transcribe: word timestamps for one frame's audio (Whisper)
+- segment:    encode one frame's video segment (FFmpeg)
+
+Jobs live in a SQLite queue at <course>/.farm/queue.db. A worker claims a
+job with a lease and renews it with a heartbeat while it runs; if a worker
+dies its lease expires and another worker takes the job over (up to
+MAX_ATTEMPTS tries). Results are written to the course content store
+(content_store.py) and jobs are keyed by their inputs, so a job that was
+already done is never repeated.
+
+The coordinator publishes jobs phase by phase (all TTS, then all
+transcription, then each video's segments), checks the results out into
+the video folders and the build caches, and runs compile_video.py for the
+parts that need the whole video: subtitles, concatenation and the mux.
+
+Usage:
+    python3 render_farm.py worker /path/to/course                  # On every render node
+    python3 render_farm.py coordinate /path/to/course              # Build every video
+    python3 render_farm.py coordinate /path/to/course Week-2/Video-1 --tts
+    python3 render_farm.py coordinate /path/to/course --local-workers 4
+    python3 render_farm.py status /path/to/course
+
+SQLite locking needs a filesystem with working POSIX locks (NFSv4, SMB3 or
+local disk); the queue uses rollback journaling, not WAL, for that reason.
+Every node must see the course at a path of its own choosing; job payloads
+only contain paths relative to the course root.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import sqlite3
+import argparse
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from content_store import ContentStore, iter_video_folders
+
+
+FARM_DIRNAME = '.farm'
+QUEUE_FILENAME = 'queue.db'
+FARM_REFS_NAME = 'farm'       # Manifest name in the content store (see --gc)
+LEASE_SECONDS = 60.0        # A job whose lease is not renewed for this long is re-queued
+HEARTBEAT_SECONDS = 15.0
+POLL_SECONDS = 0.5
+MAX_ATTEMPTS = 3
+JOB_KINDS = ('tts', 'transcribe', 'segment')
+
+# Placeholders in published segment commands, replaced by each worker
+IMAGE_TOKEN = 'FARM_IMAGE.png'
+SUBTITLES_TOKEN = 'FARM_SUBTITLES.srt'
+OUTPUT_TOKEN = 'FARM_OUTPUT.mp4'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    video TEXT NOT NULL,
+    unit TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',   -- queued, leased, done, failed
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    UNIQUE (kind, key)
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (state, lease_expires);
+"""
+
+
+class FarmError(Exception):
+    """The coordinator gave up waiting for a phase (--timeout)"""
+    pass
+
+
+class FarmQueue:
+    """
+    Job queue in a SQLite file on the shared course folder
+
+    Each process opens its own connection. Claims run in BEGIN IMMEDIATE
+    transactions, so two workers can never lease the same job.
+    """
+
+    def __init__(self, course_root: str):
+        farm_dir = Path(course_root) / FARM_DIRNAME
+        farm_dir.mkdir(exist_ok=True)
+        self.path = str(farm_dir / QUEUE_FILENAME)
+        self.db = sqlite3.connect(self.path, timeout=60, isolation_level=None,
+                                  check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.lock = threading.Lock()   # The heartbeat thread shares the connection
+        with self.lock:
+            self.db.execute('PRAGMA journal_mode=DELETE')
+            self.db.executescript(SCHEMA)
+
+    def _write(self, sql: str, params=()) -> sqlite3.Cursor:
+        with self.lock:
+            return self.db.execute(sql, params)
+
+    def publish(self, kind: str, key: str, video: str, unit: str, payload: Dict) -> int:
+        """
+        Add a job (or reuse the one with the same kind and key); returns its id
+
+        A failed job is re-queued with fresh attempts; a done one is left
+        as it is, so its result is reused.
+        """
+        now = time.time()
+        with self.lock:
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                self.db.execute(
+                    "INSERT OR IGNORE INTO jobs (kind, key, video, unit, payload, created, updated) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (kind, key, video, unit, json.dumps(payload), now, now))
+                self.db.execute(
+                    "UPDATE jobs SET state = 'queued', attempts = 0, error = NULL, updated = ? "
+                    "WHERE kind = ? AND key = ? AND state = 'failed'", (now, kind, key))
+                row = self.db.execute("SELECT id FROM jobs WHERE kind = ? AND key = ?",
+                                      (kind, key)).fetchone()
+                self.db.execute('COMMIT')
+            except BaseException:
+                self.db.execute('ROLLBACK')
+                raise
+        return row['id']
+
+    def claim(self, worker: str, kinds=JOB_KINDS) -> Optional[sqlite3.Row]:
+        """Lease the oldest runnable job of the given kinds, or None"""
+        now = time.time()
+        marks = ','.join('?' * len(kinds))
+        with self.lock:
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                # Jobs whose worker stopped heartbeating too often are given up on
+                self.db.execute(
+                    "UPDATE jobs SET state = 'failed', updated = ?, "
+                    "error = COALESCE(error, 'lease expired ' || attempts || ' times') "
+                    "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                    (now, now, MAX_ATTEMPTS))
+                row = self.db.execute(
+                    f"SELECT * FROM jobs WHERE kind IN ({marks}) AND "
+                    f"(state = 'queued' OR (state = 'leased' AND lease_expires < ?)) "
+                    f"ORDER BY id LIMIT 1", (*kinds, now)).fetchone()
+                if row is not None:
+                    self.db.execute(
+                        "UPDATE jobs SET state = 'leased', worker = ?, lease_expires = ?, "
+                        "attempts = attempts + 1, updated = ? WHERE id = ?",
+                        (worker, now + LEASE_SECONDS, now, row['id']))
+                self.db.execute('COMMIT')
+            except BaseException:
+                self.db.execute('ROLLBACK')
+                raise
+        return row
+
+    def heartbeat(self, job_id: int, worker: str) -> bool:
+        """Extend a lease; False if the job is no longer ours"""
+        cursor = self._write(
+            "UPDATE jobs SET lease_expires = ?, updated = ? "
+            "WHERE id = ? AND worker = ? AND state = 'leased'",
+            (time.time() + LEASE_SECONDS, time.time(), job_id, worker))
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker: str, result: str) -> None:
+        self._write(
+            "UPDATE jobs SET state = 'done', result = ?, error = NULL, updated = ? "
+            "WHERE id = ? AND worker = ? AND state = 'leased'",
+            (result, time.time(), job_id, worker))
+
+    def fail(self, job_id: int, worker: str, error: str) -> None:
+        """Re-queue the job, or fail it for good after MAX_ATTEMPTS"""
+        self._write(
+            "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+            "error = ?, worker = NULL, updated = ? WHERE id = ? AND worker = ? AND state = 'leased'",
+            (MAX_ATTEMPTS, error[-2000:], time.time(), job_id, worker))
+
+    def reject(self, job_id: int, error: str) -> None:
+        """Fail a done job whose result turned out to be unusable (re-queued on publish)"""
+        self._write(
+            "UPDATE jobs SET state = 'failed', error = ?, updated = ? "
+            "WHERE id = ? AND state = 'done'",
+            (error[-2000:], time.time(), job_id))
+
+    def jobs(self, job_ids: List[int]) -> List[sqlite3.Row]:
+        marks = ','.join('?' * len(job_ids))
+        with self.lock:
+            return self.db.execute(f"SELECT * FROM jobs WHERE id IN ({marks})",
+                                   job_ids).fetchall()
+
+    def blob_refs(self) -> List[str]:
+        """Store digests the queue refers to: job results and segment inputs"""
+        with self.lock:
+            rows = self.db.execute("SELECT kind, payload, result FROM jobs").fetchall()
+        digests = []
+        for row in rows:
+            if row['result']:
+                digests.append(row['result'])
+            if row['kind'] == 'segment':
+                payload = json.loads(row['payload'])
+                digests.extend([payload['image'], payload['subtitles']])
+        return digests
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """{kind: {state: count}}"""
+        counts: Dict[str, Dict[str, int]] = {}
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT kind, state, COUNT(*) AS n FROM jobs GROUP BY kind, state").fetchall()
+        for row in rows:
+            counts.setdefault(row['kind'], {})[row['state']] = row['n']
+        return counts
+
+    def wait(self, job_ids: List[int], label: str, timeout: Optional[float] = None
+             ) -> Tuple[Dict[int, sqlite3.Row], Dict[int, sqlite3.Row]]:
+        """
+        Block until every job is done or has failed for good
+
+        Returns (done, failed), each by id, so the caller can drop only the
+        videos with a failed job. Raises FarmError on timeout.
+        """
+        deadline = time.monotonic() + timeout if timeout else None
+        last = None
+        while True:
+            rows = self.jobs(job_ids) if job_ids else []
+            done = {row['id']: row for row in rows if row['state'] == 'done'}
+            failed = {row['id']: row for row in rows if row['state'] == 'failed'}
+            if (len(done), len(failed)) != last:
+                note = f", {len(failed)} failed" if failed else ''
+                print(f"\r      {label}: {len(done)}/{len(job_ids)} done{note}",
+                      end='', flush=True)
+                last = (len(done), len(failed))
+            if len(done) + len(failed) == len(job_ids):
+                print()
+                for row in failed.values():
+                    print(f"      ✗ {row['kind']} job for {row['video']} {row['unit']} "
+                          f"failed: {row['error']}")
+                return done, failed
+            if deadline and time.monotonic() > deadline:
+                print()
+                raise FarmError(f"Timed out waiting for {label} "
+                                f"({len(done)}/{len(job_ids)} done)")
+            time.sleep(POLL_SECONDS)
+
+
+# ---------------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------------
+
+def run_tts(course_root: Path, store: ContentStore, payload: Dict) -> str:
+    from generate_tts import call_murf_api
+    return store.put_bytes(call_murf_api(payload['text'], rate=payload['rate']))
+
+
+def run_transcribe(course_root: Path, store: ContentStore, payload: Dict) -> str:
+    # Imported here: workers that only encode never load the ASR stack
+    import compile_video
+    from audio_decode import decode_audio, DECODED_DIRNAME
+    from vad import speech_map_for
+
+    audio_path = str(course_root / payload['audio'])
+    video_folder = course_root / payload['video']
+    decoded = decode_audio(audio_path, str(video_folder / '.build' / DECODED_DIRNAME))
+    speech = speech_map_for(decoded) if payload['vad'] else None
+    words = compile_video.transcribe_audio_with_whisper(
+        audio_path, 0.0, model_name=payload['model'], decoded=decoded, speech=speech,
+        backend=payload['backend'], profile=payload['profile'])
+    return store.put_bytes(words.to_bytes())
+
+
+def run_segment(course_root: Path, store: ContentStore, payload: Dict) -> str:
+    work_dir = tempfile.mkdtemp(prefix='farm-segment-')
+    try:
+        paths = {
+            IMAGE_TOKEN: os.path.join(work_dir, 'frame.png'),
+            SUBTITLES_TOKEN: os.path.join(work_dir, 'subtitles.srt'),
+            OUTPUT_TOKEN: os.path.join(work_dir, 'segment.mp4'),
+        }
+        store.checkout(payload['image'], paths[IMAGE_TOKEN])
+        store.checkout(payload['subtitles'], paths[SUBTITLES_TOKEN])
+
+        cmd = []
+        for arg in payload['cmd']:
+            for token, path in paths.items():
+                arg = arg.replace(token, path)
+            cmd.append(arg)
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"FFmpeg failed with code {result.returncode}\n{result.stderr[-2000:]}")
+        digest, _ = store.put(paths[OUTPUT_TOKEN])
+        return digest
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+HANDLERS: Dict[str, Callable[[Path, ContentStore, Dict], str]] = {
+    'tts': run_tts,
+    'transcribe': run_transcribe,
+    'segment': run_segment,
+}
+
+
+def run_worker(course_root: str, kinds=JOB_KINDS, worker_id: Optional[str] = None,
+               exit_when_idle: Optional[float] = None) -> int:
+    """
+    Claim and run jobs until stopped (or idle for exit_when_idle seconds)
+
+    Returns the number of jobs completed.
+    """
+    root = Path(course_root).resolve()
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    queue = FarmQueue(str(root))
+    store = ContentStore(str(root))
+    completed = 0
+    idle_since = time.monotonic()
+    print(f"Worker {worker_id} on {root} ({', '.join(kinds)})", flush=True)
+
+    while True:
+        job = queue.claim(worker_id, kinds)
+        if job is None:
+            if exit_when_idle is not None and time.monotonic() - idle_since > exit_when_idle:
+                return completed
+            time.sleep(POLL_SECONDS)
+            continue
+
+        stop = threading.Event()
+
+        def heartbeat(job_id=job['id']):
+            while not stop.wait(HEARTBEAT_SECONDS):
+                if not queue.heartbeat(job_id, worker_id):
+                    return  # Lease lost; our result will be ignored
+
+        beat = threading.Thread(target=heartbeat, daemon=True)
+        beat.start()
+        started = time.monotonic()
+        try:
+            result = HANDLERS[job['kind']](root, store, json.loads(job['payload']))
+            queue.complete(job['id'], worker_id, result)
+            completed += 1
+            print(f"  ✓ {job['kind']} {job['video']} {job['unit']} "
+                  f"({time.monotonic() - started:.1f}s)", flush=True)
+        except Exception as e:
+            queue.fail(job['id'], worker_id, f"{type(e).__name__}: {e}")
+            print(f"  ✗ {job['kind']} {job['video']} {job['unit']}: {e}", flush=True)
+        finally:
+            stop.set()
+            beat.join()
+        idle_since = time.monotonic()
+
+
+# ---------------------------------------------------------------------------
+# Coordinator
+# ---------------------------------------------------------------------------
+
+class FarmSegmentEncoder:
+    """
+    compile_video segment encoder that runs every segment on the farm
+
+    Passed as compile_video(segment_encoder=...); each pending segment is
+    published with its FFmpeg command, image and subtitles, and the encoded
+    segments are checked out of the content store into .build/segments/.
+    """
+
+    def __init__(self, queue: FarmQueue, store: ContentStore, course_root: Path,
+                 video: str, timeout: Optional[float] = None):
+        self.queue = queue
+        self.store = store
+        self.course_root = course_root
+        self.video = video
+        self.timeout = timeout
+
+    def __call__(self, pending: List, subtitle_path: str, crf: int) -> None:
+        from compile_video import build_segment_command, FFmpegError
+
+        with open(subtitle_path, 'rb') as f:
+            subtitles = self.store.put_bytes(f.read())
+
+        job_ids = []
+        for frame, segment_path, key, unit in pending:
+            cmd = build_segment_command(frame, SUBTITLES_TOKEN, OUTPUT_TOKEN, crf)
+            cmd = [IMAGE_TOKEN if arg == frame.image_path else arg for arg in cmd]
+            with open(frame.image_path, 'rb') as f:
+                image = self.store.put_bytes(f.read())
+            job_ids.append(self.queue.publish(
+                'segment', key, self.video, unit,
+                {'cmd': cmd, 'image': image, 'subtitles': subtitles}))
+
+        done, failed = self.queue.wait(job_ids, f"Segments ({self.video})", self.timeout)
+        for job_id, (_, segment_path, _, _) in zip(job_ids, pending):
+            if job_id in done:
+                self.store.checkout(done[job_id]['result'], segment_path)
+        if failed:
+            row = next(iter(failed.values()))
+            raise FFmpegError(f"{len(failed)} segment job(s) failed on the farm, "
+                              f"{row['unit']}: {row['error']}")
+
+
+def publish_tts(queue: FarmQueue, course_root: Path, video_folder: Path) -> List:
+    """Publish a job for every frame whose audio is missing or out of date"""
+    import generate_tts
+    from atomic_io import Journal
+
+    frames = generate_tts.parse_script(str(video_folder / 'script.md'))
+    journal = Journal(str(video_folder))
+    video = str(video_folder.relative_to(course_root))
+    jobs = []
+    for frame in frames:
+        key = generate_tts.synthesis_key(frame)
+        unit = f"frame_{frame.number}"
+        if journal.is_done('tts', unit, key, str(video_folder / 'audio' / f"{unit}.mp3")):
+            continue
+        job_id = queue.publish('tts', key, video, unit,
+                               {'text': frame.text, 'rate': generate_tts.SPEAKING_RATE})
+        jobs.append((job_id, video_folder, frame, key))
+    return jobs
+
+
+def collect_tts(queue: FarmQueue, store: ContentStore, jobs: List,
+                timeout: Optional[float]) -> List[Path]:
+    """
+    Check synthesized audio out into audio/, fit durations and journal each frame
+
+    A job that failed for good, or whose audio cannot be decoded or fitted
+    (it is failed, and re-queued by the next run), does not stop the others.
+    Returns the video folders that have such a frame.
+    """
+    import generate_tts
+    from atomic_io import Journal
+    from audio_decode import AudioDecodeError
+    from duration_fit import (update_manifest, DurationFitError, DURATION_TOLERANCE,
+                              MAX_STRETCH_RATIO)
+
+    done, rejected = queue.wait([job_id for job_id, _, _, _ in jobs], "TTS", timeout)
+    failed = []
+    by_video: Dict[Path, List] = {}
+    for job_id, video_folder, frame, key in jobs:
+        if job_id in rejected:
+            if video_folder not in failed:
+                failed.append(video_folder)
+            continue
+        by_video.setdefault(video_folder, []).append((job_id, done[job_id]['result'], frame, key))
+
+    for video_folder, frames in by_video.items():
+        journal = Journal(str(video_folder))
+        audio_dir = video_folder / 'audio'
+        audio_dir.mkdir(exist_ok=True)
+        entries = {}
+        for job_id, digest, frame, key in frames:
+            output_path = str(audio_dir / f"frame_{frame.number}.mp3")
+            store.checkout(digest, output_path)
+            try:
+                entries[frame.number] = generate_tts.fit_duration(
+                    frame, str(video_folder), MAX_STRETCH_RATIO, resynthesize=False)
+            except (AudioDecodeError, DurationFitError) as e:
+                print(f"      ✗ {video_folder.name} frame_{frame.number}.mp3: {e}")
+                queue.reject(job_id, str(e))
+                if video_folder not in failed:
+                    failed.append(video_folder)
+                continue
+            journal.record('tts', f"frame_{frame.number}", key, output_path)
+        if entries:
+            update_manifest(str(audio_dir), entries, voice=generate_tts.VOICE_ID,
+                            style=generate_tts.VOICE_STYLE, tolerance=DURATION_TOLERANCE,
+                            max_ratio=MAX_STRETCH_RATIO)
+    return failed
+
+
+def publish_transcriptions(queue: FarmQueue, course_root: Path, video_folder: Path,
+                           asr_backend: str, asr_profile: str) -> List:
+    """Publish a job for every frame without a cached transcript"""
+    import io
+    import contextlib
+    import compile_video
+
+    frames = compile_video.parse_script(str(video_folder / 'script.md'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        compile_video.validate_input_files(str(video_folder), frames)
+    cache_dir = video_folder / '.build' / 'transcripts'
+    variant = compile_video.transcript_variant(asr_backend, asr_profile, compile_video.USE_VAD)
+    video = str(video_folder.relative_to(course_root))
+
+    jobs = []
+    for frame in frames:
+        cache_path = compile_video.transcript_cache_path(
+            str(cache_dir), frame.audio_path, compile_video.WHISPER_MODEL, variant)
+        if os.path.exists(cache_path):
+            continue
+        payload = {
+            'video': video,
+            'audio': str(Path(frame.audio_path).resolve().relative_to(course_root)),
+            'model': compile_video.WHISPER_MODEL,
+            'backend': asr_backend,
+            'profile': asr_profile,
+            'vad': compile_video.USE_VAD,
+        }
+        job_id = queue.publish('transcribe', os.path.basename(cache_path), video,
+                               f"frame_{frame.number}", payload)
+        jobs.append((job_id, video_folder, cache_path))
+    return jobs
+
+
+def coordinate(course_root: str, videos: List[str], tts: bool, force: bool,
+               asr_backend: str, asr_profile: str, timeout: Optional[float]) -> int:
+    """Build videos with the farm doing TTS, transcription and segment encoding"""
+    root = Path(course_root).resolve()
+    queue = FarmQueue(str(root))
+    store = ContentStore(str(root))
+    folders = ([Path(root / video).resolve() for video in videos] if videos
+               else list(iter_video_folders(str(root))))
+    folders = [folder for folder in folders if (folder / 'script.md').exists()]
+    if not folders:
+        print(f"Error: No video folders with a script.md under {root}")
+        return 1
+    print(f"Coordinating {len(folders)} video(s) on {root}")
+    try:
+        return _coordinate(queue, store, root, folders, tts, force,
+                           asr_backend, asr_profile, timeout)
+    finally:
+        # Keep job results reusable through content_store.py --gc
+        store.set_refs(FARM_REFS_NAME, queue.blob_refs())
+
+
+def _coordinate(queue: FarmQueue, store: ContentStore, root: Path, folders: List[Path],
+                tts: bool, force: bool, asr_backend: str, asr_profile: str,
+                timeout: Optional[float]) -> int:
+    import compile_video
+
+    failures = 0
+    if tts:
+        print("\n[farm] Narration")
+        jobs = [job for folder in folders for job in publish_tts(queue, root, folder)]
+        print(f"      {len(jobs)} frame(s) to synthesize")
+        rejected = collect_tts(queue, store, jobs, timeout)
+        for folder in rejected:
+            print(f"      ⚠ Skipping {folder.relative_to(root)}: narration audio failed")
+        folders = [folder for folder in folders if folder not in rejected]
+        failures += len(rejected)
+
+    print("\n[farm] Transcription")
+    jobs = []
+    for folder in folders:
+        jobs.extend(publish_transcriptions(queue, root, folder, asr_backend, asr_profile))
+    print(f"      {len(jobs)} frame(s) to transcribe")
+    if jobs:
+        done, failed = queue.wait([job_id for job_id, _, _ in jobs], "Transcripts", timeout)
+        rejected = []
+        for job_id, folder, cache_path in jobs:
+            if job_id in failed:
+                if folder not in rejected:
+                    rejected.append(folder)
+                continue
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            store.checkout(done[job_id]['result'], cache_path)
+        for folder in rejected:
+            print(f"      ⚠ Skipping {folder.relative_to(root)}: transcription failed")
+        folders = [folder for folder in folders if folder not in rejected]
+        failures += len(rejected)
+
+    for folder in folders:
+        print(f"\n[farm] Assembling {folder.relative_to(root)}")
+        encoder = FarmSegmentEncoder(queue, store, root, str(folder.relative_to(root)), timeout)
+        status = compile_video.compile_video(str(folder), force=force, asr_backend=asr_backend,
+                                             asr_profile=asr_profile, segment_encoder=encoder)
+        if status != "SUCCESS":
+            failures += 1
+    return 1 if failures else 0
+
+
+def start_local_workers(course_root: str, count: int) -> List[subprocess.Popen]:
+    """Worker processes on this machine, for small farms and testing"""
+    return [subprocess.Popen([sys.executable, os.path.abspath(__file__), 'worker', course_root,
+                              '--id', f"{socket.gethostname()}:local-{i}"],
+                             stdout=subprocess.DEVNULL)
+            for i in range(count)]
+
+
+def print_status(course_root: str) -> None:
+    counts = FarmQueue(course_root).counts()
+    if not counts:
+        print("Queue is empty")
+    for kind in JOB_KINDS:
+        if kind in counts:
+            states = ', '.join(f"{n} {state}" for state, n in sorted(counts[kind].items()))
+            print(f"  {kind:<11} {states}")
+
+
+def main():
+    """Run a farm worker or coordinator, or show the queue"""
+    from compile_video import ASR_BACKEND, ASR_PROFILE
+
+    parser = argparse.ArgumentParser(description="Distribute builds across render nodes")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    worker = commands.add_parser('worker', help="Claim and run jobs")
+    worker.add_argument('course_root')
+    worker.add_argument('--kinds', nargs='+', choices=JOB_KINDS, default=list(JOB_KINDS),
+                        help="Job kinds this node runs (e.g. only segment on GPU-less boxes)")
+    worker.add_argument('--id', help="Worker name (default host:pid)")
+    worker.add_argument('--exit-when-idle', type=float, metavar='SECONDS',
+                        help="Stop after this long without work")
+
+    coord = commands.add_parser('coordinate', help="Publish jobs and assemble videos")
+    coord.add_argument('course_root')
+    coord.add_argument('videos', nargs='*', help="Week-N/Video-M folders (default: all)")
+    coord.add_argument('--tts', action='store_true', help="Also synthesize missing narration")
+    coord.add_argument('--force', action='store_true', help="Rebuild up-to-date videos")
+    coord.add_argument('--local-workers', type=int, default=0,
+                       help="Also start this many workers on this machine")
+    coord.add_argument('--asr-backend', default=ASR_BACKEND)
+    coord.add_argument('--asr-profile', default=ASR_PROFILE)
+    coord.add_argument('--timeout', type=float, help="Give up on a phase after this many seconds")
+
+    status = commands.add_parser('status', help="Job counts by kind and state")
+    status.add_argument('course_root')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.course_root):
+        print(f"Error: Folder not found: {args.course_root}")
+        sys.exit(1)
+
+    if args.command == 'worker':
+        try:
+            run_worker(args.course_root, args.kinds, args.id, args.exit_when_idle)
+        except KeyboardInterrupt:
+            pass
+    elif args.command == 'status':
+        print_status(args.course_root)
+    else:
+        workers = start_local_workers(args.course_root, args.local_workers)
+        try:
+            code = coordinate(args.course_root, args.videos, args.tts, args.force,
+                              args.asr_backend, args.asr_profile, args.timeout)
+        except FarmError as e:
+            print(f"\n✗ {e}")
+            code = 1
+        finally:
+            for process in workers:
+                process.terminate()
+            for process in workers:
+                process.wait()
+        sys.exit(code)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Streaming script.md Parser
+
+Single line-oriented parser shared by generate_tts.py, compile_video.py and
+the other pipeline scripts. Frames are yielded as soon as their narration
+ends, so memory stays bounded by one frame and parsing is linear even on
+very large multi-video scripts.
+
+Expected format:
+    # Video 1: Title                       (optional, starts a new video)
+
+    ## Frame 0 (0:00-0:15) • 38 words
+
+    [narration text, may span several paragraphs]
+
+    ---
+
+Narration ends at a `---` rule, the next `#`/`##` heading or end of file.
+Malformed frame headers raise ScriptParseError with the exact line and
+column; softer problems (word count or pacing mismatches, gaps in timing)
+are reported as ScriptIssue warnings.
+
+Usage:
+    python3 script_parser.py Week-1/Video-1/script.md
+"""
+
+import os
+import re
+import sys
+from typing import IO, Iterator, List, Optional, Tuple, Union
+
+
+# Pacing target from docs/teaching_style_guide.md: seconds × 2.5 = max words
+TARGET_WORDS_PER_SECOND = 2.5
+PACING_TOLERANCE = 0.2      # Warn when a header exceeds the pace by >20%
+WORD_COUNT_TOLERANCE = 0.1  # Warn when narration exceeds the header by >10%
+
+FRAME_HEADER_PREFIX = '## Frame'
+FRAME_HEADER_PATTERN = re.compile(r'## Frame(\s|$)')
+HEADING_PATTERN = re.compile(r'#{1,6}\s')
+BULLET = '•'
+
+
+class ScriptParseError(ValueError):
+    """Malformed script.md content, with the exact source location"""
+    def __init__(self, message: str, path: str, line: int, column: int):
+        self.message = message
+        self.path = path
+        self.line = line
+        self.column = column
+        super().__init__(f"{path}:{line}:{column}: {message}")
+
+
+class ScriptIssue:
+    """Non-fatal problem found while parsing (reported as a warning)"""
+    def __init__(self, message: str, path: str, line: int, column: int = 1):
+        self.message = message
+        self.path = path
+        self.line = line
+        self.column = column
+
+    def __str__(self):
+        return f"{self.path}:{self.line}:{self.column}: {self.message}"
+
+
+class ScriptFrame:
+    """One frame record as parsed from script.md"""
+    def __init__(self, number: int, start_label: str, end_label: str,
+                 start_time: int, end_time: int, words: int, narration: str,
+                 line: int, video: Optional[str] = None):
+        self.number = number
+        self.start_label = start_label  # "M:SS" exactly as written
+        self.end_label = end_label
+        self.start_time = start_time    # Seconds
+        self.end_time = end_time
+        self.words = words              # Word count declared in the header
+        self.narration = narration      # Raw narration (markdown preserved)
+        self.line = line                # Header line number (1-based)
+        self.video = video              # Enclosing "# Video N: ..." title
+
+    @property
+    def duration(self) -> int:
+        return self.end_time - self.start_time
+
+    def __repr__(self):
+        return f"ScriptFrame({self.number}, {self.start_label}-{self.end_label}, {self.words} words)"
+
+
+def clean_narration_text(text: str) -> str:
+    """Remove markdown formatting and clean narration text"""
+    # Remove markdown bold/italic
+    text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)
+    text = re.sub(r'\*(.+?)\*', r'\1', text)
+
+    # Remove markdown links [text](url)
+    text = re.sub(r'\[(.+?)\]\(.+?\)', r'\1', text)
+
+    # Remove excess whitespace
+    text = ' '.join(text.split())
+
+    return text
+
+
+def count_words(text: str) -> int:
+    """Count spoken words the way script headers do (markdown stripped)"""
+    return len(clean_narration_text(text).split())
+
+
+class _HeaderCursor:
+    """Character cursor over a frame header that reports exact columns"""
+    def __init__(self, text: str, path: str, line: int):
+        self.text = text
+        self.pos = 0
+        self.path = path
+        self.line = line
+
+    def error(self, message: str, pos: Optional[int] = None) -> ScriptParseError:
+        column = (self.pos if pos is None else pos) + 1
+        return ScriptParseError(message, self.path, self.line, column)
+
+    def expect(self, literal: str, what: str) -> None:
+        if not self.text.startswith(literal, self.pos):
+            found = self.text[self.pos:self.pos + len(literal)] or 'end of line'
+            raise self.error(f"expected {what} '{literal}', found '{found}'")
+        self.pos += len(literal)
+
+    def spaces(self, required: bool = False) -> None:
+        start = self.pos
+        while self.pos < len(self.text) and self.text[self.pos] in ' \t':
+            self.pos += 1
+        if required and self.pos == start:
+            raise self.error("expected a space")
+
+    def integer(self, what: str) -> int:
+        start = self.pos
+        while self.pos < len(self.text) and self.text[self.pos].isdigit():
+            self.pos += 1
+        if start == self.pos:
+            raise self.error(f"expected {what}")
+        return int(self.text[start:self.pos])
+
+    def timestamp(self, what: str) -> Tuple[str, int]:
+        """Parse M:SS and return (label, seconds)"""
+        start = self.pos
+        minutes = self.integer(f"{what} minutes")
+        self.expect(':', f"':' in {what}")
+        seconds_pos = self.pos
+        seconds = self.integer(f"{what} seconds")
+        if self.pos - seconds_pos != 2 or seconds >= 60:
+            raise self.error(f"invalid seconds in {what}: must be 00-59", seconds_pos)
+        return self.text[start:self.pos], minutes * 60 + seconds
+
+
+def parse_frame_header(text: str, path: str, line: int) -> Tuple[int, str, int, str, int, int]:
+    """
+    Parse `## Frame N (M:SS-M:SS) • NN words`
+
+    Returns (number, start_label, start_seconds, end_label, end_seconds, words)
+    Raises ScriptParseError pointing at the first offending column.
+    """
+    cursor = _HeaderCursor(text.rstrip(), path, line)
+    cursor.expect(FRAME_HEADER_PREFIX, 'frame header')
+    cursor.spaces(required=True)
+    number = cursor.integer('frame number')
+    cursor.spaces()
+    cursor.expect('(', 'time range')
+    start_label, start = cursor.timestamp('start time')
+    cursor.expect('-', 'time range separator')
+    end_pos = cursor.pos
+    end_label, end = cursor.timestamp('end time')
+    cursor.expect(')', 'end of time range')
+    cursor.spaces()
+    cursor.expect(BULLET, 'bullet')
+    cursor.spaces()
+    words_pos = cursor.pos
+    words = cursor.integer('word count')
+    cursor.spaces(required=True)
+    if cursor.text.startswith('words', cursor.pos):
+        cursor.pos += len('words')
+    else:
+        cursor.expect('word', 'unit')
+    if cursor.pos != len(cursor.text):
+        raise cursor.error(f"unexpected text after header: '{cursor.text[cursor.pos:]}'")
+
+    if end <= start:
+        raise ScriptParseError(f"end time {end_label} must be after start time {start_label}",
+                               path, line, end_pos + 1)
+    if words == 0:
+        raise ScriptParseError("word count must be positive", path, line, words_pos + 1)
+
+    return number, start_label, start, end_label, end, words
+
+
+def _validate_frame(frame: ScriptFrame, path: str, issues: List[ScriptIssue]) -> None:
+    """
+    Check header timing against the header word budget, and the narration
+    against that budget (headers give the maximum word count for the frame)
+    """
+    max_words = frame.duration * TARGET_WORDS_PER_SECOND
+    if frame.words > max_words * (1 + PACING_TOLERANCE):
+        issues.append(ScriptIssue(
+            f"Frame {frame.number}: {frame.words} words in {frame.duration}s is "
+            f"{frame.words / frame.duration:.1f} words/second "
+            f"(target {TARGET_WORDS_PER_SECOND}, max {int(max_words)} words)",
+            path, frame.line))
+
+    actual_words = count_words(frame.narration)
+    if actual_words > frame.words * (1 + WORD_COUNT_TOLERANCE):
+        issues.append(ScriptIssue(
+            f"Frame {frame.number}: narration has {actual_words} words, "
+            f"header allows {frame.words}", path, frame.line))
+
+
+def iter_frames(source: Union[str, IO[str]], path: Optional[str] = None,
+                issues: Optional[List[ScriptIssue]] = None) -> Iterator[ScriptFrame]:
+    """
+    Stream frame records from a script
+
+    Args:
+        source: Path to script.md or an open text stream
+        path: Name used in error messages (defaults to the source path)
+        issues: Optional list that collects ScriptIssue warnings
+
+    Yields ScriptFrame objects in file order.
+    """
+    if isinstance(source, str):
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"Script file not found: {source}")
+        with open(source, 'r', encoding='utf-8-sig') as f:
+            yield from iter_frames(f, path or source, issues)
+        return
+
+    path = path or getattr(source, 'name', '<script>')
+    if issues is None:
+        issues = []
+
+    video = None
+    seen_numbers = {}
+    previous = None
+
+    header = None       # (number, start_label, start, end_label, end, words, line)
+    body: List[str] = []
+
+    def finish() -> ScriptFrame:
+        number, start_label, start, end_label, end, words, line = header
+        narration = '\n'.join(body).strip()
+        if not narration:
+            raise ScriptParseError(f"Frame {number} has no narration", path, line, 1)
+        return ScriptFrame(number, start_label, end_label, start, end, words,
+                           narration, line, video)
+
+    for lineno, raw_line in enumerate(source, 1):
+        text = raw_line.rstrip('\r\n')
+
+        is_heading = HEADING_PATTERN.match(text) is not None
+        if header is not None and (is_heading or text.startswith('---')):
+            frame = finish()
+            header = None
+            body = []
+            _validate_frame(frame, path, issues)
+            previous = frame
+            yield frame
+
+        if FRAME_HEADER_PATTERN.match(text):
+            parsed = parse_frame_header(text, path, lineno)
+            number, start_label, start = parsed[0], parsed[1], parsed[2]
+
+            key = (video, number)
+            if key in seen_numbers:
+                raise ScriptParseError(
+                    f"duplicate Frame {number} (first defined on line {seen_numbers[key]})",
+                    path, lineno, len(FRAME_HEADER_PREFIX) + 2)
+            seen_numbers[key] = lineno
+
+            if previous is not None and previous.video == video:
+                if number != previous.number + 1:
+                    issues.append(ScriptIssue(
+                        f"Frame {number} follows Frame {previous.number} (numbering gap)",
+                        path, lineno, len(FRAME_HEADER_PREFIX) + 2))
+                if start != previous.end_time:
+                    issues.append(ScriptIssue(
+                        f"Frame {number} starts at {start_label} but Frame "
+                        f"{previous.number} ends at {previous.end_label}",
+                        path, lineno, text.index('(') + 2))
+
+            header = parsed + (lineno,)
+        elif text.startswith('# '):
+            video = text[2:].strip()
+            previous = None
+        elif header is not None:
+            body.append(text)
+
+    if header is not None:
+        frame = finish()
+        _validate_frame(frame, path, issues)
+        yield frame
+
+
+def parse_script_frames(source: Union[str, IO[str]]) -> Tuple[List[ScriptFrame], List[ScriptIssue]]:
+    """Parse a whole script, returning (frames, warnings)"""
+    issues: List[ScriptIssue] = []
+    frames = list(iter_frames(source, issues=issues))
+    return frames, issues
+
+
+def main():
+    """Validate one or more scripts and print a frame summary"""
+    if len(sys.argv) < 2:
+        print("Usage: python3 script_parser.py <path_to_script.md> [...]")
+        sys.exit(1)
+
+    exit_code = 0
+    for script_path in sys.argv[1:]:
+        try:
+            frames, issues = parse_script_frames(script_path)
+        except (ScriptParseError, FileNotFoundError) as e:
+            print(f"✗ {e}")
+            exit_code = 1
+            continue
+
+        total_words = sum(count_words(f.narration) for f in frames)
+        duration = frames[-1].end_time if frames else 0
+        print(f"✓ {script_path}: {len(frames)} frames, {total_words} words, {duration}s")
+        for issue in issues:
+            print(f"  ⚠ {issue}")
+
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
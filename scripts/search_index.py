@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Course Search Index
+
+Inverted index over every video's script.md narration (via script_parser)
+and subtitles.srt cues, so a concept like "Keynes" or "actuarial" can be
+found across the whole course without grepping.
+
+Each term maps to the frames and subtitle cues it occurs in, and results
+come back as deep links into the compiled video:
+
+    Week-1/Video-1/final_video.mp4#t=14.64   Frame 2   John Maynard Keynes, one of ...
+
+The index is stored in `.search_index.json` at the course root, one section
+per source file. Only files whose size or mtime changed are re-parsed, so
+updating after editing one script takes milliseconds, and queries are a
+handful of dictionary lookups per file.
+
+Frame matches use the actual frame start times written by compile_video.py
+(.build/timeline.json). Before a video is compiled they are computed the
+same way, from the measured length of each frame's audio. Without audio
+there are no times: narration matches are listed without a link, and
+subtitles cannot be indexed.
+
+Usage:
+    python3 search_index.py /path/to/course keynes
+    python3 search_index.py /path/to/course "black swan" --limit 5
+    python3 search_index.py /path/to/course --rebuild
+    python3 search_index.py /path/to/course --terms 20      # Most widespread terms
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from script_parser import iter_frames, clean_narration_text, ScriptParseError
+from audio_decode import decode_audio, AudioDecodeError, DECODED_DIRNAME
+from subtitles import read_srt, FUNCTION_WORDS
+from content_store import iter_video_folders, write_file_atomic
+
+
+INDEX_FILENAME = '.search_index.json'
+INDEX_VERSION = 2
+TIMELINE_PATH = os.path.join('.build', 'timeline.json')  # Written by compile_video.py
+VIDEO_FILENAME = 'final_video.mp4'
+SOURCE_FILES = ('script.md', 'subtitles.srt')
+TERM_PATTERN = re.compile(r"[a-z0-9]+(?:['’][a-z]+)?")
+SNIPPET_LENGTH = 90
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word terms (possessives kept with their word)"""
+    return TERM_PATTERN.findall(text.lower().replace('’', "'"))
+
+
+def normalize_term(term: str) -> str:
+    """Index key for a term: strip possessive 's so "Keynes's" finds "Keynes" """
+    return term[:-2] if term.endswith("'s") else term
+
+
+def contains_phrase(text: str, terms: List[str]) -> bool:
+    """Whether text has the normalized terms as consecutive words"""
+    words = [normalize_term(t) for t in tokenize(text)]
+    return any(words[i:i + len(terms)] == terms for i in range(len(words) - len(terms) + 1))
+
+
+class TimelineError(ValueError):
+    """A video's frame times cannot be determined"""
+    pass
+
+
+def load_timeline(video_folder: Path) -> Dict[int, float]:
+    """
+    Frame number -> start time in final_video.mp4
+
+    Uses the actual times from compilation when available, otherwise sums
+    the measured durations of the frames' audio (as compile_video.py does).
+    Raises TimelineError if a frame's audio is missing or cannot be decoded.
+    """
+    try:
+        with open(video_folder / TIMELINE_PATH, 'r', encoding='utf-8') as f:
+            return {entry['frame']: entry['start'] for entry in json.load(f)}
+    except (OSError, ValueError, KeyError):
+        pass
+
+    decoded_dir = str(video_folder / '.build' / DECODED_DIRNAME)
+    timeline = {}
+    current = 0.0
+    for frame in iter_frames(str(video_folder / 'script.md')):
+        audio_path = video_folder / 'audio' / f"frame_{frame.number}.mp3"
+        if not audio_path.exists():
+            raise TimelineError(f"no {TIMELINE_PATH} and no audio for frame {frame.number} "
+                                f"- generate the audio or compile the video")
+        try:
+            duration = decode_audio(str(audio_path), decoded_dir).duration
+        except AudioDecodeError as e:
+            raise TimelineError(f"no {TIMELINE_PATH} and frame {frame.number}'s audio "
+                                f"could not be measured ({e})")
+        timeline[frame.number] = round(current, 3)
+        current += duration
+    return timeline
+
+
+def frame_at(timeline: List[Tuple[float, int]], seconds: float) -> Optional[int]:
+    """Frame whose actual time range contains seconds (timeline sorted by start)"""
+    frame = None
+    for start, number in timeline:
+        if start > seconds:
+            break
+        frame = number
+    return frame
+
+
+def index_documents(docs: List[List]) -> Dict[str, List[int]]:
+    """Postings for a list of [frame, time, text] documents"""
+    terms: Dict[str, List[int]] = {}
+    for doc_id, (_, _, text) in enumerate(docs):
+        for term in set(normalize_term(t) for t in tokenize(text)):
+            terms.setdefault(term, []).append(doc_id)
+    return terms
+
+
+def parse_source(path: Path, video_folder: Path) -> Tuple[str, List[List]]:
+    """
+    Parse one source file into (kind, documents)
+
+    Documents are [frame number or None, seconds into final video or None,
+    text]. Narration is indexed without times if they cannot be measured;
+    subtitle cues need them to find their frame (TimelineError).
+    """
+    if path.name == 'script.md':
+        try:
+            timeline = load_timeline(video_folder)
+        except TimelineError:
+            timeline = {}
+        docs = [[frame.number, timeline.get(frame.number),
+                 clean_narration_text(frame.narration)]
+                for frame in iter_frames(str(path))]
+        return 'frame', docs
+
+    timeline = load_timeline(video_folder)
+    by_start = sorted((start, number) for number, start in timeline.items())
+    docs = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for cue in read_srt(f):
+            # Cues never span frames; the midpoint is safe from rounding at
+            # the frame's start
+            docs.append([frame_at(by_start, (cue.start + cue.end) / 2), round(cue.start, 3),
+                         ' '.join(cue.lines)])
+    return 'cue', docs
+
+
+class SearchIndex:
+    """Persistent per-file inverted index over a course's videos"""
+
+    def __init__(self, course_root: str):
+        self.root = Path(course_root).resolve()
+        self.index_path = self.root / INDEX_FILENAME
+        self.files: Dict[str, Dict] = {}
+        self.dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == INDEX_VERSION:
+            self.files = data.get('files', {})
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        data = {'version': INDEX_VERSION, 'files': self.files}
+        write_file_atomic(str(self.index_path),
+                          json.dumps(data, ensure_ascii=False,
+                                     separators=(',', ':')).encode('utf-8'))
+        self.dirty = False
+
+    def iter_sources(self) -> Iterator[Tuple[Path, Path]]:
+        """(video folder, source file) for every indexable file in the course"""
+        for video_folder in iter_video_folders(str(self.root)):
+            for name in SOURCE_FILES:
+                path = video_folder / name
+                if path.is_file():
+                    yield video_folder, path
+
+    @staticmethod
+    def _signature(path: Path, video_folder: Path) -> List[int]:
+        """size/mtime of the source plus the files its timestamps depend on"""
+        signature = []
+        for dependency in (path, video_folder / TIMELINE_PATH, video_folder / 'script.md',
+                           video_folder / 'audio'):
+            if dependency.exists():
+                stat = dependency.stat()
+                signature += [stat.st_size, stat.st_mtime_ns]
+        return signature
+
+    def update(self, rebuild: bool = False) -> Tuple[int, int]:
+        """
+        Re-index new or changed sources and drop deleted ones
+
+        Returns (reindexed, removed).
+        """
+        if rebuild:
+            self.files = {}
+            self.dirty = True
+
+        seen = set()
+        reindexed = 0
+        for video_folder, path in self.iter_sources():
+            rel_path = path.relative_to(self.root).as_posix()
+            seen.add(rel_path)
+            signature = self._signature(path, video_folder)
+            entry = self.files.get(rel_path)
+            if entry and entry['signature'] == signature:
+                continue
+
+            try:
+                kind, docs = parse_source(path, video_folder)
+            except (ScriptParseError, ValueError, OSError) as e:
+                print(f"  ⚠ Skipping {rel_path}: {e}")
+                continue
+            self.files[rel_path] = {
+                'signature': signature,
+                'video': video_folder.relative_to(self.root).as_posix(),
+                'kind': kind,
+                'docs': docs,
+                'terms': index_documents(docs),
+            }
+            reindexed += 1
+            self.dirty = True
+
+        removed = [rel_path for rel_path in self.files if rel_path not in seen]
+        for rel_path in removed:
+            del self.files[rel_path]
+            self.dirty = True
+        return reindexed, len(removed)
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Find frames and cues containing every term of the query
+
+        For multi-word queries, results with the words as a phrase come
+        first. Then results are ordered by video and time, and subtitle cues
+        (exact timestamps) are listed before whole-frame matches.
+        """
+        terms = [normalize_term(t) for t in tokenize(query)]
+        if not terms:
+            return []
+
+        results = []
+        for rel_path, entry in self.files.items():
+            postings = [entry['terms'].get(term) for term in terms]
+            if not all(postings):
+                continue
+            doc_ids = set(postings[0]).intersection(*postings[1:])
+            for doc_id in doc_ids:
+                frame, seconds, text = entry['docs'][doc_id]
+                results.append({
+                    'video': entry['video'],
+                    'kind': entry['kind'],
+                    'frame': frame,
+                    'time': seconds,
+                    'text': text,
+                    'phrase': len(terms) > 1 and contains_phrase(text, terms),
+                    'link': (f"{entry['video']}/{VIDEO_FILENAME}#t={seconds:.2f}"
+                             if seconds is not None else f"{entry['video']}/script.md"),
+                })
+
+        results.sort(key=lambda r: (not r['phrase'], r['video'], r['kind'] != 'cue',
+                                    r['time'] if r['time'] is not None else float('inf'),
+                                    r['frame'] if r['frame'] is not None else -1))
+        return results[:limit] if limit else results
+
+    def term_videos(self) -> Dict[str, set]:
+        """
+        Content term -> set of videos it is narrated in
+
+        For glossary and consistency checks (e.g. a term defined in one video
+        and used undefined in five others).
+        """
+        videos: Dict[str, set] = {}
+        for entry in self.files.values():
+            if entry['kind'] != 'frame':
+                continue
+            for term in entry['terms']:
+                if len(term) > 2 and not term.isdigit() and term not in FUNCTION_WORDS:
+                    videos.setdefault(term, set()).add(entry['video'])
+        return videos
+
+
+def snippet(text: str, query: str) -> str:
+    """Short excerpt of text around the first query term"""
+    terms = tokenize(query)
+    lower = text.lower()
+    position = lower.find(terms[0]) if terms else -1
+    start = max(0, position - SNIPPET_LENGTH // 3) if position >= 0 else 0
+    if start:
+        # Begin on a word boundary
+        space = text.find(' ', start, position)
+        start = space + 1 if space >= 0 else position
+    excerpt = text[start:start + SNIPPET_LENGTH].replace('\n', ' ')
+    return ('…' if start else '') + excerpt + ('…' if start + SNIPPET_LENGTH < len(text) else '')
+
+
+def main():
+    """Update the course index and run a query"""
+    parser = argparse.ArgumentParser(description="Search narration and subtitles across a course")
+    parser.add_argument('course_folder', help="Course root containing Week-N/Video-M folders")
+    parser.add_argument('query', nargs='?', help="Words or phrase to find")
+    parser.add_argument('--limit', type=int, default=20, help="Max results (default 20)")
+    parser.add_argument('--rebuild', action='store_true', help="Re-index every file")
+    parser.add_argument('--terms', type=int, metavar='N',
+                        help="List the N terms narrated in the most videos")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.course_folder):
+        print(f"Error: Folder not found: {args.course_folder}")
+        sys.exit(1)
+
+    index = SearchIndex(args.course_folder)
+    reindexed, removed = index.update(args.rebuild)
+    index.save()
+    if reindexed or removed:
+        print(f"✓ Index updated: {reindexed} file(s) re-indexed, {removed} removed "
+              f"({len(index.files)} total)")
+
+    if args.terms:
+        ranked = sorted(index.term_videos().items(), key=lambda item: (-len(item[1]), item[0]))
+        for term, videos in ranked[:args.terms]:
+            print(f"  {term:<24} {len(videos)} video(s)")
+
+    if not args.query:
+        return
+
+    results = index.search(args.query, args.limit)
+    if not results:
+        print(f"No matches for \"{args.query}\"")
+        return
+    for result in results:
+        label = f"Frame {result['frame']}" if result['frame'] is not None else "—"
+        print(f"{result['link']:<48} {label:<9} {snippet(result['text'], args.query)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Subtitle Generation Engine
+
+Turns aligned word timings (script text + Whisper timing) into subtitle cues
+and streams them out as SRT, WebVTT or ASS.
+
+Cue and line breaks are chosen by dynamic programming rather than greedy
+filling. Each candidate cue is scored on:
+- Line balance (two similar-length lines read better than 40 + 2 chars)
+- Break quality (sentence ends > clause punctuation > pauses > mid-phrase;
+  never end a cue or line on "the", "of", "and", ...)
+- Reading speed (characters per second above MAX_CHARS_PER_SECOND)
+- Cue duration (MIN_CUE_DURATION to MAX_CUE_DURATION)
+
+A cue holds at most MAX_LINES × MAX_CHARS_PER_LINE characters, so each word
+only looks back over a bounded window and the whole pass is linear in the
+number of words.
+"""
+
+import os
+import re
+from typing import IO, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from atomic_io import atomic_output
+
+
+MAX_CHARS_PER_LINE = 42
+MAX_LINES = 2
+MAX_CHARS_PER_SECOND = 17.0   # Comfortable adult reading speed
+MIN_CUE_DURATION = 1.0        # Seconds (see docs/video_compilation_spec.md)
+MAX_CUE_DURATION = 7.0
+
+# Break-quality penalties (lower is a better place to end a cue or line)
+PENALTY_SENTENCE_END = 0.0
+PENALTY_CLAUSE_END = 15.0
+PENALTY_MID_PHRASE = 40.0
+PENALTY_FUNCTION_WORD = 120.0
+PAUSE_BONUS_SECONDS = 0.35    # A pause this long after a word is a natural break
+PENALTY_PER_CUE = 25.0        # Prefer fewer, fuller cues
+WEIGHT_LINE_BALANCE = 0.15
+WEIGHT_READING_SPEED = 8.0
+WEIGHT_DURATION = 20.0
+WEIGHT_SHORT_CUE = 80.0       # Per second a cue's words fall short of MIN_CUE_DURATION
+
+SUBTITLE_FORMATS = ('srt', 'vtt', 'ass')
+
+FUNCTION_WORDS = frozenset("""
+    a an the of to in on at by for with from into onto and or but nor so as
+    than that which who whose whom this these those its their our your my his
+    her is are was were be been being has have had do does did will would can
+    could should may might must not no if then when while because although
+""".split())
+
+SENTENCE_END = re.compile(r'[.!?]["\')\]]*$')
+CLAUSE_END = re.compile(r'[,;:–—-]["\')\]]*$')
+
+# Keep in sync with compile_video.SUBTITLE_STYLE (burned-in look)
+ASS_STYLE = ("Style: Default,Arial,18,&H00FFFFFF,&H00FFFFFF,&H00000000,&H80000000,"
+             "0,0,0,0,100,100,0,0,4,2,1,2,10,10,50,1")
+
+
+class Cue:
+    """One subtitle cue: timing plus already-broken lines"""
+    __slots__ = ('start', 'end', 'lines')
+
+    def __init__(self, start: float, end: float, lines: List[str]):
+        self.start = start
+        self.end = end
+        self.lines = lines
+
+    @property
+    def text(self) -> str:
+        return '\n'.join(self.lines)
+
+    def __repr__(self):
+        return f"Cue({self.start:.2f}-{self.end:.2f}, {self.lines!r})"
+
+
+def break_penalty(word: str, pause_after: float) -> float:
+    """Cost of ending a cue or line after this word"""
+    bare = word.lower().strip('"\'()[]')
+    if SENTENCE_END.search(word):
+        penalty = PENALTY_SENTENCE_END
+    elif CLAUSE_END.search(word):
+        penalty = PENALTY_CLAUSE_END
+    elif bare in FUNCTION_WORDS:
+        penalty = PENALTY_FUNCTION_WORD
+    else:
+        penalty = PENALTY_MID_PHRASE
+    if pause_after >= PAUSE_BONUS_SECONDS:
+        penalty *= 0.5
+    return penalty
+
+
+def layout_lines(prefix: Sequence[int], penalties: Sequence[float], first: int, last: int,
+                 max_chars: int, max_lines: int) -> Optional[Tuple[float, List[int]]]:
+    """
+    Choose line breaks for the words first..last-1 of a run
+
+    Args:
+        prefix: prefix[k] = total characters of words[:k] (no spaces)
+        penalties: break_penalty() of each word
+        first, last: Word range of the cue
+        max_chars: Maximum characters per line
+        max_lines: Maximum lines per cue
+
+    Returns (cost, line_end_indices) with indices relative to first, or None
+    if the words cannot fit. A single word longer than max_chars gets a line
+    of its own.
+    """
+    def width(a: int, b: int) -> int:
+        return prefix[b] - prefix[a] + (b - a - 1)
+
+    n = last - first
+    total = width(first, last)
+    if total <= max_chars or n == 1:
+        # A single word too long for a line (e.g. a URL) overflows on its own
+        return 0.0, [n]
+    if max_lines < 2:
+        return None
+
+    target = total / min(max_lines, n)
+
+    if max_lines == 2:
+        # Common case: one split point, scanned directly
+        best_cost, best_split = None, None
+        for k in range(first + 1, last):
+            w1, w2 = width(first, k), width(k, last)
+            if w2 > max_chars and last - k > 1:
+                continue
+            if w1 > max_chars and k - first > 1:
+                break
+            cost = (WEIGHT_LINE_BALANCE * ((w1 - target) ** 2 + (w2 - target) ** 2) +
+                    penalties[k - 1])
+            if best_cost is None or cost < best_cost:
+                best_cost, best_split = cost, k
+        if best_cost is None:
+            return None
+        return best_cost, [best_split - first, n]
+
+    # General case: best[k][j] is the cheapest layout of words[:j] in k lines
+    inf = float('inf')
+    best = [[inf] * (n + 1) for _ in range(max_lines + 1)]
+    back = [[0] * (n + 1) for _ in range(max_lines + 1)]
+    best[0][0] = 0.0
+    for k in range(1, max_lines + 1):
+        for j in range(1, n + 1):
+            for i in range(j - 1, -1, -1):
+                line_width = width(first + i, first + j)
+                if line_width > max_chars and i < j - 1:
+                    break
+                if best[k - 1][i] == inf:
+                    continue
+                cost = best[k - 1][i] + WEIGHT_LINE_BALANCE * (line_width - target) ** 2
+                if j < n:
+                    cost += penalties[first + j - 1]
+                if cost < best[k][j]:
+                    best[k][j] = cost
+                    back[k][j] = i
+
+    lines = min(range(1, max_lines + 1), key=lambda k: best[k][n])
+    if best[lines][n] == inf:
+        return None
+
+    ends = []
+    j = n
+    for k in range(lines, 0, -1):
+        ends.append(j)
+        j = back[k][j]
+    return best[lines][n], ends[::-1]
+
+
+def build_cues(words: Iterable[Tuple[str, float, float]],
+               end_limit: Optional[float] = None,
+               max_chars_per_line: int = MAX_CHARS_PER_LINE,
+               max_lines: int = MAX_LINES) -> List[Cue]:
+    """
+    Break one run of timed words (usually one frame) into subtitle cues
+
+    Args:
+        words: (word, start, end) tuples, e.g. a WordTimingTable
+        end_limit: Latest time a cue may be extended to (e.g. frame end)
+        max_chars_per_line: Maximum characters per line
+        max_lines: Maximum lines per cue
+
+    Returns cues in time order.
+    """
+    tokens = [(w.strip(), s, e) for w, s, e in words if w.strip()]
+    n = len(tokens)
+    if n == 0:
+        return []
+
+    prefix = [0]
+    for w, _, _ in tokens:
+        prefix.append(prefix[-1] + len(w))
+    pauses = [tokens[i + 1][1] - tokens[i][2] for i in range(n - 1)] + [float('inf')]
+    penalties = [break_penalty(tokens[i][0], pauses[i]) for i in range(n)]
+    capacity = max_lines * max_chars_per_line + (max_lines - 1)
+
+    inf = float('inf')
+    best = [inf] * (n + 1)
+    back = [0] * (n + 1)
+    layouts = [None] * (n + 1)
+    best[0] = 0.0
+
+    for j in range(1, n + 1):
+        end_time = tokens[j - 1][2]
+        end_cost = penalties[j - 1] if j < n else 0.0
+        for i in range(j - 1, -1, -1):
+            chars = prefix[j] - prefix[i] + (j - i - 1)
+            if chars > capacity and i < j - 1:
+                break
+            if best[i] == inf:
+                continue
+
+            span = end_time - tokens[i][1]
+            cost = best[i] + PENALTY_PER_CUE + end_cost
+            if cost >= best[j]:
+                continue
+
+            layout = layout_lines(prefix, penalties, i, j, max_chars_per_line, max_lines)
+            if layout is None:
+                continue
+            layout_cost, line_ends = layout
+            cost += layout_cost
+
+            shown = max(span, MIN_CUE_DURATION)
+            cost += WEIGHT_READING_SPEED * max(0.0, chars / shown - MAX_CHARS_PER_SECOND) ** 2
+            if span > MAX_CUE_DURATION and j - i > 1:
+                cost += WEIGHT_DURATION * (span - MAX_CUE_DURATION) ** 2
+            elif span < MIN_CUE_DURATION:
+                cost += WEIGHT_SHORT_CUE * (MIN_CUE_DURATION - span)
+
+            if cost < best[j]:
+                best[j] = cost
+                back[j] = i
+                layouts[j] = line_ends
+
+    # Walk back through the chosen cue boundaries
+    spans = []
+    j = n
+    while j > 0:
+        i = back[j]
+        spans.append((i, j, layouts[j]))
+        j = i
+    spans.reverse()
+
+    cues = []
+    for i, j, line_ends in spans:
+        lines = []
+        line_start = i
+        for line_end in line_ends:
+            lines.append(' '.join(w for w, _, _ in tokens[line_start:i + line_end]))
+            line_start = i + line_end
+        cues.append(Cue(tokens[i][1], tokens[j - 1][2], lines))
+
+    apply_min_duration(cues, end_limit)
+    return cues
+
+
+def apply_min_duration(cues: List[Cue], end_limit: Optional[float] = None) -> None:
+    """Extend short cues up to MIN_CUE_DURATION without overlapping the next cue"""
+    for index, cue in enumerate(cues):
+        limit = cues[index + 1].start if index + 1 < len(cues) else end_limit
+        wanted = cue.start + MIN_CUE_DURATION
+        if cue.end < wanted:
+            cue.end = wanted if limit is None else max(cue.end, min(wanted, limit))
+
+
+def iter_frame_cues(frames: Iterable) -> Iterator[Cue]:
+    """
+    Yield cues for every frame with aligned words, frame by frame
+
+    Cues never cross a frame boundary, and consecutive cues never overlap.
+    Frames with a speech map (vad.py) have word ends trimmed to their speech
+    region, and their cues end when the narration does, not at a silent tail.
+    """
+    previous = None
+    for frame in frames:
+        if not frame.aligned_words:
+            continue
+        words = frame.aligned_words
+        end_limit = frame.actual_end_time
+        speech = getattr(frame, 'speech', None)
+        if speech is not None:
+            words = list(speech.clamp_words(words, frame.actual_start_time))
+            end_limit = min(end_limit, frame.actual_start_time + speech.speech_end)
+        for cue in build_cues(words, end_limit=end_limit):
+            if previous is not None and previous.end > cue.start:
+                previous.end = cue.start
+            if previous is not None:
+                yield previous
+            previous = cue
+    if previous is not None:
+        yield previous
+
+
+# ---------------------------------------------------------------------------
+# Writers (stream one cue at a time)
+# ---------------------------------------------------------------------------
+
+def split_timestamp(seconds: float) -> Tuple[int, int, int, int]:
+    """Split seconds into (hours, minutes, seconds, milliseconds)"""
+    millis = int(round(max(0.0, seconds) * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return hours, minutes, secs, millis
+
+
+def convert_to_srt_timestamp(seconds: float) -> str:
+    """
+    Convert seconds to SRT timestamp format: HH:MM:SS,mmm
+
+    Example: 65.5 -> 00:01:05,500
+    """
+    h, m, s, ms = split_timestamp(seconds)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+
+
+def convert_to_vtt_timestamp(seconds: float) -> str:
+    """WebVTT timestamp: HH:MM:SS.mmm"""
+    h, m, s, ms = split_timestamp(seconds)
+    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
+
+
+def convert_to_ass_timestamp(seconds: float) -> str:
+    """ASS timestamp: H:MM:SS.cc"""
+    h, m, s, ms = split_timestamp(seconds)
+    return f"{h:d}:{m:02d}:{s:02d}.{ms // 10:02d}"
+
+
+def write_srt(cues: Iterable[Cue], f: IO[str]) -> int:
+    """Write cues as SRT; returns the number of entries written"""
+    count = 0
+    for count, cue in enumerate(cues, 1):
+        if count > 1:
+            f.write('\n')
+        f.write(f"{count}\n{convert_to_srt_timestamp(cue.start)} --> "
+                f"{convert_to_srt_timestamp(cue.end)}\n{cue.text}\n")
+    return count
+
+
+def write_vtt(cues: Iterable[Cue], f: IO[str]) -> int:
+    """Write cues as WebVTT; returns the number of cues written"""
+    f.write("WEBVTT\n")
+    count = 0
+    for count, cue in enumerate(cues, 1):
+        text = cue.text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+        f.write(f"\n{count}\n{convert_to_vtt_timestamp(cue.start)} --> "
+                f"{convert_to_vtt_timestamp(cue.end)}\n{text}\n")
+    return count
+
+
+def write_ass(cues: Iterable[Cue], f: IO[str], width: int = 1920, height: int = 1080) -> int:
+    """Write cues as Advanced SubStation Alpha; returns the number of events written"""
+    f.write("[Script Info]\n"
+            "ScriptType: v4.00+\n"
+            f"PlayResX: {width}\n"
+            f"PlayResY: {height}\n"
+            "WrapStyle: 2\n"
+            "\n"
+            "[V4+ Styles]\n"
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, "
+            "OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, "
+            "ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, "
+            "MarginL, MarginR, MarginV, Encoding\n"
+            f"{ASS_STYLE}\n"
+            "\n"
+            "[Events]\n"
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n")
+    count = 0
+    for count, cue in enumerate(cues, 1):
+        # Braces start override blocks in ASS, so keep them out of the text
+        text = '\\N'.join(line.replace('{', '(').replace('}', ')') for line in cue.lines)
+        f.write(f"Dialogue: 0,{convert_to_ass_timestamp(cue.start)},"
+                f"{convert_to_ass_timestamp(cue.end)},Default,,0,0,0,,{text}\n")
+    return count
+
+
+# ---------------------------------------------------------------------------
+# Reading (search index, verification)
+# ---------------------------------------------------------------------------
+
+def parse_srt_timestamp(text: str) -> float:
+    """Parse HH:MM:SS,mmm (or HH:MM:SS.mmm) to seconds"""
+    clock, _, millis = text.strip().replace('.', ',').partition(',')
+    hours, minutes, seconds = (int(part) for part in clock.split(':'))
+    return hours * 3600 + minutes * 60 + seconds + int(millis or 0) / 1000
+
+
+def read_srt(f: IO[str]) -> Iterator[Cue]:
+    """Stream cues back out of an SRT file (numbering is ignored)"""
+    block: List[str] = []
+    for raw_line in f:
+        line = raw_line.rstrip('\r\n').lstrip('\ufeff')
+        if line.strip():
+            block.append(line)
+            continue
+        if block:
+            cue = _srt_block_to_cue(block)
+            if cue is not None:
+                yield cue
+            block = []
+    if block:
+        cue = _srt_block_to_cue(block)
+        if cue is not None:
+            yield cue
+
+
+def _srt_block_to_cue(block: List[str]) -> Optional[Cue]:
+    for i, line in enumerate(block[:2]):
+        if '-->' in line:
+            start, _, end = line.partition('-->')
+            return Cue(parse_srt_timestamp(start), parse_srt_timestamp(end.split()[0]),
+                       block[i + 1:])
+    return None
+
+
+# ---------------------------------------------------------------------------
+
+WRITERS = {
+    'srt': write_srt,
+    'vtt': write_vtt,
+    'ass': write_ass,
+}
+
+
+def write_subtitles(cues: Iterable[Cue], output_path: str, fmt: Optional[str] = None) -> int:
+    """
+    Stream cues to a subtitle file
+
+    Args:
+        cues: Cue iterable (consumed once)
+        output_path: Destination file
+        fmt: 'srt', 'vtt' or 'ass' (defaults to the file extension)
+
+    Returns number of cues written
+    """
+    fmt = (fmt or os.path.splitext(output_path)[1].lstrip('.')).lower()
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported subtitle format: {fmt}")
+    with atomic_output(output_path) as partial:
+        with open(partial, 'w', encoding='utf-8') as f:
+            count = WRITERS[fmt](cues, f)
+    return count
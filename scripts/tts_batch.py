@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Batched TTS Synthesis
+
+Most frames are short (10-30 words), and each Murf request pays its own
+latency, queueing and download. Batching packs consecutive short frames into
+one request with an explicit pause between them:
+
+    <frame 3 text> [pause 2s] <frame 4 text> [pause 2s] <frame 5 text>
+
+The returned audio is decoded once (audio_decode.py), the pauses are found
+as the longest silences between speech regions (vad.py), and each frame is
+cut out of the full-rate PCM (keeping a short piece of each pause as
+leading/trailing silence) and encoded as its own frame_N.mp3.
+
+Every split is verified before anything is written to audio/: there must be
+one clear pause per frame boundary, and each piece's share of the speech
+must match its share of the words. A batch that fails is reported and its
+frames are synthesized one by one as before.
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+from typing import Callable, Dict, List, Tuple
+
+from audio_decode import decode_audio, AudioDecodeError, DECODED_DIRNAME
+from content_store import write_file_atomic
+from vad import detect_speech
+
+
+PAUSE_SECONDS = 2.0             # Pause marker between frames (Murf allows up to 5s)
+PAUSE_MARKER = '[pause {seconds:g}s]'
+MIN_CUT_GAP_SECONDS = 1.2       # A detected silence this long can be a frame boundary
+KEEP_SILENCE_SECONDS = 0.3      # Pause kept on each side of a cut (the rest is dropped)
+BATCH_FRAME_MAX_WORDS = 40      # Longer frames are synthesized on their own
+BATCH_MAX_FRAMES = 8
+BATCH_MAX_CHARS = 3000          # Murf's per-request text limit
+SPEECH_SHARE_TOLERANCE = 1.5    # Allowed ratio between a piece's speech share and word share
+MP3_QUALITY = '2'
+BATCH_DIR = os.path.join('.build', 'tts_batches')
+
+
+class TTSBatchError(Exception):
+    """Batched audio could not be split back into frames"""
+    pass
+
+
+def word_count(text: str) -> int:
+    return len(text.split())
+
+
+def plan_batches(frames: List, max_words: int = BATCH_FRAME_MAX_WORDS,
+                 max_frames: int = BATCH_MAX_FRAMES) -> List[List]:
+    """
+    Group consecutive short frames; every other frame is a batch of one
+
+    Frames need .text (cleaned narration). Order is preserved.
+    """
+    batches: List[List] = []
+    current: List = []
+    for frame in frames:
+        short = word_count(frame.text) <= max_words
+        fits = (len(current) < max_frames
+                and len(batch_text(current + [frame])) <= BATCH_MAX_CHARS)
+        if short and current and fits:
+            current.append(frame)
+            continue
+        if current:
+            batches.append(current)
+        current = [frame] if short else []
+        if not short:
+            batches.append([frame])
+    if current:
+        batches.append(current)
+    return batches
+
+
+def batch_text(frames: List) -> str:
+    """One synthesis request for several frames, separated by pause markers"""
+    separator = f" {PAUSE_MARKER.format(seconds=PAUSE_SECONDS)} "
+    return separator.join(frame.text.strip() for frame in frames)
+
+
+def batch_label(frames: List) -> str:
+    return f"{frames[0].number}-{frames[-1].number}"
+
+
+def find_cuts(regions: List[Tuple[float, float]], count: int) -> List[Tuple[float, float]]:
+    """
+    The count-1 longest silences as (start, end), in time order
+
+    Raises TTSBatchError if there are fewer clear pauses than boundaries.
+    """
+    gaps = [(regions[i + 1][0] - regions[i][1], regions[i][1], regions[i + 1][0])
+            for i in range(len(regions) - 1)]
+    gaps.sort(reverse=True)
+    chosen = gaps[:count - 1]
+    if len(chosen) < count - 1 or (chosen and chosen[-1][0] < MIN_CUT_GAP_SECONDS):
+        clear = sum(1 for gap in gaps if gap[0] >= MIN_CUT_GAP_SECONDS)
+        raise TTSBatchError(f"found {clear} pause(s) for {count - 1} frame boundaries")
+    return sorted((start, end) for _, start, end in chosen)
+
+
+def frame_bounds(pauses: List[Tuple[float, float]], duration: float) -> List[Tuple[float, float]]:
+    """(start, end) of each frame, keeping KEEP_SILENCE_SECONDS of each pause"""
+    starts = [0.0]
+    ends = []
+    for start, end in pauses:
+        middle = (start + end) / 2
+        ends.append(min(start + KEEP_SILENCE_SECONDS, middle))
+        starts.append(max(end - KEEP_SILENCE_SECONDS, middle))
+    ends.append(duration)
+    return list(zip(starts, ends))
+
+
+def verify_split(frames: List, regions: List[Tuple[float, float]],
+                 bounds: List[Tuple[float, float]]) -> None:
+    """Check each piece's share of the speech against its share of the words"""
+    words = [word_count(frame.text) for frame in frames]
+    speech = [sum(max(0.0, min(end, hi) - max(start, lo)) for start, end in regions)
+              for lo, hi in bounds]
+    total_words, total_speech = sum(words), sum(speech)
+    for frame, frame_words, frame_speech in zip(frames, words, speech):
+        if frame_speech <= 0:
+            raise TTSBatchError(f"frame {frame.number} has no speech")
+        ratio = (frame_speech / total_speech) / (frame_words / total_words)
+        if not 1 / SPEECH_SHARE_TOLERANCE <= ratio <= SPEECH_SHARE_TOLERANCE:
+            raise TTSBatchError(f"frame {frame.number} has {frame_speech:.1f}s of speech "
+                                f"for {frame_words} words ({ratio:.2f}× its share)")
+
+
+def cut_audio(pcm_path: str, start: float, end: float, output_path: str) -> None:
+    """Encode [start, end) of a WAV as an MP3 (atomically)"""
+    tmp_path = f"{output_path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    cmd = ['ffmpeg', '-v', 'error', '-nostdin', '-y', '-i', pcm_path,
+           '-ss', f"{start:.4f}", '-t', f"{end - start:.4f}",
+           '-c:a', 'libmp3lame', '-q:a', MP3_QUALITY, '-f', 'mp3', tmp_path]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise TTSBatchError(f"could not cut {os.path.basename(output_path)}: "
+                                f"{result.stderr.strip()[-300:]}")
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def synthesize_batch(frames: List, audio_dir: str,
+                     synthesize: Callable[[str], bytes]) -> Dict[int, Tuple[float, float]]:
+    """
+    Synthesize several frames in one request and write their frame_N.mp3 files
+
+    synthesize(text) returns MP3 bytes (generate_tts.call_murf_api). Nothing
+    in audio_dir changes unless the whole split verifies. Returns each
+    frame's (start, end) in the batch audio.
+    """
+    video_folder = os.path.dirname(os.path.abspath(audio_dir))
+    work_dir = os.path.join(video_folder, BATCH_DIR, batch_label(frames))
+    os.makedirs(work_dir, exist_ok=True)
+    try:
+        batch_path = os.path.join(work_dir, 'batch.mp3')
+        write_file_atomic(batch_path, synthesize(batch_text(frames)))
+        try:
+            decoded = decode_audio(batch_path, os.path.join(work_dir, DECODED_DIRNAME))
+        except AudioDecodeError as e:
+            raise TTSBatchError(str(e))
+
+        speech = detect_speech(decoded.load_asr())
+        bounds = frame_bounds(find_cuts(speech.regions, len(frames)), decoded.duration)
+        verify_split(frames, speech.regions, bounds)
+
+        pieces = []
+        for frame, (start, end) in zip(frames, bounds):
+            piece = os.path.join(work_dir, f"frame_{frame.number}.mp3")
+            cut_audio(decoded.pcm_path, start, end, piece)
+            pieces.append(piece)
+        for frame, piece in zip(frames, pieces):
+            # Replace rather than overwrite: the file may be a hard link into
+            # the course content store
+            os.replace(piece, os.path.join(audio_dir, f"frame_{frame.number}.mp3"))
+        return {frame.number: bound for frame, bound in zip(frames, bounds)}
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        try:
+            os.rmdir(os.path.dirname(work_dir))
+        except OSError:
+            pass  # Another batch is still in progress
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Voice Activity Detection for Frame Audio
+
+Murf narration has leading and trailing silence and long pauses between
+sentences. An energy detector over the 16 kHz ASR samples (audio_decode.py)
+finds the speech regions of each frame so that:
+
+- Whisper only decodes speech: regions are concatenated into one compact
+  array and the word timestamps are mapped back to frame time
+- Subtitle cues end where the speech ends instead of hanging over a silent
+  tail (see subtitles.iter_frame_cues)
+
+Detection is a 30 ms RMS envelope compared against the frame's own noise
+floor, with short pauses bridged and a little padding kept around each
+region so word onsets and releases are never clipped. Speech maps are cached
+next to the decoded audio, keyed by the same content hash.
+
+Usage:
+    python3 vad.py Week-1/Video-1      # Speech regions and silence per frame
+"""
+
+import os
+import sys
+import json
+import argparse
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from audio_decode import (DecodedAudio, decode_all, AudioDecodeError,
+                          ASR_SAMPLE_RATE, DECODED_DIRNAME)
+from word_timing import WordTimingTable
+from atomic_io import write_json_atomic
+
+
+VAD_VERSION = 1                 # Bump when detection changes (invalidates speech maps + transcripts)
+WINDOW_SECONDS = 0.03           # RMS analysis window
+NOISE_PERCENTILE = 10           # Quietest windows that define the noise floor
+THRESHOLD_MARGIN_DB = 12.0      # Speech is this far above the noise floor...
+MIN_THRESHOLD_DB = -50.0        # ...and never below this (digital silence has no floor)
+MERGE_GAP_SECONDS = 0.3         # Pauses shorter than this stay inside a region
+MIN_SPEECH_SECONDS = 0.12       # Shorter blips (clicks, breaths) are ignored
+PAD_SECONDS = 0.15              # Kept either side of each region
+
+
+class SpeechMap:
+    """
+    Speech regions of one audio file, in seconds from its start
+
+    Also maps between source time and "compact" time, i.e. positions in
+    the concatenation of the regions that Whisper actually hears.
+    """
+    __slots__ = ('regions', 'duration')
+
+    def __init__(self, regions: List[Tuple[float, float]], duration: float):
+        self.regions = regions
+        self.duration = duration
+
+    @property
+    def speech_duration(self) -> float:
+        return sum(end - start for start, end in self.regions)
+
+    @property
+    def silence_duration(self) -> float:
+        return self.duration - self.speech_duration
+
+    @property
+    def speech_end(self) -> float:
+        """End of the last region (where a frame's narration actually stops)"""
+        return self.regions[-1][1] if self.regions else self.duration
+
+    def compact(self, samples, sample_rate: int = ASR_SAMPLE_RATE):
+        """Concatenate the speech regions of samples into one array"""
+        import numpy
+        if self.is_whole():
+            return samples
+        return numpy.concatenate([samples[int(start * sample_rate):int(end * sample_rate)]
+                                  for start, end in self.regions])
+
+    def is_whole(self) -> bool:
+        """True if the single region covers the whole file (nothing to skip)"""
+        return (len(self.regions) == 1 and self.regions[0][0] <= 0.0
+                and self.regions[0][1] >= self.duration - 1e-3)
+
+    def to_source_time(self, compact_time: float) -> float:
+        """Position in the compact audio -> seconds into the original audio"""
+        elapsed = 0.0
+        for start, end in self.regions:
+            length = end - start
+            if compact_time <= elapsed + length:
+                return start + max(0.0, compact_time - elapsed)
+            elapsed += length
+        return self.speech_end
+
+    def to_source_words(self, words: WordTimingTable) -> WordTimingTable:
+        """Map a transcript of the compact audio back to source time"""
+        if self.is_whole():
+            return words
+        table = WordTimingTable(words.strings)
+        for word, start, end in words:
+            table.append(word, self.to_source_time(start), self.to_source_time(end))
+        return table
+
+    def region_end(self, seconds: float) -> float:
+        """End of the region containing seconds, or of the last one before it"""
+        end = self.regions[0][1] if self.regions else self.duration
+        for start, region_end in self.regions:
+            if start > seconds:
+                break
+            end = region_end
+        return end
+
+    def clamp_words(self, words: Iterable[Tuple[str, float, float]],
+                    offset: float = 0.0) -> Iterator[Tuple[str, float, float]]:
+        """
+        Trim word end times that run past their speech region
+
+        Whisper tends to stretch the last word before a pause over the
+        silence; offset is the audio's start time in the word timeline.
+        """
+        for word, start, end in words:
+            limit = self.region_end(start - offset) + offset
+            yield word, start, max(start, min(end, limit))
+
+    def to_json(self) -> dict:
+        return {'version': VAD_VERSION, 'duration': self.duration,
+                'regions': [[round(s, 4), round(e, 4)] for s, e in self.regions]}
+
+    @classmethod
+    def from_json(cls, data: dict) -> Optional['SpeechMap']:
+        if data.get('version') != VAD_VERSION:
+            return None
+        return cls([(s, e) for s, e in data['regions']], data['duration'])
+
+
+def detect_speech(samples, sample_rate: int = ASR_SAMPLE_RATE) -> SpeechMap:
+    """
+    Find speech regions in mono float samples
+
+    If nothing clears the threshold the whole file is returned as one
+    region, so a misjudged quiet recording is transcribed as before rather
+    than dropped.
+    """
+    import numpy
+
+    duration = len(samples) / sample_rate
+    window = int(WINDOW_SECONDS * sample_rate)
+    count = len(samples) // window
+    if count == 0:
+        return SpeechMap([(0.0, duration)], duration)
+
+    frames = numpy.asarray(samples[:count * window], dtype=numpy.float32).reshape(count, window)
+    rms = numpy.sqrt(numpy.mean(frames * frames, axis=1, dtype=numpy.float64))
+    level = 20 * numpy.log10(rms + 1e-10)
+    threshold = max(MIN_THRESHOLD_DB,
+                    float(numpy.percentile(level, NOISE_PERCENTILE)) + THRESHOLD_MARGIN_DB)
+    active = level > threshold
+
+    # Runs of active windows, in seconds
+    edges = numpy.flatnonzero(numpy.diff(numpy.concatenate(([0], active.astype(numpy.int8), [0]))))
+    runs = [(start * WINDOW_SECONDS, end * WINDOW_SECONDS)
+            for start, end in zip(edges[::2], edges[1::2])]
+
+    merged: List[List[float]] = []
+    for start, end in runs:
+        if merged and start - merged[-1][1] < MERGE_GAP_SECONDS:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    regions: List[Tuple[float, float]] = []
+    for start, end in merged:
+        if end - start < MIN_SPEECH_SECONDS:
+            continue
+        start = max(0.0, start - PAD_SECONDS)
+        end = min(duration, end + PAD_SECONDS)
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+
+    if not regions:
+        regions = [(0.0, duration)]
+    return SpeechMap(regions, duration)
+
+
+def speech_map_for(decoded: DecodedAudio) -> SpeechMap:
+    """Speech map for decoded audio, cached beside it by content hash"""
+    cache_path = os.path.join(os.path.dirname(decoded.asr_path),
+                              f"{decoded.digest}.speech.json")
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = SpeechMap.from_json(json.load(f))
+        if cached is not None:
+            return cached
+    except (OSError, ValueError, KeyError):
+        pass
+
+    speech = detect_speech(decoded.load_asr())
+    write_json_atomic(cache_path, speech.to_json())
+    return speech
+
+
+def main():
+    """Report speech regions and skippable silence for a video folder"""
+    parser = argparse.ArgumentParser(description="Detect speech regions in frame audio")
+    parser.add_argument('video_folder', help="Video folder containing audio/")
+    args = parser.parse_args()
+
+    audio_dir = os.path.join(args.video_folder, 'audio')
+    if not os.path.isdir(audio_dir):
+        print(f"Error: Folder not found: {audio_dir}")
+        sys.exit(1)
+
+    paths = sorted((os.path.join(audio_dir, name) for name in os.listdir(audio_dir)
+                    if name.endswith('.mp3')),
+                   key=lambda p: (len(p), p))
+    try:
+        decoded = decode_all(paths, os.path.join(args.video_folder, '.build', DECODED_DIRNAME))
+    except AudioDecodeError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    total = speech_total = 0.0
+    for audio in decoded:
+        speech = speech_map_for(audio)
+        total += speech.duration
+        speech_total += speech.speech_duration
+        print(f"  {os.path.basename(audio.source):<16} {speech.speech_duration:6.2f}s speech "
+              f"of {speech.duration:6.2f}s in {len(speech.regions)} region(s), "
+              f"ends at {speech.speech_end:.2f}s")
+
+    if total:
+        print(f"\n✓ {total - speech_total:.1f}s of {total:.1f}s is silence "
+              f"({(total - speech_total) / total:.0%} less audio for Whisper)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Sampled Render Verification
+
+Checking only the container duration misses the failures that matter: a
+frame that drifted against its narration, a black or wrong slide, silent or
+shifted audio. Watching the whole video catches them but takes minutes.
+Instead, every frame is checked at a few seeked timestamps:
+
+- Mid-hold picture: a downscaled thumbnail (subtitle band cropped) must
+  match the frame's source PNG better than any other frame's, and must not
+  be black
+- Fade-in midpoint: the picture's brightness relative to the source tells
+  how far the frame's fade (and so its start) is from where the timeline
+  says it should be; this measures video drift to a frame or two
+- Mid-hold audio: the loudness envelope around the middle of the frame is
+  cross-correlated with the frame's source MP3, which gives the audio drift
+  and the level difference
+
+Each sample is one short FFmpeg seek, run in parallel, so a 10-minute
+lecture is verified in seconds without decoding the whole file. Source
+audio comes from the decode cache (audio_decode.py).
+
+Usage:
+    python3 verify_render.py Week-1/Video-1
+    python3 verify_render.py Week-1/Video-1 --jobs 8
+
+compile_video.py runs this as part of step 8 (verification).
+"""
+
+import io
+import os
+import math
+import sys
+import time
+import shutil
+import argparse
+import contextlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+
+THUMB_WIDTH, THUMB_HEIGHT = 64, 36
+SUBTITLE_BAND = 0.4            # Bottom share of the picture ignored (two-line subtitle box)
+IMAGE_TOLERANCE = 6.0          # Mean absolute thumbnail difference (0-255) for a match
+IMAGE_MARGIN = 0.5             # A picture this much closer to another frame's PNG is that frame
+BLACK_LEVEL = 10.0             # Mean brightness below this is a black frame
+DARK_SOURCE_LEVEL = 30.0       # Sources darker than this get no black/fade checks
+DRIFT_TOLERANCE = 0.1          # Seconds of video or audio drift allowed
+AUDIO_WINDOW = 2.0             # Seconds of narration compared per frame
+AUDIO_HOP = 0.02               # Loudness envelope resolution
+MAX_AUDIO_LAG = 0.5            # Largest audio drift searched for
+LEVEL_TOLERANCE_DB = 3.0
+SILENCE_DB = -45.0
+AUDIO_RATE = 16000             # audio_decode.ASR_SAMPLE_RATE
+VERIFY_JOBS = max(1, os.cpu_count() or 1)
+MAX_REPORTED_ISSUES = 10
+
+
+class RenderVerifyError(Exception):
+    """A sample could not be decoded"""
+    pass
+
+
+def run_ffmpeg(cmd: List[str]) -> bytes:
+    try:
+        result = subprocess.run(cmd, capture_output=True)
+    except OSError as e:
+        raise RenderVerifyError(f"Could not run ffmpeg: {e}")
+    if result.returncode != 0 or not result.stdout:
+        raise RenderVerifyError(f"FFmpeg failed: {result.stderr.decode(errors='replace')[-300:]}")
+    return result.stdout
+
+
+def crop_subtitles(thumb):
+    return thumb[:int(THUMB_HEIGHT * (1 - SUBTITLE_BAND))]
+
+
+def grab_thumbnail(video_path: str, at: float):
+    """Downscaled RGB picture shown at a time (accurate seek, one frame decoded out)"""
+    import numpy
+    data = run_ffmpeg(['ffmpeg', '-v', 'error', '-nostdin', '-ss', f"{at:.3f}", '-i', video_path,
+                       '-an', '-sn', '-frames:v', '1',
+                       '-vf', f"scale={THUMB_WIDTH}:{THUMB_HEIGHT}:flags=area",
+                       '-pix_fmt', 'rgb24', '-f', 'rawvideo', 'pipe:1'])
+    thumb = numpy.frombuffer(data, dtype=numpy.uint8)[:THUMB_WIDTH * THUMB_HEIGHT * 3]
+    return crop_subtitles(thumb.reshape(THUMB_HEIGHT, THUMB_WIDTH, 3).astype(numpy.float32))
+
+
+@lru_cache(maxsize=256)
+def source_thumbnail(image_path: str):
+    import numpy
+    from PIL import Image
+    with Image.open(image_path) as image:
+        thumb = image.convert('RGB').resize((THUMB_WIDTH, THUMB_HEIGHT), Image.BOX)
+    return crop_subtitles(numpy.asarray(thumb, dtype=numpy.float32))
+
+
+def grab_audio(video_path: str, start: float, duration: float):
+    """Mono AUDIO_RATE float samples of the output's audio track"""
+    import numpy
+    data = run_ffmpeg(['ffmpeg', '-v', 'error', '-nostdin', '-ss', f"{max(0.0, start):.3f}",
+                       '-i', video_path, '-t', f"{duration:.3f}", '-vn', '-sn',
+                       '-ac', '1', '-ar', str(AUDIO_RATE), '-f', 'f32le', 'pipe:1'])
+    return numpy.frombuffer(data, dtype='<f4')
+
+
+def envelope(samples):
+    """RMS per AUDIO_HOP"""
+    import numpy
+    hop = int(AUDIO_RATE * AUDIO_HOP)
+    count = len(samples) // hop
+    frames = numpy.asarray(samples[:count * hop], dtype=numpy.float64).reshape(count, hop)
+    return numpy.sqrt(numpy.mean(frames ** 2, axis=1))
+
+
+def level_db(samples) -> float:
+    import numpy
+    if not len(samples):
+        return 20 * math.log10(1e-9)
+    rms = float(numpy.sqrt(numpy.mean(numpy.square(samples, dtype=numpy.float64))))
+    return 20 * math.log10(max(rms, 1e-9))
+
+
+def audio_lag(source, output) -> Optional[float]:
+    """
+    Seconds the output audio is late against the source (negative: early)
+
+    output must span MAX_AUDIO_LAG more on each side. None if the source
+    window has no variation to align on.
+    """
+    import numpy
+    src = envelope(source)
+    out = envelope(output)
+    if len(src) < 2 or src.std() == 0:
+        return None
+    src = (src - src.mean()) / src.std()
+    best, best_score = None, -numpy.inf
+    for shift in range(0, len(out) - len(src) + 1):
+        window = out[shift:shift + len(src)]
+        if window.std() == 0:
+            continue
+        score = float(numpy.dot(src, (window - window.mean()) / window.std()))
+        if score > best_score:
+            best, best_score = shift, score
+    if best is None:
+        return None
+    return (best - int(round(MAX_AUDIO_LAG / AUDIO_HOP))) * AUDIO_HOP
+
+
+def check_frame(video_path: str, frame, fade: float, sources: Dict) -> Dict:
+    """
+    Sample one frame's picture at fade-in and mid-hold, and its audio; returns findings
+
+    sources maps every frame number to its source thumbnail, so a picture
+    showing the wrong slide can be named.
+    """
+    import numpy
+    result = {'frame': frame.number, 'issues': []}
+    start, end = frame.actual_start_time, frame.actual_end_time
+    duration = end - start
+    source = sources[frame.number]
+    source_level = float(source.mean())
+
+    # Picture in the middle of the hold
+    if duration > 2 * fade:
+        shown = grab_thumbnail(video_path, start + duration / 2)
+        result['image_diff'] = round(float(numpy.abs(shown - source).mean()), 2)
+        closest = min(sources, key=lambda n: float(numpy.abs(shown - sources[n]).mean()))
+        closest_diff = float(numpy.abs(shown - sources[closest]).mean())
+        if source_level >= DARK_SOURCE_LEVEL and shown.mean() < BLACK_LEVEL:
+            result['issues'].append(f"frame {frame.number}: black picture at "
+                                    f"{start + duration / 2:.1f}s")
+        elif closest_diff + IMAGE_MARGIN < result['image_diff']:
+            result['issues'].append(f"frame {frame.number}: shows frame {closest}'s picture "
+                                    f"at {start + duration / 2:.1f}s")
+        elif result['image_diff'] > IMAGE_TOLERANCE:
+            result['issues'].append(f"frame {frame.number}: picture differs from "
+                                    f"{os.path.basename(frame.image_path)} "
+                                    f"(diff {result['image_diff']:.1f})")
+
+    # Brightness half way through the fade-in gives the video drift
+    if fade > 0 and duration > 2 * fade and source_level >= DARK_SOURCE_LEVEL:
+        at = start + fade / 2
+        factor = float(grab_thumbnail(video_path, at).mean()) / source_level
+        drift = (factor - 0.5) * fade
+        result['video_drift'] = round(drift, 3)
+        if abs(drift) > DRIFT_TOLERANCE:
+            direction = 'early' if drift > 0 else 'late'
+            # Outside the fade the picture is fully black or fully shown
+            amount = (f"more than {fade / 2:.2f}s" if not 0.05 < factor < 0.95
+                      else f"about {abs(drift):.2f}s")
+            result['issues'].append(f"frame {frame.number}: picture {amount} {direction}")
+
+    # Narration around the middle of the frame
+    audio = frame.decoded.load_asr()
+    middle = min(duration, frame.actual_audio_duration) / 2
+    first = int(max(0.0, middle - AUDIO_WINDOW / 2) * AUDIO_RATE)
+    source_audio = numpy.asarray(audio[first:first + int(AUDIO_WINDOW * AUDIO_RATE)])
+    if len(source_audio):
+        window_start = start + first / AUDIO_RATE
+        output_audio = grab_audio(video_path, window_start - MAX_AUDIO_LAG,
+                                  len(source_audio) / AUDIO_RATE + 2 * MAX_AUDIO_LAG)
+        source_db = level_db(source_audio)
+        if source_db > SILENCE_DB:
+            lag = audio_lag(source_audio, output_audio) if window_start >= MAX_AUDIO_LAG else None
+            if lag is not None:
+                result['audio_drift'] = round(lag, 3)
+                if abs(lag) > DRIFT_TOLERANCE:
+                    direction = 'late' if lag > 0 else 'early'
+                    result['issues'].append(f"frame {frame.number}: audio about "
+                                            f"{abs(lag):.2f}s {direction}")
+            shift = int(round((lag or 0.0) * AUDIO_RATE))
+            lo = int(MAX_AUDIO_LAG * AUDIO_RATE) + shift
+            matched = output_audio[max(0, lo):max(0, lo) + len(source_audio)]
+            result['level_diff_db'] = round(level_db(matched) - source_db, 1)
+            if abs(result['level_diff_db']) > LEVEL_TOLERANCE_DB:
+                result['issues'].append(f"frame {frame.number}: audio level "
+                                        f"{result['level_diff_db']:+.1f} dB vs source")
+    return result
+
+
+def verify_render(video_path: str, frames: List, fade: float,
+                  jobs: int = VERIFY_JOBS) -> Dict:
+    """
+    Check every frame of a rendered video by sampling
+
+    frames are compile_video FrameData with actual times, image paths and
+    decoded audio (validate_input_files). Returns a summary: samples taken,
+    worst drifts, per-frame findings and a list of issues (empty if OK).
+    """
+    started = time.monotonic()
+    sources = {frame.number: source_thumbnail(frame.image_path) for frame in frames}
+
+    def check(frame) -> Dict:
+        try:
+            return check_frame(video_path, frame, fade, sources)
+        except RenderVerifyError as e:
+            return {'frame': frame.number, 'issues': [f"frame {frame.number}: {e}"]}
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        checks = list(pool.map(check, frames))
+
+    def worst(field: str) -> Optional[float]:
+        values = [abs(c[field]) for c in checks if field in c]
+        return max(values) if values else None
+
+    return {
+        'frames': len(checks),
+        'samples': sum(('image_diff' in c) + ('video_drift' in c) + ('level_diff_db' in c)
+                       for c in checks),
+        'max_video_drift': worst('video_drift'),
+        'max_audio_drift': worst('audio_drift'),
+        'max_image_diff': worst('image_diff'),
+        'issues': [issue for c in checks for issue in c['issues']],
+        'checks': checks,
+        'seconds': round(time.monotonic() - started, 2),
+    }
+
+
+def describe(summary: Dict) -> List[str]:
+    """Report lines: one summary line, then the issues (capped)"""
+    drifts = []
+    for label, field in (('video', 'max_video_drift'), ('audio', 'max_audio_drift')):
+        if summary[field] is not None:
+            drifts.append(f"{label} drift ≤ {summary[field]:.2f}s")
+    symbol = '⚠' if summary['issues'] else '✓'
+    lines = [f"{symbol} Sampled {summary['samples']} points in {summary['frames']} frames "
+             f"({summary['seconds']:.1f}s): "
+             + (', '.join(drifts) if drifts else 'no drift measured')]
+    lines += [f"⚠ {issue}" for issue in summary['issues'][:MAX_REPORTED_ISSUES]]
+    if len(summary['issues']) > MAX_REPORTED_ISSUES:
+        lines.append(f"⚠ ... and {len(summary['issues']) - MAX_REPORTED_ISSUES} more")
+    return lines
+
+
+def main():
+    """Verify a compiled video against its frames and audio"""
+    import compile_video
+
+    parser = argparse.ArgumentParser(description="Verify final_video.mp4 by sampling")
+    parser.add_argument('video_folder', help="Video folder with final_video.mp4")
+    parser.add_argument('--jobs', type=int, default=VERIFY_JOBS,
+                        help=f"Parallel samples (default {VERIFY_JOBS})")
+    args = parser.parse_args()
+
+    video_path = os.path.join(args.video_folder, 'final_video.mp4')
+    if not os.path.exists(video_path):
+        print(f"Error: Not found: {video_path}")
+        sys.exit(1)
+    if shutil.which('ffmpeg') is None:
+        print("Error: ffmpeg must be on PATH")
+        sys.exit(1)
+
+    try:
+        frames = compile_video.parse_script(os.path.join(args.video_folder, 'script.md'))
+        with contextlib.redirect_stdout(io.StringIO()):
+            compile_video.validate_input_files(args.video_folder, frames)
+    except (OSError, compile_video.VideoCompilationError) as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    summary = verify_render(video_path, frames, compile_video.FADE_DURATION, args.jobs)
+    for line in describe(summary):
+        print(line)
+    sys.exit(1 if summary['issues'] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Compact Word-Timestamp Table
+
+Stores word-level timings as parallel float arrays plus word ids into an
+interned string table, instead of one dict per word. A course-wide run with
+tens of thousands of words keeps a few bytes per word, every repeated word
+("the", "risk", ...) is stored once, and tables serialize to a flat binary
+blob for the transcript cache.
+
+Used by alignment, subtitle generation and transcript caching in
+compile_video.py.
+"""
+
+import sys
+import struct
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+CACHE_MAGIC = b'WTT1'
+
+
+class StringTable:
+    """Interned strings addressed by integer id"""
+    __slots__ = ('strings', '_ids')
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def intern(self, text: str) -> int:
+        """Return the id for text, adding it on first use"""
+        string_id = self._ids.get(text)
+        if string_id is None:
+            string_id = len(self.strings)
+            self._ids[text] = string_id
+            self.strings.append(text)
+        return string_id
+
+    def __getitem__(self, string_id: int) -> str:
+        return self.strings[string_id]
+
+    def __len__(self):
+        return len(self.strings)
+
+
+# Shared by every table in the process, so words are interned course-wide
+SHARED_STRINGS = StringTable()
+
+
+class WordTimingTable:
+    """
+    Word timings as parallel arrays: word_ids[i], starts[i], ends[i]
+
+    Iterating yields (word, start, end) tuples.
+    """
+    __slots__ = ('strings', 'word_ids', 'starts', 'ends')
+
+    def __init__(self, strings: Optional[StringTable] = None):
+        self.strings = strings if strings is not None else SHARED_STRINGS
+        self.word_ids = array('I')
+        self.starts = array('d')
+        self.ends = array('d')
+
+    def append(self, word: str, start: float, end: float) -> None:
+        self.word_ids.append(self.strings.intern(word))
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def word(self, index: int) -> str:
+        return self.strings[self.word_ids[index]]
+
+    def __len__(self):
+        return len(self.word_ids)
+
+    def __iter__(self) -> Iterator[Tuple[str, float, float]]:
+        strings = self.strings.strings
+        for word_id, start, end in zip(self.word_ids, self.starts, self.ends):
+            yield strings[word_id], start, end
+
+    def shifted(self, offset: float) -> 'WordTimingTable':
+        """Return a copy with every timestamp moved by offset seconds"""
+        table = WordTimingTable(self.strings)
+        table.word_ids = array('I', self.word_ids)
+        table.starts = array('d', (t + offset for t in self.starts))
+        table.ends = array('d', (t + offset for t in self.ends))
+        return table
+
+    @classmethod
+    def from_whisper_result(cls, result: Dict,
+                            strings: Optional[StringTable] = None) -> 'WordTimingTable':
+        """Flatten a Whisper transcribe() result's word timestamps"""
+        table = cls(strings)
+        for segment in result.get('segments', []):
+            for word in segment.get('words', ()):
+                table.append(word['word'].strip(), word['start'], word['end'])
+        return table
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize to a compact little-endian blob
+
+        Only the strings this table uses are written, renumbered densely.
+        """
+        local_ids: Dict[int, int] = {}
+        local_strings: List[str] = []
+        word_ids = array('I')
+        for word_id in self.word_ids:
+            local_id = local_ids.get(word_id)
+            if local_id is None:
+                local_id = len(local_strings)
+                local_ids[word_id] = local_id
+                local_strings.append(self.strings[word_id])
+            word_ids.append(local_id)
+
+        starts = array('d', self.starts)
+        ends = array('d', self.ends)
+        if sys.byteorder == 'big':
+            for values in (word_ids, starts, ends):
+                values.byteswap()
+
+        string_blob = '\0'.join(local_strings).encode('utf-8')
+        header = struct.pack('<4sII', CACHE_MAGIC, len(local_strings), len(string_blob))
+        return (header + string_blob + struct.pack('<I', len(word_ids)) +
+                word_ids.tobytes() + starts.tobytes() + ends.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data: bytes,
+                   strings: Optional[StringTable] = None) -> 'WordTimingTable':
+        """Deserialize a blob written by to_bytes()"""
+        magic, num_strings, blob_size = struct.unpack_from('<4sII', data, 0)
+        if magic != CACHE_MAGIC:
+            raise ValueError("Not a word timing table")
+        offset = struct.calcsize('<4sII')
+        local_strings = data[offset:offset + blob_size].decode('utf-8').split('\0') \
+            if num_strings else []
+        offset += blob_size
+        (count,) = struct.unpack_from('<I', data, offset)
+        offset += 4
+
+        word_ids = array('I')
+        starts = array('d')
+        ends = array('d')
+        for values in (word_ids, starts, ends):
+            size = count * values.itemsize
+            values.frombytes(data[offset:offset + size])
+            offset += size
+            if sys.byteorder == 'big':
+                values.byteswap()
+
+        table = cls(strings)
+        remap = array('I', (table.strings.intern(s) for s in local_strings))
+        table.word_ids = array('I', (remap[i] for i in word_ids))
+        table.starts = starts
+        table.ends = ends
+        return table